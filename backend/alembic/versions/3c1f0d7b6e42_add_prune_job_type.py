@@ -0,0 +1,28 @@
+"""add prune job type
+
+Revision ID: 3c1f0d7b6e42
+Revises: 9ee9fc245a02
+Create Date: 2026-10-17 14:03:18.220914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f0d7b6e42'
+down_revision: Union[str, Sequence[str], None] = '9ee9fc245a02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TYPE job_type ADD VALUE IF NOT EXISTS 'PRUNE'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Postgres cannot drop a single enum value; drop queued prune jobs instead
+    op.execute("DELETE FROM jobs WHERE job_type = 'PRUNE'")
@@ -0,0 +1,62 @@
+"""add jobs table
+
+Revision ID: 9ee9fc245a02
+Revises: a94a90e0071a
+Create Date: 2026-10-17 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '9ee9fc245a02'
+down_revision: Union[str, Sequence[str], None] = 'a94a90e0071a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('dream_id', sa.Integer(), nullable=True),
+    sa.Column('job_type', sa.Enum('INDEX', 'REINDEX', 'EXTRACT', name='job_type'), nullable=False),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', name='job_status'), nullable=False),
+    sa.Column('dedup_key', sa.String(length=100), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('done', sa.Integer(), nullable=True),
+    sa.Column('failed', sa.Integer(), nullable=True),
+    sa.Column('errors', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['dream_id'], ['dreams.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+    op.create_index('ix_jobs_user_id', 'jobs', ['user_id'], unique=False)
+    op.create_index('ix_jobs_status_created', 'jobs', ['status', 'created_at'], unique=False)
+    op.create_index(
+        'uq_jobs_active_dedup_key', 'jobs', ['dedup_key'],
+        unique=True,
+        postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_jobs_active_dedup_key', table_name='jobs', postgresql_where=sa.text("status IN ('QUEUED', 'RUNNING')"))
+    op.drop_index('ix_jobs_status_created', table_name='jobs')
+    op.drop_index('ix_jobs_user_id', table_name='jobs')
+    op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+    op.drop_table('jobs')
+    sa.Enum(name='job_status').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='job_type').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,61 @@
+"""add full-text search indexes
+
+Revision ID: c4e8a17f5b29
+Revises: 7b3f9c1d2e84
+Create Date: 2026-10-17 18:20:11.530482
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a17f5b29'
+down_revision: Union[str, Sequence[str], None] = '7b3f9c1d2e84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(narrative, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(personal_interpretation, '')), 'C')"
+)
+
+TRIGRAM_INDEXES = [
+    ('ix_symbols_name_trgm', 'symbols', 'name'),
+    ('ix_characters_name_trgm', 'characters', 'name'),
+    ('ix_dream_themes_theme_trgm', 'dream_themes', 'theme'),
+    ('ix_dream_emotions_emotion_trgm', 'dream_emotions', 'emotion'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column('dreams', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_dreams_search_vector', 'dreams', ['search_vector'], unique=False, postgresql_using='gin')
+
+    for index_name, table_name, column in TRIGRAM_INDEXES:
+        op.create_index(
+            index_name, table_name, [column],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for index_name, table_name, _ in reversed(TRIGRAM_INDEXES):
+        op.drop_index(index_name, table_name=table_name)
+
+    op.drop_index('ix_dreams_search_vector', table_name='dreams')
+    op.drop_column('dreams', 'search_vector')
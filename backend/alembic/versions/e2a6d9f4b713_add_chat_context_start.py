@@ -0,0 +1,28 @@
+"""add chat context start
+
+Revision ID: e2a6d9f4b713
+Revises: c4e8a17f5b29
+Create Date: 2026-10-17 19:41:08.204715
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a6d9f4b713'
+down_revision: Union[str, Sequence[str], None] = 'c4e8a17f5b29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('context_start_message_id', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('chats', 'context_start_message_id')
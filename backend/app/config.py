@@ -26,6 +26,38 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 60 * 24 * 7
 
     graph_storage_path: str = "./data/graphs"
+    graph_index_batch_size: int = 5
+    graph_index_tokens_per_minute: int = 200_000
+    graph_index_burst_tokens: int = 40_000
+    graph_cache_max_instances: int = 32
+    graph_cache_max_mb: int = 512
+    graph_cache_idle_seconds: int = 1800
+    analytics_cache_max_entries: int = 1024
+    extraction_cache_max_mb: int = 1024
+    embedding_cache_max_entries: int = 200000
+    vector_index_cache_max_users: int = 256
+    vector_index_cache_idle_seconds: int = 1800
+    response_cache_max_entries: int = 4096
+    answer_cache_max_users: int = 256
+    answer_cache_similarity: float = 0.95
+    image_analysis_cache_max_entries: int = 1024
+    image_max_dimension: int = 1536
+    image_max_kb: int = 800
+    upload_audio_max_mb: int = 200
+    upload_image_max_mb: int = 20
+    transcription_window_seconds: int = 60
+    transcription_overlap_seconds: int = 3
+    transcription_max_parallel: int = 4
+    agent_tool_timeout_seconds: float = 30.0
+    agent_session_max_entries: int = 1000
+    agent_session_max_mb: int = 64
+    agent_session_ttl_seconds: int = 3600
+    agent_history_token_budget: int = 6000
+    agent_tool_result_token_budget: int = 2000
+
+    job_workers: int = 2
+    job_poll_interval_seconds: float = 2.0
+    job_stale_after_seconds: int = 300
     gemini_api_key: str = ""
 
     model_config = SettingsConfigDict(
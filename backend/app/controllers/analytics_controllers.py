@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependencies.auth import get_current_user_id
-from app.repositories.analytics_repository import AnalyticsRepository
+from app.services.analytics_cache import AnalyticsSnapshot
 from app.data_models.analytics_data import (
     AnalyticsSummary,
     EmotionAnalytics,
@@ -36,8 +36,7 @@ async def get_analytics_summary(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    stats = await repo.get_summary_stats(user_id)
+    stats = await AnalyticsSnapshot(db, user_id).summary()
 
     return AnalyticsSummary(**stats)
 
@@ -50,8 +49,7 @@ async def get_emotion_analytics(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_emotion_analytics(user_id, date_from, date_to, limit)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).emotions(limit)
 
     return EmotionAnalytics(
         total_emotion_entries=data["total_emotion_entries"],
@@ -74,8 +72,7 @@ async def get_emotion_frequency(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_emotion_analytics(user_id, date_from, date_to, limit)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).emotions(limit)
     
     return [EmotionCount(**e) for e in data["most_common"]]
 
@@ -87,8 +84,7 @@ async def get_emotion_trends(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_emotion_analytics(user_id, date_from, date_to, limit=50)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).emotions()
     
     return [EmotionTrend(**t) for t in data["trends"]]
 
@@ -101,8 +97,7 @@ async def get_symbol_analytics(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_symbol_analytics(user_id, date_from, date_to, limit)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).symbols(limit)
 
     return SymbolAnalytics(
         total_symbols=data["total_symbols"],
@@ -126,8 +121,7 @@ async def get_symbol_frequency(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_symbol_analytics(user_id, date_from, date_to, limit)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).symbols(limit)
     
     return [SymbolCount(**s) for s in data["most_frequent"]]
 
@@ -140,8 +134,7 @@ async def get_symbol_cooccurrences(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_symbol_analytics(user_id, date_from, date_to, limit)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).symbols(limit)
     
     return [SymbolCooccurrence(**c) for c in data["cooccurrences"]]
 
@@ -153,8 +146,7 @@ async def get_symbol_trends(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_symbol_analytics(user_id, date_from, date_to, limit=100)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).symbols()
     
     return [SymbolTrend(**t) for t in data["trends"]]
 
@@ -167,8 +159,7 @@ async def get_character_analytics(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_character_analytics(user_id, date_from, date_to, limit)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).characters(limit)
 
     return CharacterAnalytics(
         total_characters=data["total_characters"],
@@ -189,8 +180,7 @@ async def get_character_frequency(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_character_analytics(user_id, date_from, date_to, limit)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).characters(limit)
     
     return [CharacterCount(**c) for c in data["most_frequent"]]
 
@@ -202,8 +192,7 @@ async def get_archetype_distribution(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_character_analytics(user_id, date_from, date_to, limit=100)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).characters()
     
     return [ArchetypeDistribution(**a) for a in data["archetype_distribution"]]
 
@@ -215,8 +204,7 @@ async def get_role_distribution(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_character_analytics(user_id, date_from, date_to, limit=100)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).characters()
     
     return [RoleDistribution(**r) for r in data["role_distribution"]]
 
@@ -228,8 +216,7 @@ async def get_timeline_analytics(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_timeline_analytics(user_id, date_from, date_to)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).timeline()
 
     return TimelineAnalytics(
         daily_counts=data["daily_counts"],
@@ -248,8 +235,7 @@ async def get_daily_dream_counts(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_timeline_analytics(user_id)
+    data = await AnalyticsSnapshot(db, user_id).timeline()
     
     return data["daily_counts"][-days:]
 
@@ -260,8 +246,7 @@ async def get_monthly_dream_counts(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_timeline_analytics(user_id)
+    data = await AnalyticsSnapshot(db, user_id).timeline()
     
     return data["monthly_counts"][-months:]
 
@@ -273,8 +258,7 @@ async def get_pattern_analytics(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_pattern_analytics(user_id, date_from, date_to)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).patterns()
 
     return PatternAnalytics(
         recurring_themes=data["recurring_themes"],
@@ -293,8 +277,7 @@ async def get_symbol_emotion_correlations(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_pattern_analytics(user_id, date_from, date_to)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).patterns()
 
     correlations = [
         c for c in data["symbol_emotion_correlations"]
@@ -310,8 +293,7 @@ async def get_lucidity_distribution(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_pattern_analytics(user_id, date_from, date_to)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).patterns()
     
     return [LucidityAnalytics(**l) for l in data["lucidity_distribution"]]
 
@@ -323,8 +305,7 @@ async def get_sleep_quality_correlations(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_pattern_analytics(user_id, date_from, date_to)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).patterns()
     
     return [SleepQualityCorrelation(**s) for s in data["sleep_quality_correlations"]]
 
@@ -336,8 +317,7 @@ async def get_detected_patterns(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    data = await repo.get_pattern_analytics(user_id, date_from, date_to)
+    data = await AnalyticsSnapshot(db, user_id, date_from, date_to).patterns()
     
     return [DreamPattern(**p) for p in data["detected_patterns"]]
 
@@ -349,9 +329,9 @@ async def get_shadow_activity(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    char_data = await repo.get_character_analytics(user_id, date_from, date_to, limit=100)
-    pattern_data = await repo.get_pattern_analytics(user_id, date_from, date_to)
+    snapshot = AnalyticsSnapshot(db, user_id, date_from, date_to)
+    char_data = await snapshot.characters()
+    pattern_data = await snapshot.patterns()
 
     shadow_stats = None
     for arch in char_data["archetype_distribution"]:
@@ -383,8 +363,7 @@ async def get_anima_animus_activity(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
-    char_data = await repo.get_character_analytics(user_id, date_from, date_to, limit=100)
+    char_data = await AnalyticsSnapshot(db, user_id, date_from, date_to).characters()
 
     anima_stats = None
     animus_stats = None
@@ -415,11 +394,11 @@ async def get_individuation_progress(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    repo = AnalyticsRepository(db)
+    snapshot = AnalyticsSnapshot(db, user_id)
 
-    summary = await repo.get_summary_stats(user_id)
-    char_data = await repo.get_character_analytics(user_id, limit=100)
-    pattern_data = await repo.get_pattern_analytics(user_id)
+    summary = await snapshot.summary()
+    char_data = await snapshot.characters()
+    pattern_data = await snapshot.patterns()
 
     archetype_diversity = len(char_data["archetype_distribution"])
     recurring_count = len(char_data["recurring_characters"])
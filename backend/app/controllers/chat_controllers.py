@@ -1,4 +1,3 @@
-import asyncio
 import time
 from typing import Optional
 
@@ -12,7 +11,8 @@ from app.database import get_db
 from app.dependencies.auth import get_current_user_id
 from app.repositories.chat_repository import ChatRepository
 from app.repositories.dream_repository import DreamRepository
-from app.services.dream_agent import DreamAgent, get_dream_agent, ChatMessage
+from app.services.dream_agent import get_dream_agent
+from app.services.agent_sessions import get_agent_sessions
 from app.data_models.chat_data import (
     ChatCreate,
     ChatUpdate,
@@ -27,12 +27,59 @@ from app.data_models.chat_data import (
 
 chat_router = APIRouter(prefix="/chat", tags=["Chat"])
 
-_agent_cache: dict[str, DreamAgent] = {}
-_agent_cache_lock = asyncio.Lock()
 
+async def _save_assistant_message(
+        chat_repo: ChatRepository,
+        dream_repo: DreamRepository,
+        chat_id: int,
+        user_id: int,
+        response,
+        processing_time: int,
+):
+    enriched_sources = []
+    source_dream_ids = []
 
-def _get_agent_cache_key(user_id: int, chat_id: int) -> str:
-    return f"{user_id}:{chat_id}"
+    for source in response.sources:
+        dream_id = source.get("dream_id")
+        if dream_id:
+            source_dream_ids.append(dream_id)
+            dream = await dream_repo.get_by_id(dream_id, user_id)
+            if dream:
+                enriched_sources.append({
+                    "dream_id": dream_id,
+                    "dream_title": dream.title,
+                    "dream_date": str(dream.dream_date),
+                    "excerpt": source.get("excerpt", ""),
+                    "relevance_score": source.get("relevance_score"),
+                })
+
+    query_type = "conversation"
+    if response.tool_calls:
+        tool_names = [tc.get("tool", "") for tc in response.tool_calls]
+        if any("symbol" in t for t in tool_names):
+            query_type = "symbol"
+        elif any("character" in t or "archetype" in t for t in tool_names):
+            query_type = "character"
+        elif any("emotion" in t for t in tool_names):
+            query_type = "emotion"
+        elif any("theme" in t for t in tool_names):
+            query_type = "theme"
+        elif any("semantic" in t for t in tool_names):
+            query_type = "pattern"
+        elif any("dream" in t for t in tool_names):
+            query_type = "general"
+
+    assistant_message = await chat_repo.add_message(
+        chat_id=chat_id,
+        role="assistant",
+        content=response.message,
+        source_dream_ids=source_dream_ids,
+        source_excerpts=enriched_sources,
+        query_type=query_type,
+        processing_time_ms=processing_time,
+    )
+
+    return assistant_message, enriched_sources, query_type
 
 
 @chat_router.post("", response_model=ChatResponse, status_code=status.HTTP_201_CREATED)
@@ -164,10 +211,7 @@ async def delete_chat(
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
 
-    cache_key = _get_agent_cache_key(user_id, chat_id)
-    async with _agent_cache_lock:
-        if cache_key in _agent_cache:
-            del _agent_cache[cache_key]
+    get_agent_sessions().drop(user_id, chat_id)
 
     return None
 
@@ -192,24 +236,8 @@ async def send_message(
         content=data.content,
     )
 
-    cache_key = _get_agent_cache_key(user_id, chat_id)
-    async with _agent_cache_lock:
-        if cache_key not in _agent_cache:
-            agent = get_dream_agent(user_id, db)
-            result = await chat_repo.get_chat_with_messages(chat_id, user_id)
-            if result:
-                _, messages = result
-                for msg in messages[:-1]:
-                    agent.conversation_history.append(
-                        ChatMessage(role=msg.role.value, content=msg.content)
-                    )
-
-            _agent_cache[cache_key] = agent
-        else:
-            agent = _agent_cache[cache_key]
-            agent.db = db
-            agent.tools.db = db
-            agent.tools.repo.db = db
+    session = await get_agent_sessions().open(db, user_id, chat_id, before_id=user_message.id)
+    agent = session.agent
 
     images = [img.model_dump() for img in data.images] if data.images else None
     logger.info(f"Processing message for chat {chat_id}, user {user_id}")
@@ -226,48 +254,10 @@ async def send_message(
         response = FallbackResponse()
 
     processing_time = int((time.time() - start_time) * 1000)
-    enriched_sources = []
-    source_dream_ids = []
-
-    for source in response.sources:
-        dream_id = source.get("dream_id")
-        if dream_id:
-            source_dream_ids.append(dream_id)
-            dream = await dream_repo.get_by_id(dream_id, user_id)
-            if dream:
-                enriched_sources.append({
-                    "dream_id": dream_id,
-                    "dream_title": dream.title,
-                    "dream_date": str(dream.dream_date),
-                    "excerpt": source.get("excerpt", ""),
-                    "relevance_score": source.get("relevance_score"),
-                })
-
-    query_type = "conversation"
-    if response.tool_calls:
-        tool_names = [tc.get("tool", "") for tc in response.tool_calls]
-        if any("symbol" in t for t in tool_names):
-            query_type = "symbol"
-        elif any("character" in t or "archetype" in t for t in tool_names):
-            query_type = "character"
-        elif any("emotion" in t for t in tool_names):
-            query_type = "emotion"
-        elif any("theme" in t for t in tool_names):
-            query_type = "theme"
-        elif any("semantic" in t for t in tool_names):
-            query_type = "pattern"
-        elif any("dream" in t for t in tool_names):
-            query_type = "general"
-
-    assistant_message = await chat_repo.add_message(
-        chat_id=chat_id,
-        role="assistant",
-        content=response.message,
-        source_dream_ids=source_dream_ids,
-        source_excerpts=enriched_sources,
-        query_type=query_type,
-        processing_time_ms=processing_time,
+    assistant_message, enriched_sources, query_type = await _save_assistant_message(
+        chat_repo, dream_repo, chat_id, user_id, response, processing_time,
     )
+    get_agent_sessions().save(session, assistant_message.id)
 
     sources = [
         DreamSource(
@@ -287,6 +277,7 @@ async def send_message(
         sources=sources,
         query_type=query_type,
         processing_time_ms=processing_time,
+        input_tokens=getattr(response, "input_tokens", None),
         created_at=assistant_message.created_at,
     )
 
@@ -302,33 +293,46 @@ async def send_message_stream(
     if not await chat_repo.chat_exists(chat_id, user_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
 
-    await chat_repo.add_message(
+    user_message = await chat_repo.add_message(
         chat_id=chat_id,
         role="user",
         content=data.content,
     )
 
+    images = [img.model_dump() for img in data.images] if data.images else None
+
     async def generate_stream():
         start_time = time.time()
-        full_response = []
 
         try:
-            cache_key = _get_agent_cache_key(user_id, chat_id)
-            if cache_key not in _agent_cache:
-                agent = get_dream_agent(user_id, db)
-                _agent_cache[cache_key] = agent
-            else:
-                agent = _agent_cache[cache_key]
-                agent.db = db
-                agent.tools.db = db
-                agent.tools.repo.db = db
-
-            async for chunk in agent.chat_stream(data.content):
-                full_response.append(chunk)
-                yield f"data: {json.dumps({'type': 'content', 'content': chunk})}\n\n"
+            session = await get_agent_sessions().open(db, user_id, chat_id, before_id=user_message.id)
+
+            response = None
+            async for event in session.agent.chat_stream(data.content, images=images):
+                if event["type"] == "response":
+                    response = event["response"]
+                    continue
+                yield f"data: {json.dumps(event, default=str)}\n\n"
 
             processing_time = int((time.time() - start_time) * 1000)
-            yield f"data: {json.dumps({'type': 'done', 'processing_time_ms': processing_time})}\n\n"
+            assistant_message, enriched_sources, query_type = await _save_assistant_message(
+                chat_repo, DreamRepository(db), chat_id, user_id, response, processing_time,
+            )
+            # The request's own commit may already have run by the time the body streams
+            await db.commit()
+            get_agent_sessions().save(session, assistant_message.id)
+
+            for source in enriched_sources:
+                yield f"data: {json.dumps({'type': 'source', 'source': source})}\n\n"
+
+            done = {
+                'type': 'done',
+                'message_id': assistant_message.id,
+                'query_type': query_type,
+                'processing_time_ms': processing_time,
+                'input_tokens': response.input_tokens,
+            }
+            yield f"data: {json.dumps(done)}\n\n"
 
         except Exception as e:
             logger.error(f"Stream error: {e}", exc_info=True)
@@ -340,6 +344,8 @@ async def send_message_stream(
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            # Stop reverse proxies from buffering tokens into one late flush
+            "X-Accel-Buffering": "no",
         }
     )
 
@@ -354,9 +360,8 @@ async def clear_chat_context(
     if not await chat_repo.chat_exists(chat_id, user_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
 
-    cache_key = _get_agent_cache_key(user_id, chat_id)
-    if cache_key in _agent_cache:
-        _agent_cache[cache_key].clear_history()
+    await chat_repo.reset_context(chat_id)
+    get_agent_sessions().drop(user_id, chat_id)
 
     return None
 
@@ -446,10 +451,11 @@ async def get_agent_info():
             {"name": "get_emotion_correlations", "description": "Find emotion triggers and patterns"},
             {"name": "get_themes_overview", "description": "List all themes with frequency"},
             {"name": "get_theme_analysis", "description": "Deep dive into specific themes"},
-            {"name": "search_dreams", "description": "Text search across dreams"},
+            {"name": "search_dreams", "description": "Ranked full-text search across dreams"},
             {"name": "get_recent_dreams", "description": "Get recent dream entries"},
             {"name": "get_dream_details", "description": "Full details of a specific dream"},
             {"name": "get_recurring_dreams", "description": "Find recurring dreams"},
+            {"name": "find_similar_dreams", "description": "Nearest dreams by embedding similarity"},
             {"name": "semantic_search", "description": "AI-powered semantic search via GraphRAG"},
             {"name": "get_journal_summary", "description": "Summary of dream journal stats"},
         ],
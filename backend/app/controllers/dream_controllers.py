@@ -7,12 +7,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies.auth import get_current_user_id
 from app.repositories.dream_repository import DreamRepository
+from app.repositories.job_repository import JobRepository
+from app.models.enums.dream_enums import JobType
+from app.services.graphrag_service import get_graphrag_service
+from app.services.dream_vector_index import find_similar_dreams
+from app.repositories.agent_repository import AgentRepository
+from app.data_models.job_data import JobResponse
 from app.data_models.dream_data import (
     DreamCreate,
     DreamUpdate,
     DreamResponse,
     DreamSummary,
     DreamListResponse,
+    SimilarDream,
     EmotionInDream,
     SymbolInDream,
     CharacterInDream,
@@ -22,6 +29,40 @@ from app.data_models.dream_data import (
 dream_router = APIRouter(prefix="/dreams", tags=["Dreams"])
 
 
+def _dream_response(result: dict) -> DreamResponse:
+    dream = result["dream"]
+
+    return DreamResponse(
+        id=dream.id,
+        user_id=dream.user_id,
+        title=dream.title,
+        narrative=dream.narrative,
+        dream_date=dream.dream_date,
+        setting=dream.setting,
+        development=dream.development,
+        ending=dream.ending,
+        emotions=[EmotionInDream(**e) for e in result["emotions"]],
+        emotion_on_waking=dream.emotion_on_waking,
+        emotional_intensity=dream.emotional_intensity,
+        lucidity_level=dream.lucidity_level.value if dream.lucidity_level else None,
+        sleep_quality=dream.sleep_quality,
+        is_recurring=dream.is_recurring or False,
+        is_nightmare=dream.is_nightmare or False,
+        ritual_completed=dream.ritual_completed or False,
+        ritual_description=dream.ritual_description,
+        personal_interpretation=dream.personal_interpretation,
+        conscious_context=dream.conscious_context,
+        is_indexed=dream.is_indexed or False,
+        indexed_at=dream.indexed_at,
+        ai_extraction_done=dream.ai_extraction_done or False,
+        symbols=[SymbolInDream(**s) for s in result["symbols"]],
+        characters=[CharacterInDream(**c) for c in result["characters"]],
+        themes=[ThemeInDream(**t) for t in result["themes"]],
+        created_at=dream.created_at,
+        updated_at=dream.updated_at,
+    )
+
+
 @dream_router.post("", response_model=DreamResponse, status_code=status.HTTP_201_CREATED)
 async def create_dream(
         data: DreamCreate,
@@ -164,54 +205,37 @@ async def get_dream(
             detail="Dream not found"
         )
 
-    dream = result["dream"]
-    emotions = result["emotions"]
-    symbols = result["symbols"]
-    characters = result["characters"]
-    themes = result["themes"]
+    return _dream_response(result)
 
-    return DreamResponse(
-        id=dream.id,
-        user_id=dream.user_id,
-        title=dream.title,
-        narrative=dream.narrative,
-        dream_date=dream.dream_date,
-        setting=dream.setting,
-        development=dream.development,
-        ending=dream.ending,
-        emotions=[
-            EmotionInDream(
-                emotion=e.emotion,
-                emotion_type=e.emotion_type.value if e.emotion_type else "during",
-                intensity=e.intensity
-            ) for e in emotions
-        ],
-        emotion_on_waking=dream.emotion_on_waking,
-        emotional_intensity=dream.emotional_intensity,
-        lucidity_level=dream.lucidity_level.value if dream.lucidity_level else None,
-        sleep_quality=dream.sleep_quality,
-        is_recurring=dream.is_recurring or False,
-        is_nightmare=dream.is_nightmare or False,
-        ritual_completed=dream.ritual_completed or False,
-        ritual_description=dream.ritual_description,
-        personal_interpretation=dream.personal_interpretation,
-        conscious_context=dream.conscious_context,
-        is_indexed=dream.is_indexed or False,
-        indexed_at=dream.indexed_at,
-        ai_extraction_done=dream.ai_extraction_done or False,
-        symbols=[SymbolInDream(**s) for s in symbols],
-        characters=[CharacterInDream(**c) for c in characters],
-        themes=[
-            ThemeInDream(
-                id=t.id,
-                theme=t.theme,
-                is_ai_extracted=t.is_ai_extracted,
-                is_confirmed=t.is_confirmed
-            ) for t in themes
-        ],
-        created_at=dream.created_at,
-        updated_at=dream.updated_at,
-    )
+
+@dream_router.get("/{dream_id}/similar", response_model=list[SimilarDream])
+async def get_similar_dreams(
+        dream_id: int,
+        limit: int = Query(5, ge=1, le=50),
+        user_id: int = Depends(get_current_user_id),
+        db: AsyncSession = Depends(get_db)
+):
+    dream_repo = DreamRepository(db)
+
+    if not await dream_repo.dream_exists(dream_id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dream not found"
+        )
+
+    # Dreams are embedded when they are indexed; an unindexed dream has no neighbours yet
+    matches = await find_similar_dreams(AgentRepository(db), user_id, dream_id=dream_id, limit=limit)
+
+    return [
+        SimilarDream(
+            id=m["dream_id"],
+            title=m["title"],
+            dream_date=m["date"],
+            narrative_excerpt=m["narrative_excerpt"],
+            similarity=m["similarity"],
+        )
+        for m in matches
+    ]
 
 
 @dream_router.put("/{dream_id}", response_model=DreamResponse)
@@ -230,60 +254,13 @@ async def update_dream(
         )
 
     updates = data.model_dump(exclude_none=True, exclude={"emotions"})
-    dream = await dream_repo.update_dream(dream_id, user_id, **updates)
+    await dream_repo.update_dream(dream_id, user_id, **updates)
     if data.emotions is not None:
         emotion_dicts = [e.model_dump() for e in data.emotions]
         await dream_repo.replace_dream_emotions(dream_id, emotion_dicts)
 
     result = await dream_repo.get_dream_with_associations(dream_id, user_id)
-    dream = result["dream"]
-    emotions = result["emotions"]
-    symbols = result["symbols"]
-    characters = result["characters"]
-    themes = result["themes"]
-
-    return DreamResponse(
-        id=dream.id,
-        user_id=dream.user_id,
-        title=dream.title,
-        narrative=dream.narrative,
-        dream_date=dream.dream_date,
-        setting=dream.setting,
-        development=dream.development,
-        ending=dream.ending,
-        emotions=[
-            EmotionInDream(
-                emotion=e.emotion,
-                emotion_type=e.emotion_type.value if e.emotion_type else "during",
-                intensity=e.intensity
-            ) for e in emotions
-        ],
-        emotion_on_waking=dream.emotion_on_waking,
-        emotional_intensity=dream.emotional_intensity,
-        lucidity_level=dream.lucidity_level.value if dream.lucidity_level else None,
-        sleep_quality=dream.sleep_quality,
-        is_recurring=dream.is_recurring or False,
-        is_nightmare=dream.is_nightmare or False,
-        ritual_completed=dream.ritual_completed or False,
-        ritual_description=dream.ritual_description,
-        personal_interpretation=dream.personal_interpretation,
-        conscious_context=dream.conscious_context,
-        is_indexed=dream.is_indexed or False,
-        indexed_at=dream.indexed_at,
-        ai_extraction_done=dream.ai_extraction_done or False,
-        symbols=[SymbolInDream(**s) for s in symbols],
-        characters=[CharacterInDream(**c) for c in characters],
-        themes=[
-            ThemeInDream(
-                id=t.id,
-                theme=t.theme,
-                is_ai_extracted=t.is_ai_extracted,
-                is_confirmed=t.is_confirmed
-            ) for t in themes
-        ],
-        created_at=dream.created_at,
-        updated_at=dream.updated_at,
-    )
+    return _dream_response(result)
 
 
 @dream_router.delete("/{dream_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -301,104 +278,36 @@ async def delete_dream(
             detail="Dream not found"
         )
 
+    if get_graphrag_service(user_id).graph_exists:
+        await JobRepository(db).enqueue(user_id, JobType.PRUNE)
+    await db.commit()
+
     return None
 
 
-@dream_router.post("/{dream_id}/extract", response_model=DreamResponse)
+@dream_router.post("/{dream_id}/extract", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def extract_dream_entities(
         dream_id: int,
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db)
 ):
-    from app.services.extraction_service import get_extraction_service
-    from app.repositories.symbol_repository import SymbolRepository
-    from app.repositories.character_repository import CharacterRepository
-
     dream_repo = DreamRepository(db)
-    symbol_repo = SymbolRepository(db)
-    character_repo = CharacterRepository(db)
+    job_repo = JobRepository(db)
 
-    result = await dream_repo.get_dream_with_associations(dream_id, user_id)
-    if not result:
+    dream = await dream_repo.get_by_id(dream_id, user_id)
+    if not dream:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Dream not found"
         )
 
-    dream = result["dream"]
-
     if dream.ai_extraction_done:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="AI extraction already completed for this dream"
         )
 
-    try:
-        extraction_service = get_extraction_service()
-        extraction = await extraction_service.extract_and_save(
-            dream_id=dream_id,
-            user_id=user_id,
-            narrative=dream.narrative,
-            dream_date=dream.dream_date,
-            setting=dream.setting,
-            symbol_repo=symbol_repo,
-            character_repo=character_repo,
-            dream_repo=dream_repo,
-        )
-
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="AI extraction failed. Please try again."
-        )
+    job, _ = await job_repo.enqueue(user_id, JobType.EXTRACT, dream_id=dream_id)
+    await db.commit()
 
-    result = await dream_repo.get_dream_with_associations(dream_id, user_id)
-    dream = result["dream"]
-    emotions = result["emotions"]
-    symbols = result["symbols"]
-    characters = result["characters"]
-    themes = result["themes"]
-
-    return DreamResponse(
-        id=dream.id,
-        user_id=dream.user_id,
-        title=dream.title,
-        narrative=dream.narrative,
-        dream_date=dream.dream_date,
-        setting=dream.setting,
-        development=dream.development,
-        ending=dream.ending,
-        emotions=[
-            EmotionInDream(
-                emotion=e.emotion,
-                emotion_type=e.emotion_type.value if e.emotion_type else "during",
-                intensity=e.intensity
-            ) for e in emotions
-        ],
-        emotion_on_waking=dream.emotion_on_waking,
-        emotional_intensity=dream.emotional_intensity,
-        lucidity_level=dream.lucidity_level.value if dream.lucidity_level else None,
-        sleep_quality=dream.sleep_quality,
-        is_recurring=dream.is_recurring or False,
-        is_nightmare=dream.is_nightmare or False,
-        ritual_completed=dream.ritual_completed or False,
-        ritual_description=dream.ritual_description,
-        personal_interpretation=dream.personal_interpretation,
-        conscious_context=dream.conscious_context,
-        is_indexed=dream.is_indexed or False,
-        indexed_at=dream.indexed_at,
-        ai_extraction_done=dream.ai_extraction_done or False,
-        symbols=[SymbolInDream(**s) for s in symbols],
-        characters=[CharacterInDream(**c) for c in characters],
-        themes=[
-            ThemeInDream(
-                id=t.id,
-                theme=t.theme,
-                is_ai_extracted=t.is_ai_extracted,
-                is_confirmed=t.is_confirmed
-            ) for t in themes
-        ],
-        created_at=dream.created_at,
-        updated_at=dream.updated_at,
-    )
+    return JobResponse(**job.to_dict())
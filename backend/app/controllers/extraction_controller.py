@@ -1,16 +1,23 @@
+import asyncio
 import base64
+import json
+from typing import Awaitable, Callable, Optional
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.database import get_db
 from app.data_models.extraction_data import ExtractedSymbolData, ExtractedCharacterData, ExtractedThemeData, \
     ExtractionPreviewResponse, ExtractPreviewRequest, ExtractedEmotionData, DreamCreatedResponse, \
     CreateDreamWithExtractionRequest
+from app.data_models.voice_data import TranscribeResponse
 from app.dependencies.auth import get_current_user_id
 from app.repositories.dream_repository import DreamRepository
-from app.repositories.symbol_repository import SymbolRepository
-from app.repositories.character_repository import CharacterRepository
+from app.repositories.extraction_repository import ExtractionRepository
+from app.services.audio_segments import spool_to_path, remove_spooled
 from app.services.extraction_service import get_extraction_service
 from app.services.multimodal_service import get_multimodal_service
 from app.logger import logger
@@ -18,21 +25,176 @@ from app.logger import logger
 
 extraction_router = APIRouter(prefix="/extract", tags=["Extraction"])
 
+MAX_UPLOAD_IMAGES = 10
+# Room for the form fields and multipart boundaries around the files
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+_audio_max_bytes = settings.upload_audio_max_mb * 1024 * 1024
+_image_max_bytes = settings.upload_image_max_mb * 1024 * 1024
+# Whole-body caps for the upload routes, enforced by UploadLimitMiddleware while the body streams in
+UPLOAD_BODY_LIMITS = {
+    "/extract/preview/upload": _audio_max_bytes + MAX_UPLOAD_IMAGES * _image_max_bytes + MULTIPART_OVERHEAD_BYTES,
+    "/extract/transcribe": _audio_max_bytes + MULTIPART_OVERHEAD_BYTES,
+    "/extract/transcribe/stream": _audio_max_bytes + MULTIPART_OVERHEAD_BYTES,
+}
+
+
+def _check_upload(upload: UploadFile, max_mb: int) -> None:
+    if not upload.content_type:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Missing content type for {upload.filename or 'upload'}",
+        )
+    if upload.size is not None and upload.size > max_mb * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"{upload.filename or 'Upload'} exceeds {max_mb} MB",
+        )
+
+
+async def _transcribe_upload(audio: UploadFile) -> str:
+    path = await spool_to_path(audio.file)
+    try:
+        pieces = [text async for text in get_multimodal_service().transcribe_recording(path, audio.content_type)]
+    finally:
+        remove_spooled(path)
+
+    return " ".join(pieces)
+
 
 @extraction_router.post("/preview", response_model=ExtractionPreviewResponse)
 async def extract_preview(
         data: ExtractPreviewRequest,
         user_id: int = Depends(get_current_user_id),
 ):
+    multimodal = get_multimodal_service()
+
+    transcribe = None
+    if data.audio_base64 and data.audio_mime_type:
+        transcribe = lambda: multimodal.transcribe_audio(base64.b64decode(data.audio_base64), data.audio_mime_type)
+
+    analyze = None
+    if data.images:
+        image_dicts = [img.model_dump() for img in data.images]
+        analyze = lambda: multimodal.analyze_images(image_dicts)
+
+    return await _build_preview(data.narrative or "", data.setting, transcribe, analyze)
+
+
+@extraction_router.post("/preview/upload", response_model=ExtractionPreviewResponse)
+async def extract_preview_upload(
+        narrative: str = Form(""),
+        setting: Optional[str] = Form(None),
+        audio: Optional[UploadFile] = File(None),
+        images: list[UploadFile] = File([]),
+        captions: list[str] = Form([]),
+        user_id: int = Depends(get_current_user_id),
+):
+    """Multipart variant of /preview.
+
+    Media arrives as file parts, which are spooled to temporary files in chunks as the
+    body is parsed, and is read from those files rather than decoded from base64.
+    The whole body is capped by UPLOAD_BODY_LIMITS as it arrives; each file is checked
+    against its own limit here.
+    """
+    multimodal = get_multimodal_service()
+
+    transcribe = None
+    if audio:
+        _check_upload(audio, settings.upload_audio_max_mb)
+        transcribe = lambda: _transcribe_upload(audio)
+
+    analyze = None
+    if images:
+        if len(images) > MAX_UPLOAD_IMAGES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"At most {MAX_UPLOAD_IMAGES} images per preview",
+            )
+        for image in images:
+            _check_upload(image, settings.upload_image_max_mb)
+        # Captions pair up with images by position
+        image_files = [
+            (image.file, image.content_type, captions[i] if i < len(captions) else "")
+            for i, image in enumerate(images)
+        ]
+        analyze = lambda: multimodal.analyze_image_files(image_files)
+
+    return await _build_preview(narrative, setting, transcribe, analyze)
+
+
+@extraction_router.post("/transcribe", response_model=TranscribeResponse)
+async def transcribe_upload(
+        audio: UploadFile = File(...),
+        user_id: int = Depends(get_current_user_id),
+):
+    _check_upload(audio, settings.upload_audio_max_mb)
+
+    try:
+        text = await _transcribe_upload(audio)
+    except Exception as e:
+        logger.error(f"Transcription failed: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Transcription failed. Please try again."
+        )
+
+    return TranscribeResponse(text=text)
+
+
+@extraction_router.post("/transcribe/stream")
+async def transcribe_upload_stream(
+        audio: UploadFile = File(...),
+        user_id: int = Depends(get_current_user_id),
+):
+    """Stream the transcript as segments complete, then the whole text in a final done event."""
+    _check_upload(audio, settings.upload_audio_max_mb)
+    # Copied out now, since the upload is closed once this handler returns
+    path = await spool_to_path(audio.file)
+    mime_type = audio.content_type
+
+    async def generate_stream():
+        pieces = []
+        try:
+            async for text in get_multimodal_service().transcribe_recording(path, mime_type):
+                yield f"data: {json.dumps({'type': 'segment', 'index': len(pieces), 'content': text})}\n\n"
+                pieces.append(text)
+
+            yield f"data: {json.dumps({'type': 'done', 'content': ' '.join(pieces)})}\n\n"
+
+        except Exception as e:
+            logger.error(f"Transcription stream error: {e}", exc_info=True)
+            yield f"data: {json.dumps({'type': 'error', 'error': 'Transcription failed. Please try again.'})}\n\n"
+        finally:
+            remove_spooled(path)
+
+    return StreamingResponse(
+        generate_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+        # The generator never runs if the client leaves before the body starts
+        background=BackgroundTask(remove_spooled, path),
+    )
+
+
+async def _build_preview(
+        narrative: str,
+        setting: Optional[str],
+        transcribe: Optional[Callable[[], Awaitable[str]]],
+        analyze: Optional[Callable[[], Awaitable[list[dict]]]],
+) -> ExtractionPreviewResponse:
+    # Image analysis doesn't depend on the narrative, so it runs alongside transcription and extraction
+    image_task = asyncio.create_task(analyze()) if analyze else None
+
     try:
-        narrative = data.narrative or ""
         processed_narrative = None
 
         # Transcribe audio if provided
-        if data.audio_base64 and data.audio_mime_type:
-            multimodal = get_multimodal_service()
-            audio_bytes = base64.b64decode(data.audio_base64)
-            transcript = await multimodal.transcribe_audio(audio_bytes, data.audio_mime_type)
+        if transcribe:
+            transcript = await transcribe()
             if transcript:
                 if narrative:
                     narrative = f"{narrative}\n\n{transcript}"
@@ -49,7 +211,7 @@ async def extract_preview(
         extraction_service = get_extraction_service()
         extraction = await extraction_service.extract_only(
             narrative=narrative,
-            setting=data.setting,
+            setting=setting,
         )
 
         symbols = [
@@ -94,11 +256,9 @@ async def extract_preview(
             for e in extraction.emotions
         ]
 
-        # Analyze images if provided and merge results
-        if data.images:
-            multimodal = get_multimodal_service()
-            image_dicts = [img.model_dump() for img in data.images]
-            image_results = await multimodal.analyze_images(image_dicts)
+        # Merge image analysis results if images were provided
+        if image_task:
+            image_results = await image_task
 
             existing_symbol_names = {s.name.lower() for s in symbols}
             existing_char_names = {c.name.lower() for c in characters}
@@ -164,6 +324,13 @@ async def extract_preview(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Extraction failed. Please try again."
         )
+    finally:
+        if image_task:
+            # No-op once awaited; stops the analysis if extraction failed first
+            image_task.cancel()
+            if image_task.done() and not image_task.cancelled():
+                # Retrieved so a failure nobody awaited isn't logged as never retrieved
+                image_task.exception()
 
 
 @extraction_router.post("/create", response_model=DreamCreatedResponse)
@@ -173,8 +340,6 @@ async def create_dream_with_extraction(
         db: AsyncSession = Depends(get_db),
 ):
     dream_repo = DreamRepository(db)
-    symbol_repo = SymbolRepository(db)
-    character_repo = CharacterRepository(db)
 
     try:
         dream = await dream_repo.create_dream(
@@ -195,88 +360,15 @@ async def create_dream_with_extraction(
             personal_interpretation=data.personal_interpretation,
         )
 
-        symbols_created = 0
-        characters_created = 0
-        themes_created = 0
-        emotions_created = 0
-
-        for symbol_data in data.symbols:
-            try:
-                sym, _ = await symbol_repo.get_or_create_symbol(
-                    user_id=user_id,
-                    name=symbol_data.name,
-                    category=symbol_data.category,
-                )
-                await symbol_repo.add_symbol_to_dream(
-                    dream_id=dream.id,
-                    symbol_id=sym.id,
-                    dream_date=data.dream_date,
-                    context_note=symbol_data.context,
-                    personal_meaning=symbol_data.personal_meaning,
-                    is_ai_extracted=not symbol_data.is_user_added,
-                )
-
-                for assoc in symbol_data.personal_associations:
-                    try:
-                        await symbol_repo.add_association(
-                            symbol_id=sym.id,
-                            association_text=assoc,
-                            source="ai_suggested",
-                        )
-                    except Exception:
-                        pass
-
-                symbols_created += 1
-            except Exception as e:
-                logger.error(f"Error saving symbol {symbol_data.name}: {e}")
-
-        for char_data in data.characters:
-            try:
-                char, _ = await character_repo.get_or_create_character(
-                    user_id=user_id,
-                    name=char_data.name,
-                    character_type=char_data.character_type,
-                    real_world_relation=char_data.real_world_relation,
-                )
-
-                await character_repo.add_character_to_dream(
-                    dream_id=dream.id,
-                    character_id=char.id,
-                    dream_date=data.dream_date,
-                    role_in_dream=char_data.role_in_dream,
-                    archetype=char_data.archetype,
-                    traits=char_data.traits,
-                    context_note=char_data.context,
-                    personal_significance=char_data.personal_significance,
-                    is_ai_extracted=not char_data.is_user_added,
-                )
-
-                characters_created += 1
-            except Exception as e:
-                logger.error(f"Error saving character {char_data.name}: {e}")
-
-        for theme_data in data.themes:
-            try:
-                await dream_repo.add_dream_theme(
-                    dream_id=dream.id,
-                    theme=theme_data.theme,
-                    is_ai_extracted=not theme_data.is_user_added,
-                )
-                themes_created += 1
-            except Exception as e:
-                logger.error(f"Error saving theme {theme_data.theme}: {e}")
-
-        for emotion_data in data.emotions:
-            try:
-                await dream_repo.add_dream_emotion(
-                    dream_id=dream.id,
-                    emotion=emotion_data.emotion,
-                    emotion_type=emotion_data.emotion_type,
-                    intensity=emotion_data.intensity,
-                )
-                emotions_created += 1
-            except Exception as e:
-                logger.error(f"Error saving emotion {emotion_data.emotion}: {e}")
+        counts = await ExtractionRepository(db).save_dream_entities(
+            dream_id=dream.id,
+            user_id=user_id,
+            dream_date=data.dream_date,
+            symbols=[s.model_dump() for s in data.symbols],
+            characters=[c.model_dump() for c in data.characters],
+            themes=[t.model_dump() for t in data.themes],
+            emotions=[e.model_dump() for e in data.emotions],
+        )
 
         await dream_repo.mark_ai_extraction_done(dream.id)
         await db.commit()
@@ -284,10 +376,10 @@ async def create_dream_with_extraction(
         return DreamCreatedResponse(
             dream_id=dream.id,
             title=dream.title,
-            symbols_created=symbols_created,
-            characters_created=characters_created,
-            themes_created=themes_created,
-            emotions_created=emotions_created,
+            symbols_created=counts["symbols"],
+            characters_created=counts["characters"],
+            themes_created=counts["themes"],
+            emotions_created=counts["emotions"],
         )
 
     except Exception as e:
@@ -1,22 +1,20 @@
-import time
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.logger import logger
 from app.database import get_db
 from app.dependencies.auth import get_current_user_id
 from app.repositories.graph_repository import GraphRepository
+from app.repositories.job_repository import JobRepository
+from app.models.enums.dream_enums import JobType
 from app.services.graphrag_service import get_graphrag_service
 from app.services.indexing_service import DreamIndexingService
+from app.data_models.job_data import JobResponse
 from app.data_models.graph_data import (
     GraphStatus,
-    IndexResult,
-    IndexDreamResult,
     GraphExport,
-    GraphNode,
-    GraphEdge,
     EntityListResponse,
     EntitySummary,
     EntityDetail,
@@ -54,155 +52,54 @@ async def get_graph_status(
     )
 
 
-@graph_router.post("/index", response_model=IndexResult)
+@graph_router.post("/index", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def index_pending_dreams(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    start_time = time.time()
-    graph_repo = GraphRepository(db)
-    indexing_service = DreamIndexingService(db)
-    dreams = await graph_repo.get_unindexed_dreams(user_id)
-
-    if not dreams:
-        return IndexResult(
-            success=True,
-            dreams_indexed=0,
-            dreams_failed=0,
-            errors=[],
-            processing_time_ms=0,
-        )
-
-    logger.info(f"Preparing {len(dreams)} dreams for indexing (user {user_id})")
-    dream_ids = [dream.id for dream in dreams]
-    dreams_to_index = await indexing_service.prepare_dreams_batch(dream_ids, user_id)
-
-    if not dreams_to_index:
-        return IndexResult(
-            success=True,
-            dreams_indexed=0,
-            dreams_failed=0,
-            errors=["No dreams could be prepared for indexing"],
-            processing_time_ms=int((time.time() - start_time) * 1000),
-        )
+    job_repo = JobRepository(db)
+    job, created = await job_repo.enqueue(user_id, JobType.INDEX)
+    await db.commit()
 
-    logger.info(f"Prepared {len(dreams_to_index)} dreams, starting GraphRAG indexing")
-    graphrag = get_graphrag_service(user_id)
-    success_count, failure_count, errors, successful_ids = await graphrag.index_dreams_batch(dreams_to_index)
-
-    if successful_ids:
-        await graph_repo.mark_dreams_indexed(successful_ids)
-        await graph_repo.increment_user_indexed_count(user_id, len(successful_ids))
-        await db.commit()
-
-    processing_time = int((time.time() - start_time) * 1000)
-    logger.info(f"Indexing complete: {success_count} success, {failure_count} failed in {processing_time}ms")
-
-    return IndexResult(
-        success=failure_count == 0,
-        dreams_indexed=success_count,
-        dreams_failed=failure_count,
-        errors=errors,
-        processing_time_ms=processing_time,
-    )
+    logger.info(f"{'Queued' if created else 'Reusing'} index job {job.id} for user {user_id}")
+    return JobResponse(**job.to_dict())
 
 
-@graph_router.post("/index/{dream_id}", response_model=IndexDreamResult)
+@graph_router.post("/index/{dream_id}", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def index_single_dream(
         dream_id: int,
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    start_time = time.time()
     graph_repo = GraphRepository(db)
-    indexing_service = DreamIndexingService(db)
-    content = await indexing_service.prepare_dream_for_indexing(dream_id, user_id)
-
-    if not content:
+    if not await graph_repo.get_dream_for_indexing(dream_id, user_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dream not found")
 
-    logger.info(f"Indexing dream {dream_id} ({len(content)} chars)")
-    graphrag = get_graphrag_service(user_id)
-    success, error = await graphrag.index_dream(
-        dream_id=dream_id,
-        content=content,
-    )
-    if success:
-        await graph_repo.mark_dream_indexed(dream_id)
-        await graph_repo.increment_user_indexed_count(user_id, 1)
-        await db.commit()
-
-    processing_time = int((time.time() - start_time) * 1000)
-
-    return IndexDreamResult(
-        success=success,
-        dream_id=dream_id,
-        error=error,
-        processing_time_ms=processing_time,
-    )
+    # Runs on a worker like /index, so it never writes the graph alongside another graph job
+    job_repo = JobRepository(db)
+    job, created = await job_repo.enqueue(user_id, JobType.INDEX, dream_id=dream_id)
+    await db.commit()
+
+    logger.info(f"{'Queued' if created else 'Reusing'} index job {job.id} for dream {dream_id}")
+    return JobResponse(**job.to_dict())
 
 
-@graph_router.post("/reindex", response_model=IndexResult)
+@graph_router.post("/reindex", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def reindex_all_dreams(
         user_id: int = Depends(get_current_user_id),
         db: AsyncSession = Depends(get_db),
 ):
-    start_time = time.time()
-    graph_repo = GraphRepository(db)
-    indexing_service = DreamIndexingService(db)
-    graphrag = get_graphrag_service(user_id)
+    job_repo = JobRepository(db)
+    job, created = await job_repo.enqueue(user_id, JobType.REINDEX)
+    await db.commit()
 
-    logger.info(f"Clearing graph for user {user_id}")
-    await graphrag.clear_graph()
-    await graph_repo.reset_all_indexed_flags(user_id)
-
-    dreams = await graph_repo.get_all_dreams_for_indexing(user_id)
-
-    if not dreams:
-        return IndexResult(
-            success=True,
-            dreams_indexed=0,
-            dreams_failed=0,
-            errors=[],
-            processing_time_ms=int((time.time() - start_time) * 1000),
-        )
-
-    logger.info(f"Preparing {len(dreams)} dreams for reindexing (user {user_id})")
-    dream_ids = [dream.id for dream in dreams]
-    dreams_to_index = await indexing_service.prepare_dreams_batch(dream_ids, user_id)
-
-    if not dreams_to_index:
-        return IndexResult(
-            success=True,
-            dreams_indexed=0,
-            dreams_failed=0,
-            errors=["No dreams could be prepared for indexing"],
-            processing_time_ms=int((time.time() - start_time) * 1000),
-        )
-
-    logger.info(f"Prepared {len(dreams_to_index)} dreams, starting GraphRAG reindexing")
-    success_count, failure_count, errors, successful_ids = await graphrag.index_dreams_batch(dreams_to_index)
-
-    if successful_ids:
-        await graph_repo.mark_dreams_indexed(successful_ids)
-        await graph_repo.update_user_indexed_count(user_id, len(successful_ids))
-        await db.commit()
-
-    processing_time = int((time.time() - start_time) * 1000)
-
-    logger.info(f"Reindexing complete: {success_count} success, {failure_count} failed in {processing_time}ms")
-
-    return IndexResult(
-        success=failure_count == 0,
-        dreams_indexed=success_count,
-        dreams_failed=failure_count,
-        errors=errors,
-        processing_time_ms=processing_time,
-    )
+    logger.info(f"{'Queued' if created else 'Reusing'} reindex job {job.id} for user {user_id}")
+    return JobResponse(**job.to_dict())
 
 
 @graph_router.get("/export", response_model=GraphExport)
 async def export_graph(
+        if_none_match: Optional[str] = Header(None),
         user_id: int = Depends(get_current_user_id),
 ):
     graphrag = get_graphrag_service(user_id)
@@ -210,39 +107,21 @@ async def export_graph(
     if not graphrag.graph_exists:
         return GraphExport(nodes=[], edges=[], stats={"node_count": 0, "edge_count": 0})
 
-    result = await graphrag.export_graph()
+    snapshot = await graphrag.get_snapshot()
+    etag = f'"{snapshot.etag}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-    nodes = [
-        GraphNode(
-            id=n["id"],
-            type=n["type"],
-            label=n["label"],
-            size=n["size"],
-            metadata=n.get("metadata", {}),
-        )
-        for n in result.get("nodes", [])
-    ]
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    edges = [
-        GraphEdge(
-            source=e["source"],
-            target=e["target"],
-            relationship=e["relationship"],
-            weight=e["weight"],
-        )
-        for e in result.get("edges", [])
-    ]
-
-    return GraphExport(
-        nodes=nodes,
-        edges=edges,
-        stats=result.get("stats", {}),
-    )
+    return Response(content=snapshot.export_json, media_type="application/json", headers=headers)
 
 
 @graph_router.get("/entities", response_model=EntityListResponse)
 async def list_entities(
         entity_type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=500),
         user_id: int = Depends(get_current_user_id),
 ):
     graphrag = get_graphrag_service(user_id)
@@ -250,25 +129,33 @@ async def list_entities(
     if not graphrag.graph_exists:
         return EntityListResponse(data=[], total=0)
 
-    result = await graphrag.export_graph()
-    nodes = result.get("nodes", [])
+    if cursor is not None and not cursor.isdigit():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
 
-    if entity_type:
-        nodes = [n for n in nodes if n.get("type", "").lower() == entity_type.lower()]
+    snapshot = await graphrag.get_snapshot()
+    indices, next_cursor, total = snapshot.page(
+        entity_type=entity_type,
+        cursor=int(cursor) if cursor is not None else None,
+        limit=limit,
+    )
 
     entities = [
         EntitySummary(
-            name=n.get("label", n.get("id", "")),
-            type=n.get("type", "entity"),
-            occurrence_count=n.get("size", 1),
-            connected_entities=0,  
+            name=snapshot.nodes[i]["label"],
+            type=snapshot.nodes[i]["type"],
+            occurrence_count=snapshot.nodes[i]["size"],
+            connected_entities=snapshot.degree(i),
             first_seen=None,
             last_seen=None,
         )
-        for n in nodes
+        for i in indices
     ]
 
-    return EntityListResponse(data=entities, total=len(entities))
+    return EntityListResponse(
+        data=entities,
+        total=total,
+        next_cursor=str(next_cursor) if next_cursor is not None else None,
+    )
 
 
 @graph_router.get("/entity/{entity_name}", response_model=EntityDetail)
@@ -281,45 +168,20 @@ async def get_entity(
     if not graphrag.graph_exists:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No graph exists")
 
-    result = await graphrag.export_graph()
-    nodes = result.get("nodes", [])
-    edges = result.get("edges", [])
-
-    entity = None
-    for n in nodes:
-        if n.get("label", "").lower() == entity_name.lower() or n.get("id", "").lower() == entity_name.lower():
-            entity = n
-            break
-
-    if not entity:
+    snapshot = await graphrag.get_snapshot()
+    index = snapshot.find(entity_name)
+    if index is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Entity not found")
 
-    entity_id = entity.get("id", entity.get("label", ""))
-    connected = []
-
-    for edge in edges:
-        if edge.get("source") == entity_id:
-            connected.append({
-                "name": edge.get("target"),
-                "type": "unknown",
-                "relationship": edge.get("relationship"),
-                "weight": edge.get("weight", 1.0),
-            })
-        elif edge.get("target") == entity_id:
-            connected.append({
-                "name": edge.get("source"),
-                "type": "unknown",
-                "relationship": edge.get("relationship"),
-                "weight": edge.get("weight", 1.0),
-            })
+    entity = snapshot.nodes[index]
 
     return EntityDetail(
-        name=entity.get("label", entity.get("id", "")),
-        type=entity.get("type", "entity"),
-        description=None,
-        occurrence_count=entity.get("size", 1),
-        connected_entities=connected,
-        dream_appearances=[], 
+        name=entity["label"],
+        type=entity["type"],
+        description=entity["description"] or None,
+        occurrence_count=entity["size"],
+        connected_entities=snapshot.neighbours(index),
+        dream_appearances=[],
     )
 
 
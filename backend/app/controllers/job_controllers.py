@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.dependencies.auth import get_current_user_id
+from app.repositories.job_repository import JobRepository
+from app.data_models.job_data import JobResponse, JobListResponse
+
+
+job_router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@job_router.get("", response_model=JobListResponse)
+async def list_jobs(
+        limit: int = Query(20, ge=1, le=100),
+        user_id: int = Depends(get_current_user_id),
+        db: AsyncSession = Depends(get_db),
+):
+    job_repo = JobRepository(db)
+    jobs = await job_repo.list_jobs(user_id, limit)
+
+    return JobListResponse(data=[JobResponse(**job.to_dict()) for job in jobs])
+
+
+@job_router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+        job_id: int,
+        user_id: int = Depends(get_current_user_id),
+        db: AsyncSession = Depends(get_db),
+):
+    job_repo = JobRepository(db)
+    job = await job_repo.get_job(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    return JobResponse(**job.to_dict())
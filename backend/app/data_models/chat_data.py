@@ -42,6 +42,7 @@ class MessageResponse(BaseModel):
     sources: list[DreamSource] = []
     query_type: Optional[str] = None
     processing_time_ms: Optional[int] = None
+    input_tokens: Optional[int] = None
     created_at: Optional[datetime] = None
 
 class ChatWithMessagesResponse(BaseModel):
@@ -56,3 +57,6 @@ class StreamChunk(BaseModel):
     content: Optional[str] = None
     source: Optional[DreamSource] = None
     error: Optional[str] = None
+    tool: Optional[str] = None
+    args: Optional[dict] = None
+    success: Optional[bool] = None
@@ -138,6 +138,13 @@ class DreamResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class SimilarDream(BaseModel):
+    id: int
+    title: Optional[str]
+    dream_date: date
+    narrative_excerpt: Optional[str]
+    similarity: float
+
 class DreamListResponse(BaseModel):
     data: list[DreamSummary]
     has_more: bool = False
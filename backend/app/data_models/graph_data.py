@@ -54,6 +54,7 @@ class EntitySummary(BaseModel):
 class EntityListResponse(BaseModel):
     data: list[EntitySummary]
     total: int
+    next_cursor: Optional[str] = None
 
 class EntityDetail(BaseModel):
     name: str
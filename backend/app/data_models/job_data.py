@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+
+class JobResponse(BaseModel):
+    id: int
+    job_type: str
+    status: str
+    dream_id: Optional[int] = None
+    total: int = 0
+    done: int = 0
+    failed: int = 0
+    errors: list[str] = []
+    eta_seconds: Optional[int] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobListResponse(BaseModel):
+    data: list[JobResponse]
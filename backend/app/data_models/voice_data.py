@@ -1,10 +1,10 @@
 from fastapi import UploadFile
+from pydantic import BaseModel
 
 
 class TranscribeRequest:
     audio: UploadFile
     language: str = "en"
 
-class TranscribeResponse:
+class TranscribeResponse(BaseModel):
     text: str
-    confidence: float
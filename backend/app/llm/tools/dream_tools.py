@@ -5,7 +5,7 @@ from app.llm.tools.base_tool import BaseTool
 @dataclass
 class SearchDreamsTool(BaseTool):
     name: str = "search_dreams"
-    description: str = "Search dreams by text in narrative, title, or interpretation. Use for finding specific dreams."
+    description: str = "Full-text search of dreams by words in the narrative, title, or interpretation. Returns the best-ranked matches with highlighted excerpts. Supports quoted phrases, OR, and -word exclusions. Use for finding specific dreams."
     parameters: dict = None
 
     def __post_init__(self):
@@ -73,3 +73,29 @@ class GetRecurringDreamsTool(BaseTool):
             "type": "object",
             "properties": {}
         }
+
+
+@dataclass
+class FindSimilarDreamsTool(BaseTool):
+    name: str = "find_similar_dreams"
+    description: str = "Find the dreams most similar in meaning to a given dream or to a short description, ranked by embedding similarity. Fast and cheap; use it instead of semantic_search when you only need related dreams rather than an interpreted answer."
+    parameters: dict = None
+
+    def __post_init__(self):
+        self.parameters = {
+            "type": "object",
+            "properties": {
+                "dream_id": {
+                    "type": "integer",
+                    "description": "ID of the dream to find neighbours of"
+                },
+                "query": {
+                    "type": "string",
+                    "description": "Description to match when no dream_id is given"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of dreams to return (default 5)"
+                }
+            }
+        }
@@ -3,7 +3,8 @@ from app.llm.tools.symbol_tools import SearchSymbolsTool, GetSymbolDreamsTool, G
 from app.llm.tools.character_tools import SearchCharactersTool, GetCharacterDetailsTool, GetArchetypeAnalysisTool
 from app.llm.tools.emotion_tools import GetEmotionDreamsTool, GetEmotionOverviewTool, GetEmotionCorrelationsTool
 from app.llm.tools.theme_tools import GetThemesOverviewTool, GetThemeDreamsTool, GetThemeAnalysisTool
-from app.llm.tools.dream_tools import SearchDreamsTool, GetRecentDreamsTool, GetDreamDetailsTool, GetRecurringDreamsTool
+from app.llm.tools.dream_tools import SearchDreamsTool, GetRecentDreamsTool, GetDreamDetailsTool, GetRecurringDreamsTool, \
+    FindSimilarDreamsTool
 from app.llm.tools.general_tools import SemanticSearchTool, GetJournalSummaryTool
 
 
@@ -26,6 +27,7 @@ def get_tool_definitions() -> List[Dict[str, Any]]:
         GetRecentDreamsTool(),
         GetDreamDetailsTool(),
         GetRecurringDreamsTool(),
+        FindSimilarDreamsTool(),
         SemanticSearchTool(),
         GetJournalSummaryTool(),
     ]
@@ -17,6 +17,9 @@ from app.models.chat_messages import ChatMessage
 from app.models.dream_series import DreamSeries
 from app.models.dream_series_members import DreamSeriesMember
 
+from app.models.jobs import Job
+from app.models.user_stats import UserStats
+
 from app.models.ref_emotions import RefEmotion, DEFAULT_EMOTIONS
 from app.models.ref_archetypes import RefArchetype, DEFAULT_ARCHETYPES
 
@@ -31,6 +34,8 @@ from app.models.enums import (
     ChatRole,
     QueryType,
     EmotionValence,
+    JobType,
+    JobStatus,
 )
 
 __all__ = [
@@ -48,6 +53,8 @@ __all__ = [
     "ChatMessage",
     "DreamSeries",
     "DreamSeriesMember",
+    "Job",
+    "UserStats",
     "RefEmotion",
     "RefArchetype",
     "DEFAULT_EMOTIONS",
@@ -62,4 +69,6 @@ __all__ = [
     "ChatRole",
     "QueryType",
     "EmotionValence",
+    "JobType",
+    "JobStatus",
 ]
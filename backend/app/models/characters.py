@@ -24,6 +24,7 @@ class Character(Base):
 
     __table_args__ = (
         Index('ix_characters_user_id', 'user_id'),
+        Index('ix_characters_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
         UniqueConstraint('user_id', 'name_normalized', name='uq_user_character'),
     )
 
@@ -19,6 +19,7 @@ class DreamEmotion(Base):
     __table_args__ = (
         Index('ix_dream_emotions_dream_id', 'dream_id'),
         Index('ix_dream_emotions_emotion', 'emotion'),
+        Index('ix_dream_emotions_emotion_trgm', 'emotion', postgresql_using='gin', postgresql_ops={'emotion': 'gin_trgm_ops'}),
         UniqueConstraint('dream_id', 'emotion', 'emotion_type', name='uq_dream_emotion_type'),
         CheckConstraint('intensity BETWEEN 1 AND 10', name='check_emotion_intensity'),
     )
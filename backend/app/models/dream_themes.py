@@ -17,6 +17,7 @@ class DreamTheme(Base):
     __table_args__ = (
         Index('ix_dream_themes_dream_id', 'dream_id'),
         Index('ix_dream_themes_theme', 'theme'),
+        Index('ix_dream_themes_theme_trgm', 'theme', postgresql_using='gin', postgresql_ops={'theme': 'gin_trgm_ops'}),
         UniqueConstraint('dream_id', 'theme', name='uq_dream_theme'),
     )
 
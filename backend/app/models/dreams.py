@@ -1,6 +1,15 @@
 from app.database import Base
 from app.models.enums.dream_enums import LucidityLevel
-from sqlalchemy import Column, Integer, DateTime, String, Text, Date, SmallInteger, Boolean, func, Index, ForeignKey, Enum, CheckConstraint
+from sqlalchemy import Column, Integer, DateTime, String, Text, Date, SmallInteger, Boolean, func, Index, ForeignKey, Enum, CheckConstraint, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+
+SEARCH_CONFIG = "english"
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(narrative, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(personal_interpretation, '')), 'C')"
+)
 
 
 class Dream(Base):
@@ -29,10 +38,15 @@ class Dream(Base):
 
     is_indexed = Column(Boolean, default=False)
     indexed_at = Column(DateTime(timezone=True), nullable=True)
+    # sha256 of the text last inserted into the knowledge graph
+    index_hash = Column(String(64), nullable=True)
     ai_extraction_done = Column(Boolean, default=False)
 
     conscious_context = Column(Text, nullable=True)
 
+    # Full-text search document, maintained by Postgres; deferred so regular loads skip it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
+
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -40,6 +54,7 @@ class Dream(Base):
         Index('ix_dreams_user_id', 'user_id'),
         Index('ix_dreams_dream_date', 'dream_date'),
         Index('ix_dreams_user_date', 'user_id', 'dream_date'),
+        Index('ix_dreams_search_vector', 'search_vector', postgresql_using='gin'),
         CheckConstraint('emotional_intensity BETWEEN 1 AND 10', name='check_emotional_intensity'),
         CheckConstraint('sleep_quality BETWEEN 1 AND 5', name='check_sleep_quality'),
     )
@@ -65,6 +80,7 @@ class Dream(Base):
             "personal_interpretation": self.personal_interpretation,
             "is_indexed": self.is_indexed,
             "indexed_at": self.indexed_at.isoformat() if self.indexed_at else None,
+            "index_hash": self.index_hash,
             "ai_extraction_done": self.ai_extraction_done,
             "conscious_context": self.conscious_context,
             "created_at": self.created_at.isoformat() if self.created_at else None,
@@ -9,6 +9,8 @@ from app.models.enums.dream_enums import (
     ChatRole,
     QueryType,
     EmotionValence,
+    JobType,
+    JobStatus,
 )
 
 __all__ = [
@@ -22,4 +24,6 @@ __all__ = [
     "ChatRole",
     "QueryType",
     "EmotionValence",
+    "JobType",
+    "JobStatus",
 ]
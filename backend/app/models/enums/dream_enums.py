@@ -78,4 +78,18 @@ class EmotionValence(str, Enum):
     NEGATIVE = "negative"
     NEUTRAL = "neutral"
     AMBIGUOUS = "ambiguous"
-    
\ No newline at end of file
+    
+
+
+class JobType(str, Enum):
+    INDEX = "index"
+    REINDEX = "reindex"
+    EXTRACT = "extract"
+    PRUNE = "prune"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
@@ -0,0 +1,67 @@
+from datetime import datetime, timezone
+
+from app.database import Base
+from app.models.enums.dream_enums import JobType, JobStatus
+from sqlalchemy import Column, Integer, DateTime, String, func, Index, ForeignKey, Enum, text
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    dream_id = Column(Integer, ForeignKey('dreams.id', ondelete='CASCADE'), nullable=True)
+
+    job_type = Column(Enum(JobType, name='job_type'), nullable=False)
+    status = Column(Enum(JobStatus, name='job_status'), nullable=False, default=JobStatus.QUEUED)
+    dedup_key = Column(String(100), nullable=False)
+    payload = Column(JSONB, default=dict)
+
+    total = Column(Integer, default=0)
+    done = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    errors = Column(JSONB, default=list)
+    attempts = Column(Integer, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_jobs_user_id', 'user_id'),
+        Index('ix_jobs_status_created', 'status', 'created_at'),
+        Index(
+            'uq_jobs_active_dedup_key', 'dedup_key',
+            unique=True,
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')"),
+        ),
+    )
+
+    @property
+    def eta_seconds(self) -> int | None:
+        processed = (self.done or 0) + (self.failed or 0)
+        if self.status != JobStatus.RUNNING or not self.started_at or processed == 0:
+            return None
+        remaining = (self.total or 0) - processed
+        elapsed = (datetime.now(timezone.utc) - self.started_at).total_seconds()
+
+        return max(0, int(elapsed / processed * remaining))
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "dream_id": self.dream_id,
+            "job_type": self.job_type.value if self.job_type else None,
+            "status": self.status.value if self.status else None,
+            "total": self.total or 0,
+            "done": self.done or 0,
+            "failed": self.failed or 0,
+            "errors": self.errors or [],
+            "eta_seconds": self.eta_seconds,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
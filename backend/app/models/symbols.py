@@ -22,6 +22,7 @@ class Symbol(Base):
 
     __table_args__ = (
         Index('ix_symbols_user_id', 'user_id'),
+        Index('ix_symbols_name_trgm', 'name', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
         UniqueConstraint('user_id', 'name_normalized', name='uq_user_symbol'),
     )
 
@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from app.database import Base
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class UserStats(Base):
+    """Cached analytics summary, recomputed when `version` moves past `computed_version`."""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+
+    stats = Column(JSONB, nullable=False, default=dict)
+    version = Column(Integer, nullable=False, default=0)
+    computed_version = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def is_fresh(self) -> bool:
+        # Week/month counts and the current streak are relative to today
+        if self.version != self.computed_version or not self.computed_at:
+            return False
+
+        return self.computed_at.astimezone(timezone.utc).date() == datetime.now(timezone.utc).date()
@@ -1,10 +1,10 @@
 from typing import Optional
 from collections import Counter
 
-from sqlalchemy import select, func, and_, or_, desc, asc, text
+from sqlalchemy import select, func, and_, or_, desc, asc, text, literal_column
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.dreams import Dream
+from app.models.dreams import Dream, SEARCH_CONFIG
 from app.models.symbols import Symbol
 from app.models.characters import Character
 from app.models.dream_symbols import DreamSymbol
@@ -24,8 +24,9 @@ class AgentRepository:
             category: Optional[str] = None,
             limit: int = 10,
     ) -> list[dict]:
+        score = func.similarity(Symbol.name, query)
         conditions = [Symbol.user_id == user_id]
-        conditions.append(Symbol.name.ilike(f"%{query}%"))
+        conditions.append(or_(Symbol.name.ilike(f"%{query}%"), Symbol.name.op("%")(query)))
 
         if category:
             conditions.append(Symbol.category == category)
@@ -39,9 +40,10 @@ class AgentRepository:
                 Symbol.occurrence_count,
                 Symbol.first_appeared,
                 Symbol.last_appeared,
+                score.label("score"),
             )
             .where(and_(*conditions))
-            .order_by(desc(Symbol.occurrence_count))
+            .order_by(desc(score), desc(Symbol.occurrence_count))
             .limit(limit)
         )
 
@@ -57,6 +59,7 @@ class AgentRepository:
                 "occurrence_count": row[4] or 0,
                 "first_appeared": row[5].isoformat() if row[5] else None,
                 "last_appeared": row[6].isoformat() if row[6] else None,
+                "score": round(row[7], 3),
             }
             for row in rows
         ]
@@ -250,8 +253,9 @@ class AgentRepository:
             character_type: Optional[str] = None,
             limit: int = 10,
     ) -> list[dict]:
+        score = func.similarity(Character.name, query)
         conditions = [Character.user_id == user_id]
-        conditions.append(Character.name.ilike(f"%{query}%"))
+        conditions.append(or_(Character.name.ilike(f"%{query}%"), Character.name.op("%")(query)))
 
         if character_type:
             conditions.append(Character.character_type == character_type)
@@ -263,9 +267,10 @@ class AgentRepository:
                 Character.character_type,
                 Character.real_world_relation,
                 Character.occurrence_count,
+                score.label("score"),
             )
             .where(and_(*conditions))
-            .order_by(desc(Character.occurrence_count))
+            .order_by(desc(score), desc(Character.occurrence_count))
             .limit(limit)
         )
 
@@ -279,6 +284,7 @@ class AgentRepository:
                 "type": row[2].value if row[2] else "unknown",
                 "real_world_relation": row[3],
                 "occurrence_count": row[4] or 0,
+                "score": round(row[5], 3),
             }
             for row in rows
         ]
@@ -671,26 +677,27 @@ class AgentRepository:
             query: str,
             limit: int = 5,
     ) -> list[dict]:
+        search_config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        ts_query = func.websearch_to_tsquery(search_config, query)
+        rank = func.ts_rank(Dream.search_vector, ts_query)
+        snippet = func.ts_headline(
+            search_config,
+            Dream.narrative,
+            ts_query,
+            "MaxFragments=2, MinWords=8, MaxWords=30, FragmentDelimiter=\" ... \", StartSel=**, StopSel=**",
+        )
         stmt = (
             select(
                 Dream.id,
                 Dream.title,
                 Dream.dream_date,
-                Dream.narrative,
+                snippet.label("snippet"),
                 Dream.is_recurring,
                 Dream.is_nightmare,
+                rank.label("rank"),
             )
-            .where(
-                and_(
-                    Dream.user_id == user_id,
-                    or_(
-                        Dream.narrative.ilike(f"%{query}%"),
-                        Dream.title.ilike(f"%{query}%"),
-                        Dream.personal_interpretation.ilike(f"%{query}%"),
-                    ),
-                )
-            )
-            .order_by(desc(Dream.dream_date))
+            .where(and_(Dream.user_id == user_id, Dream.search_vector.op("@@")(ts_query)))
+            .order_by(desc(rank), desc(Dream.dream_date))
             .limit(limit)
         )
 
@@ -702,9 +709,10 @@ class AgentRepository:
                 "dream_id": row[0],
                 "title": row[1],
                 "date": row[2].isoformat() if row[2] else None,
-                "narrative_excerpt": row[3][:300] + "..." if row[3] and len(row[3]) > 300 else row[3],
+                "narrative_excerpt": row[3],
                 "is_recurring": row[4],
                 "is_nightmare": row[5],
+                "rank": round(row[6], 4),
             }
             for row in rows
         ]
@@ -745,6 +753,44 @@ class AgentRepository:
             for row in rows
         ]
 
+    async def get_dreams_by_ids(
+            self,
+            user_id: int,
+            dream_ids: list[int],
+    ) -> list[dict]:
+        """Dream summaries in the order of `dream_ids`; ids the user doesn't own are dropped."""
+        if not dream_ids:
+            return []
+
+        stmt = (
+            select(
+                Dream.id,
+                Dream.title,
+                Dream.dream_date,
+                Dream.narrative,
+                Dream.emotional_intensity,
+                Dream.is_recurring,
+                Dream.is_nightmare,
+            )
+            .where(and_(Dream.user_id == user_id, Dream.id.in_(dream_ids)))
+        )
+
+        result = await self.db.execute(stmt)
+        dreams = {
+            row[0]: {
+                "dream_id": row[0],
+                "title": row[1],
+                "date": row[2].isoformat() if row[2] else None,
+                "narrative_excerpt": row[3][:200] + "..." if row[3] and len(row[3]) > 200 else row[3],
+                "emotional_intensity": row[4],
+                "is_recurring": row[5],
+                "is_nightmare": row[6],
+            }
+            for row in result.fetchall()
+        }
+
+        return [dreams[dream_id] for dream_id in dream_ids if dream_id in dreams]
+
     async def get_dream_details(
             self,
             user_id: int,
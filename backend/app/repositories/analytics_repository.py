@@ -1,8 +1,8 @@
 from typing import Optional
 from datetime import date, datetime, timedelta
-from collections import Counter
 
-from sqlalchemy import select, func, and_, case, distinct, literal_column
+from sqlalchemy import select, func, and_, case, distinct, literal_column, Integer
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.dreams import Dream
@@ -13,6 +13,7 @@ from app.models.dream_themes import DreamTheme
 from app.models.symbols import Symbol
 from app.models.characters import Character
 from app.models.enums.dream_enums import LucidityLevel
+from app.repositories.user_stats_repository import UserStatsRepository
 
 
 class AnalyticsRepository:
@@ -20,126 +21,111 @@ class AnalyticsRepository:
         self.db = db
 
     async def get_summary_stats(self, user_id: int) -> dict:
+        stats_repo = UserStatsRepository(self.db)
+        cached = await stats_repo.get(user_id)
+        if cached and cached.is_fresh():
+            return cached.stats
+
+        seen_version = cached.version if cached else 0
+        stats = await self._compute_summary_stats(user_id)
+        await stats_repo.save(user_id, stats, seen_version)
+
+        return stats
+
+    async def _compute_summary_stats(self, user_id: int) -> dict:
         now = datetime.utcnow()
         start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         start_of_week = now - timedelta(days=now.weekday())
         start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
-        total_query = select(func.count(Dream.id)).where(Dream.user_id == user_id)
-        total_result = await self.db.execute(total_query)
-        total_dreams = total_result.scalar() or 0
 
-        month_query = select(func.count(Dream.id)).where(
-            and_(Dream.user_id == user_id, Dream.created_at >= start_of_month)
+        total_symbols = (
+            select(func.count(Symbol.id))
+            .where(Symbol.user_id == user_id)
+            .scalar_subquery()
         )
-        month_result = await self.db.execute(month_query)
-        dreams_this_month = month_result.scalar() or 0
-
-        week_query = select(func.count(Dream.id)).where(
-            and_(Dream.user_id == user_id, Dream.created_at >= start_of_week)
+        total_characters = (
+            select(func.count(Character.id))
+            .where(Character.user_id == user_id)
+            .scalar_subquery()
         )
-        week_result = await self.db.execute(week_query)
-        dreams_this_week = week_result.scalar() or 0
-
-        symbols_query = select(func.count(Symbol.id)).where(Symbol.user_id == user_id)
-        symbols_result = await self.db.execute(symbols_query)
-        total_symbols = symbols_result.scalar() or 0
-        chars_query = select(func.count(Character.id)).where(Character.user_id == user_id)
-        chars_result = await self.db.execute(chars_query)
-        total_characters = chars_result.scalar() or 0
-        emotions_query = (
+        unique_emotions = (
             select(func.count(distinct(DreamEmotion.emotion)))
-            .join(Dream, DreamEmotion.dream_id == Dream.id)
-            .where(Dream.user_id == user_id)
-        )
-        emotions_result = await self.db.execute(emotions_query)
-        unique_emotions = emotions_result.scalar() or 0
-
-        intensity_query = (
-            select(func.avg(Dream.emotional_intensity))
-            .where(and_(Dream.user_id == user_id, Dream.emotional_intensity.isnot(None)))
-        )
-        intensity_result = await self.db.execute(intensity_query)
-        avg_intensity = intensity_result.scalar()
-
-        lucid_query = select(func.count(Dream.id)).where(
-            and_(
-                Dream.user_id == user_id,
+            .where(DreamEmotion.dream_id.in_(
+                select(Dream.id).where(Dream.user_id == user_id).correlate(None)
+            ))
+            .scalar_subquery()
+        )
+
+        query = select(
+            func.count(Dream.id).label("total_dreams"),
+            func.count(Dream.id).filter(Dream.created_at >= start_of_month).label("dreams_this_month"),
+            func.count(Dream.id).filter(Dream.created_at >= start_of_week).label("dreams_this_week"),
+            func.avg(Dream.emotional_intensity).label("avg_intensity"),
+            func.count(Dream.id).filter(
                 Dream.lucidity_level.in_([LucidityLevel.PARTIAL, LucidityLevel.FULL])
-            )
-        )
-        lucid_result = await self.db.execute(lucid_query)
-        lucid_count = lucid_result.scalar() or 0
-        lucid_percentage = (lucid_count / total_dreams * 100) if total_dreams > 0 else 0
-
-        ritual_query = select(func.count(Dream.id)).where(
-            and_(Dream.user_id == user_id, Dream.ritual_completed == True)
-        )
-        ritual_result = await self.db.execute(ritual_query)
-        ritual_count = ritual_result.scalar() or 0
-        ritual_rate = (ritual_count / total_dreams * 100) if total_dreams > 0 else 0
+            ).label("lucid_count"),
+            func.count(Dream.id).filter(Dream.ritual_completed == True).label("ritual_count"),
+            func.count(Dream.id).filter(Dream.is_indexed == True).label("dreams_indexed"),
+            total_symbols.label("total_symbols"),
+            total_characters.label("total_characters"),
+            unique_emotions.label("unique_emotions"),
+        ).where(Dream.user_id == user_id)
+        result = await self.db.execute(query)
+        row = result.one()
 
-        indexed_query = select(func.count(Dream.id)).where(
-            and_(Dream.user_id == user_id, Dream.is_indexed == True)
-        )
-        indexed_result = await self.db.execute(indexed_query)
-        dreams_indexed = indexed_result.scalar() or 0
+        total_dreams = row.total_dreams or 0
+        lucid_percentage = (row.lucid_count / total_dreams * 100) if total_dreams > 0 else 0
+        ritual_rate = (row.ritual_count / total_dreams * 100) if total_dreams > 0 else 0
 
         streaks = await self._calculate_streaks(user_id)
 
         return {
             "total_dreams": total_dreams,
-            "dreams_this_month": dreams_this_month,
-            "dreams_this_week": dreams_this_week,
-            "total_symbols": total_symbols,
-            "total_characters": total_characters,
-            "unique_emotions": unique_emotions,
-            "avg_emotional_intensity": round(avg_intensity, 2) if avg_intensity else None,
+            "dreams_this_month": row.dreams_this_month or 0,
+            "dreams_this_week": row.dreams_this_week or 0,
+            "total_symbols": row.total_symbols or 0,
+            "total_characters": row.total_characters or 0,
+            "unique_emotions": row.unique_emotions or 0,
+            "avg_emotional_intensity": round(float(row.avg_intensity), 2) if row.avg_intensity else None,
             "lucid_dream_percentage": round(lucid_percentage, 1),
             "ritual_completion_rate": round(ritual_rate, 1),
-            "dreams_indexed": dreams_indexed,
+            "dreams_indexed": row.dreams_indexed or 0,
             "longest_streak": streaks["longest"],
             "current_streak": streaks["current"],
         }
 
     async def _calculate_streaks(self, user_id: int) -> dict:
-        query = (
+        # Gaps and islands: consecutive dates share the same (date - row_number) value
+        dates = (
             select(Dream.dream_date)
             .where(Dream.user_id == user_id)
-            .order_by(Dream.dream_date.desc())
             .distinct()
+            .subquery()
+        )
+        islands = select(
+            dates.c.dream_date,
+            (dates.c.dream_date - func.row_number().over(order_by=dates.c.dream_date).cast(Integer)).label("island"),
+        ).subquery()
+        runs = (
+            select(
+                func.count().label("length"),
+                func.max(islands.c.dream_date).label("last_date"),
+            )
+            .group_by(islands.c.island)
+            .subquery()
         )
-        result = await self.db.execute(query)
-        dates = [row[0] for row in result.fetchall()]
-
-        if not dates:
-            return {"longest": 0, "current": 0}
-
-        current_streak = 0
-        today = date.today()
-        check_date = today
-
-        for d in dates:
-            if d == check_date or d == check_date - timedelta(days=1):
-                current_streak += 1
-                check_date = d - timedelta(days=1)
-            else:
-                break
-
-        if len(dates) < 2:
-            return {"longest": current_streak, "current": current_streak}
-
-        longest_streak = 1
-        current_run = 1
-        sorted_dates = sorted(set(dates))
 
-        for i in range(1, len(sorted_dates)):
-            if (sorted_dates[i] - sorted_dates[i - 1]).days == 1:
-                current_run += 1
-                longest_streak = max(longest_streak, current_run)
-            else:
-                current_run = 1
+        # The current streak is the run that reaches today, or yesterday if today isn't logged yet
+        query = select(
+            func.max(runs.c.length).label("longest"),
+            func.max(runs.c.length).filter(
+                runs.c.last_date >= date.today() - timedelta(days=1)
+            ).label("current"),
+        )
+        result = await self.db.execute(query)
+        row = result.one()
 
-        return {"longest": longest_streak, "current": current_streak}
+        return {"longest": row.longest or 0, "current": row.current or 0}
 
     async def get_emotion_analytics(
             self,
@@ -349,37 +335,28 @@ class AnalyticsRepository:
                 "last_appeared": None,
             })
 
-        # Co-occurrences (symbols that appear in the same dream)
+        # Co-occurrences (symbols that appear in the same dream), paired in SQL
+        first, second = aliased(DreamSymbol), aliased(DreamSymbol)
+        first_symbol, second_symbol = aliased(Symbol), aliased(Symbol)
+        symbol_a = func.least(first_symbol.name, second_symbol.name)
+        symbol_b = func.greatest(first_symbol.name, second_symbol.name)
+        pair_count = func.count().label("count")
         cooccurrence_query = (
-            select(
-                DreamSymbol.dream_id,
-                Symbol.name
-            )
-            .join(Symbol, DreamSymbol.symbol_id == Symbol.id)
-            .join(Dream, DreamSymbol.dream_id == Dream.id)
+            select(symbol_a.label("symbol_a"), symbol_b.label("symbol_b"), pair_count)
+            .select_from(first)
+            .join(second, and_(second.dream_id == first.dream_id, second.symbol_id > first.symbol_id))
+            .join(Dream, first.dream_id == Dream.id)
+            .join(first_symbol, first.symbol_id == first_symbol.id)
+            .join(second_symbol, second.symbol_id == second_symbol.id)
             .where(and_(*base_filter))
+            .group_by(first.symbol_id, second.symbol_id, first_symbol.name, second_symbol.name)
+            .order_by(pair_count.desc(), symbol_a, symbol_b)
+            .limit(limit)
         )
         cooccurrence_result = await self.db.execute(cooccurrence_query)
-
-        # Group by dream and find pairs
-        dream_symbols = {}
-        for row in cooccurrence_result.fetchall():
-            dream_id, symbol = row[0], row[1]
-            if dream_id not in dream_symbols:
-                dream_symbols[dream_id] = []
-            dream_symbols[dream_id].append(symbol)
-
-        pair_counts = Counter()
-        for symbols in dream_symbols.values():
-            if len(symbols) >= 2:
-                for i, s1 in enumerate(symbols):
-                    for s2 in symbols[i + 1:]:
-                        pair = tuple(sorted([s1, s2]))
-                        pair_counts[pair] += 1
-
         cooccurrences = [
-            {"symbol_a": pair[0], "symbol_b": pair[1], "count": count}
-            for pair, count in pair_counts.most_common(limit)
+            {"symbol_a": row[0], "symbol_b": row[1], "count": row[2]}
+            for row in cooccurrence_result.fetchall()
         ]
 
         # Monthly trends
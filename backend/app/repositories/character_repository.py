@@ -10,11 +10,15 @@ from app.models.character_associations import CharacterAssociation
 from app.models.dream_characters import DreamCharacter
 from app.models.dreams import Dream
 from app.models.enums.dream_enums import CharacterType, RoleInDream, AssociationSource
+from app.repositories.user_stats_repository import UserStatsRepository
+from app.repositories.index_state_repository import IndexStateRepository
 
 
 class CharacterRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.user_stats = UserStatsRepository(db)
+        self.index_state = IndexStateRepository(db)
 
     async def get_or_create_character(
             self,
@@ -44,6 +48,7 @@ class CharacterRepository:
             last_appeared=None,
         )
         self.db.add(character)
+        await self.user_stats.mark_stale(user_id)
         await self.db.flush()
         await self.db.refresh(character)
 
@@ -98,6 +103,8 @@ class CharacterRepository:
         if real_world_relation is not None:
             character.real_world_relation = real_world_relation
 
+        await self.index_state.mark_character_dreams_unindexed(character_id)
+        await self.user_stats.mark_stale(user_id)
         await self.db.flush()
         await self.db.refresh(character)
 
@@ -108,7 +115,10 @@ class CharacterRepository:
         if not character:
             return False
 
+        # Before the delete cascades away the links
+        await self.index_state.mark_character_dreams_unindexed(character_id)
         await self.db.delete(character)
+        await self.user_stats.mark_stale(user_id)
         await self.db.flush()
 
         return True
@@ -145,6 +155,8 @@ class CharacterRepository:
             if character.last_appeared is None or dream_date > character.last_appeared:
                 character.last_appeared = dream_date
 
+        await self.index_state.mark_dream_unindexed(dream_id)
+        await self.user_stats.mark_stale_for_dream(dream_id)
         await self.db.flush()
         await self.db.refresh(dream_character)
 
@@ -207,6 +219,8 @@ class CharacterRepository:
         if is_confirmed is not None:
             dream_character.is_confirmed = is_confirmed
 
+        await self.index_state.mark_dream_unindexed(dream_id)
+        await self.user_stats.mark_stale_for_dream(dream_id)
         await self.db.flush()
         await self.db.refresh(dream_character)
 
@@ -226,6 +240,8 @@ class CharacterRepository:
             character.occurrence_count -= 1
 
         await self.db.delete(dream_character)
+        await self.index_state.mark_dream_unindexed(dream_id)
+        await self.user_stats.mark_stale_for_dream(dream_id)
         await self.db.flush()
 
         return True
@@ -243,6 +259,7 @@ class CharacterRepository:
             is_confirmed=source == "user",
         )
         self.db.add(association)
+        await self.index_state.mark_character_dreams_unindexed(character_id)
         await self.db.flush()
         await self.db.refresh(association)
 
@@ -274,6 +291,7 @@ class CharacterRepository:
             return False
 
         await self.db.delete(association)
+        await self.index_state.mark_character_dreams_unindexed(character_id)
         await self.db.flush()
 
         return True
@@ -171,6 +171,62 @@ class ChatRepository:
 
         return chat, messages
 
+    async def get_context_messages(
+            self,
+            chat_id: int,
+            before_id: int,
+            limit: int,
+    ) -> list[ChatMessage]:
+        """The last `limit` messages before `before_id` that are still in the agent's context."""
+        query = (
+            select(ChatMessage)
+            .join(Chat, Chat.id == ChatMessage.chat_id)
+            .where(
+                ChatMessage.chat_id == chat_id,
+                ChatMessage.id < before_id,
+                ChatMessage.id > func.coalesce(Chat.context_start_message_id, 0),
+            )
+            .order_by(ChatMessage.id.desc())
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+
+        return list(reversed(result.scalars().all()))
+
+    async def get_last_message_id(self, chat_id: int, before_id: Optional[int] = None) -> Optional[int]:
+        query = select(func.max(ChatMessage.id)).where(ChatMessage.chat_id == chat_id)
+        if before_id is not None:
+            query = query.where(ChatMessage.id < before_id)
+        result = await self.db.execute(query)
+
+        return result.scalar()
+
+    async def get_context_marker(self, chat_id: int, before_id: int) -> tuple[Optional[int], Optional[int]]:
+        """Context start and last message id before `before_id`; a cached history is current while both match."""
+        last_id = (
+            select(func.max(ChatMessage.id))
+            .where(ChatMessage.chat_id == chat_id, ChatMessage.id < before_id)
+            .scalar_subquery()
+        )
+        query = select(Chat.context_start_message_id, last_id).where(Chat.id == chat_id)
+        result = await self.db.execute(query)
+        row = result.one_or_none()
+
+        return (row[0], row[1]) if row else (None, None)
+
+    async def reset_context(self, chat_id: int) -> Optional[int]:
+        """Drop every message so far from the agent's context; returns the new start id."""
+        last_id = await self.get_last_message_id(chat_id)
+        stmt = (
+            update(Chat)
+            .where(Chat.id == chat_id)
+            .values(context_start_message_id=last_id)
+        )
+        await self.db.execute(stmt)
+        await self.db.flush()
+
+        return last_id
+
     async def _get_chat_count(self, user_id: int) -> int:
         query = select(func.count(Chat.id)).where(Chat.user_id == user_id)
         result = await self.db.execute(query)
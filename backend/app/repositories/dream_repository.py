@@ -1,7 +1,8 @@
 from typing import Optional
 from datetime import date
 
-from sqlalchemy import select, func, delete, and_, update
+from sqlalchemy import select, func, delete, and_, update, literal_column
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -14,12 +15,34 @@ from app.models.symbols import Symbol
 from app.models.symbol_associations import SymbolAssociation
 from app.models.characters import Character
 from app.models.character_associations import CharacterAssociation
-from app.models.enums.dream_enums import EmotionType
+from app.models.enums.dream_enums import EmotionType, SymbolCategory, CharacterType, RoleInDream
+from app.repositories.user_stats_repository import UserStatsRepository
+from app.repositories.index_state_repository import IndexStateRepository
+
+# Dream columns that end up in the text indexed into the knowledge graph
+INDEXED_FIELDS = {
+    "title", "narrative", "dream_date", "setting", "lucidity_level", "emotional_intensity",
+    "is_recurring", "is_nightmare", "ritual_completed", "ritual_description", "personal_interpretation",
+}
+
+
+def _json_list(order_by, **fields):
+    pairs = []
+    for name, column in fields.items():
+        pairs.extend([literal_column(f"'{name}'"), column])
+
+    return func.json_agg(aggregate_order_by(func.json_build_object(*pairs), order_by), type_=JSON)
+
+
+def _enum_value(enum_cls, name: Optional[str]) -> Optional[str]:
+    return enum_cls[name].value if name else None
 
 
 class DreamRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.user_stats = UserStatsRepository(db)
+        self.index_state = IndexStateRepository(db)
 
     async def create_dream(
             self,
@@ -61,6 +84,7 @@ class DreamRepository:
             conscious_context=conscious_context,
         )
         self.db.add(dream)
+        await self.user_stats.mark_stale(user_id)
         await self.db.flush()
         await self.db.refresh(dream)
 
@@ -82,6 +106,8 @@ class DreamRepository:
             )
             self.db.add(dream_emotion)
             dream_emotions.append(dream_emotion)
+        await self.index_state.mark_dream_unindexed(dream_id)
+        await self.user_stats.mark_stale_for_dream(dream_id)
         await self.db.flush()
 
         return dream_emotions
@@ -95,21 +121,119 @@ class DreamRepository:
         return result.scalar_one_or_none()
 
     async def get_dream_with_associations(self, dream_id: int, user_id: int) -> Optional[dict]:
-        dream = await self.get_by_id(dream_id, user_id)
-        if not dream:
-            return None
+        """The dream and every association shown on its detail page, in a single round trip."""
+        symbol_associations = (
+            select(func.array_agg(aggregate_order_by(SymbolAssociation.association_text, SymbolAssociation.id)))
+            .where(SymbolAssociation.symbol_id == Symbol.id)
+            .scalar_subquery()
+        )
+        character_associations = (
+            select(func.array_agg(aggregate_order_by(CharacterAssociation.association_text, CharacterAssociation.id)))
+            .where(CharacterAssociation.character_id == Character.id)
+            .scalar_subquery()
+        )
+
+        emotions = (
+            select(_json_list(
+                DreamEmotion.id,
+                emotion=DreamEmotion.emotion,
+                emotion_type=DreamEmotion.emotion_type,
+                intensity=DreamEmotion.intensity,
+            ))
+            .where(DreamEmotion.dream_id == Dream.id)
+            .scalar_subquery()
+        )
+        themes = (
+            select(_json_list(
+                DreamTheme.id,
+                id=DreamTheme.id,
+                theme=DreamTheme.theme,
+                is_ai_extracted=DreamTheme.is_ai_extracted,
+                is_confirmed=DreamTheme.is_confirmed,
+            ))
+            .where(DreamTheme.dream_id == Dream.id)
+            .scalar_subquery()
+        )
+        symbols = (
+            select(_json_list(
+                DreamSymbol.id,
+                id=DreamSymbol.id,
+                symbol_id=Symbol.id,
+                name=Symbol.name,
+                category=Symbol.category,
+                associations=symbol_associations,
+                is_ai_extracted=DreamSymbol.is_ai_extracted,
+                is_confirmed=DreamSymbol.is_confirmed,
+                context_note=DreamSymbol.context_note,
+            ))
+            .select_from(DreamSymbol)
+            .join(Symbol, DreamSymbol.symbol_id == Symbol.id)
+            .where(DreamSymbol.dream_id == Dream.id)
+            .scalar_subquery()
+        )
+        characters = (
+            select(_json_list(
+                DreamCharacter.id,
+                id=DreamCharacter.id,
+                character_id=Character.id,
+                name=Character.name,
+                character_type=Character.character_type,
+                real_world_relation=Character.real_world_relation,
+                role_in_dream=DreamCharacter.role_in_dream,
+                archetype=DreamCharacter.archetype,
+                traits=DreamCharacter.traits,
+                associations=character_associations,
+                is_ai_extracted=DreamCharacter.is_ai_extracted,
+                is_confirmed=DreamCharacter.is_confirmed,
+                context_note=DreamCharacter.context_note,
+            ))
+            .select_from(DreamCharacter)
+            .join(Character, DreamCharacter.character_id == Character.id)
+            .where(DreamCharacter.dream_id == Dream.id)
+            .scalar_subquery()
+        )
 
-        emotions = await self._get_dream_emotions(dream_id)
-        symbols = await self._get_dream_symbols_with_associations(dream_id)
-        characters = await self._get_dream_characters_with_associations(dream_id)
-        themes = await self._get_dream_themes(dream_id)
+        query = (
+            select(
+                Dream,
+                emotions.label("emotions"),
+                themes.label("themes"),
+                symbols.label("symbols"),
+                characters.label("characters"),
+            )
+            .where(and_(Dream.id == dream_id, Dream.user_id == user_id))
+        )
+        result = await self.db.execute(query)
+        row = result.one_or_none()
+        if not row:
+            return None
 
+        # json_build_object renders Postgres enums by label, which is the Python member name
         return {
-            "dream": dream,
-            "emotions": emotions,
-            "symbols": symbols,
-            "characters": characters,
-            "themes": themes,
+            "dream": row.Dream,
+            "emotions": [
+                {**e, "emotion_type": _enum_value(EmotionType, e["emotion_type"]) or EmotionType.DURING.value}
+                for e in row.emotions or []
+            ],
+            "symbols": [
+                {
+                    **s,
+                    "category": _enum_value(SymbolCategory, s["category"]),
+                    "associations": s["associations"] or [],
+                }
+                for s in row.symbols or []
+            ],
+            "characters": [
+                {
+                    **c,
+                    "character_type": _enum_value(CharacterType, c["character_type"]),
+                    "role_in_dream": _enum_value(RoleInDream, c["role_in_dream"]),
+                    "traits": c["traits"] or [],
+                    "associations": c["associations"] or [],
+                }
+                for c in row.characters or []
+            ],
+            "themes": list(row.themes or []),
         }
 
     async def list_dreams(
@@ -137,7 +261,9 @@ class DreamRepository:
             query = query.where(Dream.is_indexed == is_indexed)
 
         if emotion:
-            query = query.join(DreamEmotion).where(DreamEmotion.emotion == emotion)
+            query = query.where(
+                Dream.id.in_(select(DreamEmotion.dream_id).where(DreamEmotion.emotion == emotion))
+            )
         if cursor:
             query = query.where(Dream.id < cursor)
 
@@ -149,21 +275,61 @@ class DreamRepository:
         if has_more:
             dreams = dreams[:per_page]
 
-        dream_summaries = []
-        for dream in dreams:
-            emotions = await self._get_dream_emotion_names(dream.id)
-            symbol_count = await self._count_dream_symbols(dream.id)
-            character_count = await self._count_dream_characters(dream.id)
-
-            dream_summaries.append({
-                "dream": dream,
-                "emotions": emotions,
-                "symbol_count": symbol_count,
-                "character_count": character_count,
-            })
+        summary_data = await self.get_dream_summary_data([dream.id for dream in dreams])
+        dream_summaries = [
+            {"dream": dream, **summary_data[dream.id]}
+            for dream in dreams
+        ]
 
         return dream_summaries, has_more
 
+    async def get_dream_summary_data(self, dream_ids: list[int]) -> dict[int, dict]:
+        """Emotion names and symbol/character counts for a page of dreams in one query."""
+        if not dream_ids:
+            return {}
+
+        emotions = (
+            select(DreamEmotion.dream_id, func.array_agg(DreamEmotion.emotion).label("emotions"))
+            .where(DreamEmotion.dream_id.in_(dream_ids))
+            .group_by(DreamEmotion.dream_id)
+            .subquery()
+        )
+        symbols = (
+            select(DreamSymbol.dream_id, func.count(DreamSymbol.id).label("symbol_count"))
+            .where(DreamSymbol.dream_id.in_(dream_ids))
+            .group_by(DreamSymbol.dream_id)
+            .subquery()
+        )
+        characters = (
+            select(DreamCharacter.dream_id, func.count(DreamCharacter.id).label("character_count"))
+            .where(DreamCharacter.dream_id.in_(dream_ids))
+            .group_by(DreamCharacter.dream_id)
+            .subquery()
+        )
+
+        query = (
+            select(
+                Dream.id,
+                emotions.c.emotions,
+                symbols.c.symbol_count,
+                characters.c.character_count,
+            )
+            .outerjoin(emotions, emotions.c.dream_id == Dream.id)
+            .outerjoin(symbols, symbols.c.dream_id == Dream.id)
+            .outerjoin(characters, characters.c.dream_id == Dream.id)
+            .where(Dream.id.in_(dream_ids))
+        )
+        result = await self.db.execute(query)
+
+        return {
+            row.id: {
+                "emotions": list(row.emotions or []),
+                "symbol_count": row.symbol_count or 0,
+                "character_count": row.character_count or 0,
+            }
+            for row in result.all()
+        }
+
     async def update_dream(
             self,
             dream_id: int,
@@ -176,8 +342,11 @@ class DreamRepository:
 
         for field, value in updates.items():
             if value is not None and hasattr(dream, field):
+                if field in INDEXED_FIELDS and getattr(dream, field) != value:
+                    dream.is_indexed = False
                 setattr(dream, field, value)
 
+        await self.user_stats.mark_stale(user_id)
         await self.db.flush()
         await self.db.refresh(dream)
 
@@ -200,6 +369,7 @@ class DreamRepository:
             dream.is_indexed = True
             from datetime import datetime, timezone
             dream.indexed_at = datetime.now(timezone.utc)
+            await self.user_stats.mark_stale(dream.user_id)
             await self.db.flush()
 
     async def mark_extraction_done(self, dream_id: int) -> None:
@@ -214,6 +384,7 @@ class DreamRepository:
             return False
 
         await self.db.delete(dream)
+        await self.user_stats.mark_stale(user_id)
         await self.db.flush()
 
         return True
@@ -231,94 +402,6 @@ class DreamRepository:
 
         return list(result.scalars().all())
 
-    async def _get_dream_emotion_names(self, dream_id: int) -> list[str]:
-        query = select(DreamEmotion.emotion).where(DreamEmotion.dream_id == dream_id)
-        result = await self.db.execute(query)
-
-        return [row[0] for row in result.all()]
-
-    async def _get_dream_themes(self, dream_id: int) -> list[DreamTheme]:
-        query = select(DreamTheme).where(DreamTheme.dream_id == dream_id)
-        result = await self.db.execute(query)
-
-        return list(result.scalars().all())
-
-    async def _count_dream_symbols(self, dream_id: int) -> int:
-        query = select(func.count(DreamSymbol.id)).where(DreamSymbol.dream_id == dream_id)
-        result = await self.db.execute(query)
-
-        return result.scalar() or 0
-
-    async def _count_dream_characters(self, dream_id: int) -> int:
-        query = select(func.count(DreamCharacter.id)).where(DreamCharacter.dream_id == dream_id)
-        result = await self.db.execute(query)
-
-        return result.scalar() or 0
-
-    async def _get_dream_symbols_with_associations(self, dream_id: int) -> list[dict]:
-        query = (
-            select(DreamSymbol, Symbol)
-            .join(Symbol, DreamSymbol.symbol_id == Symbol.id)
-            .where(DreamSymbol.dream_id == dream_id)
-        )
-        result = await self.db.execute(query)
-        rows = result.all()
-
-        symbols = []
-        for dream_symbol, symbol in rows:
-            assoc_query = select(SymbolAssociation.association_text).where(
-                SymbolAssociation.symbol_id == symbol.id
-            )
-            assoc_result = await self.db.execute(assoc_query)
-            associations = [row[0] for row in assoc_result.all()]
-
-            symbols.append({
-                "id": dream_symbol.id,
-                "symbol_id": symbol.id,
-                "name": symbol.name,
-                "category": symbol.category.value if symbol.category else None,
-                "associations": associations,
-                "is_ai_extracted": dream_symbol.is_ai_extracted,
-                "is_confirmed": dream_symbol.is_confirmed,
-                "context_note": dream_symbol.context_note,
-            })
-
-        return symbols
-
-    async def _get_dream_characters_with_associations(self, dream_id: int) -> list[dict]:
-        query = (
-            select(DreamCharacter, Character)
-            .join(Character, DreamCharacter.character_id == Character.id)
-            .where(DreamCharacter.dream_id == dream_id)
-        )
-        result = await self.db.execute(query)
-        rows = result.all()
-
-        characters = []
-        for dream_char, character in rows:
-            assoc_query = select(CharacterAssociation.association_text).where(
-                CharacterAssociation.character_id == character.id
-            )
-            assoc_result = await self.db.execute(assoc_query)
-            associations = [row[0] for row in assoc_result.all()]
-
-            characters.append({
-                "id": dream_char.id,
-                "character_id": character.id,
-                "name": character.name,
-                "character_type": character.character_type.value if character.character_type else None,
-                "real_world_relation": character.real_world_relation,
-                "role_in_dream": dream_char.role_in_dream.value if dream_char.role_in_dream else None,
-                "archetype": dream_char.archetype,
-                "traits": dream_char.traits or [],
-                "associations": associations,
-                "is_ai_extracted": dream_char.is_ai_extracted,
-                "is_confirmed": dream_char.is_confirmed,
-                "context_note": dream_char.context_note,
-            })
-
-        return characters
-
     async def dream_exists(self, dream_id: int, user_id: int) -> bool:
         query = select(Dream.id).where(
             and_(Dream.id == dream_id, Dream.user_id == user_id)
@@ -343,6 +426,8 @@ class DreamRepository:
             intensity=intensity,
         )
         self.db.add(dream_emotion)
+        await self.index_state.mark_dream_unindexed(dream_id)
+        await self.user_stats.mark_stale_for_dream(dream_id)
         await self.db.flush()
         await self.db.refresh(dream_emotion)
 
@@ -369,6 +454,8 @@ class DreamRepository:
             is_confirmed=not is_ai_extracted,
         )
         self.db.add(dream_theme)
+        await self.index_state.mark_dream_unindexed(dream_id)
+        await self.user_stats.mark_stale_for_dream(dream_id)
         await self.db.flush()
         await self.db.refresh(dream_theme)
 
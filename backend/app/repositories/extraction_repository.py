@@ -0,0 +1,248 @@
+from datetime import date
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.symbols import Symbol
+from app.models.characters import Character
+from app.models.dream_symbols import DreamSymbol
+from app.models.dream_characters import DreamCharacter
+from app.models.dream_themes import DreamTheme
+from app.models.dream_emotions import DreamEmotion
+from app.models.symbol_associations import SymbolAssociation
+from app.models.enums.dream_enums import SymbolCategory, CharacterType, RoleInDream, EmotionType, AssociationSource
+from app.repositories.user_stats_repository import UserStatsRepository
+from app.repositories.index_state_repository import IndexStateRepository
+
+
+def _enum_or_none(enum_cls: type[Enum], value: Optional[str]):
+    try:
+        return enum_cls(value) if value else None
+    except ValueError:
+        return None
+
+
+def _clip(value: Optional[str], length: int) -> Optional[str]:
+    return value.strip()[:length] if value else value
+
+
+class ExtractionRepository:
+    """Set-based persistence of extracted symbols, characters, themes and emotions.
+
+    Entities are upserted with one INSERT ... ON CONFLICT ... RETURNING per type, so
+    concurrent saves for the same user can't race on the unique name constraints.
+    Rows are sorted by normalized name so those saves also lock in the same order.
+    Items take the shape of the extraction data models (`model_dump()` output).
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.user_stats = UserStatsRepository(db)
+        self.index_state = IndexStateRepository(db)
+
+    async def save_dream_entities(
+            self,
+            dream_id: int,
+            user_id: int,
+            dream_date: date,
+            symbols: list[dict],
+            characters: list[dict],
+            themes: list[dict],
+            emotions: list[dict],
+    ) -> dict[str, int]:
+        """Link the entities to the dream; returns how many links/rows were actually added."""
+        counts = {
+            "symbols": await self._save_symbols(dream_id, user_id, dream_date, symbols),
+            "characters": await self._save_characters(dream_id, user_id, dream_date, characters),
+            "themes": await self._save_themes(dream_id, themes),
+            "emotions": await self._save_emotions(dream_id, emotions),
+        }
+
+        if any(counts.values()):
+            await self.index_state.mark_dream_unindexed(dream_id)
+            await self.user_stats.mark_stale(user_id)
+        await self.db.flush()
+
+        return counts
+
+    async def _save_symbols(self, dream_id: int, user_id: int, dream_date: date, symbols: list[dict]) -> int:
+        by_name = {}
+        for s in symbols:
+            name = _clip(s["name"], 100)
+            if name:
+                by_name.setdefault(name.lower(), {**s, "name": name})
+        if not by_name:
+            return 0
+
+        stmt = insert(Symbol).values([
+            {
+                "user_id": user_id,
+                "name": s["name"],
+                "name_normalized": normalized,
+                "category": _enum_or_none(SymbolCategory, s.get("category")),
+                "occurrence_count": 0,
+            }
+            for normalized, s in sorted(by_name.items())
+        ])
+        # A no-op update so RETURNING also yields the symbols that already existed
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_user_symbol",
+            set_={"name_normalized": stmt.excluded.name_normalized},
+        ).returning(Symbol.id, Symbol.name_normalized)
+        result = await self.db.execute(stmt)
+        symbol_ids = {normalized: symbol_id for symbol_id, normalized in result.all()}
+
+        stmt = insert(DreamSymbol).values([
+            {
+                "dream_id": dream_id,
+                "symbol_id": symbol_ids[normalized],
+                "is_ai_extracted": not s.get("is_user_added", False),
+                "is_confirmed": s.get("is_user_added", False),
+                "context_note": s.get("context"),
+                "personal_meaning": s.get("personal_meaning"),
+            }
+            for normalized, s in by_name.items()
+        ]).on_conflict_do_nothing(constraint="uq_dream_symbol").returning(DreamSymbol.symbol_id)
+        result = await self.db.execute(stmt)
+        linked_ids = set(result.scalars().all())
+        if not linked_ids:
+            return 0
+
+        associations = [
+            {
+                "symbol_id": symbol_ids[normalized],
+                "association_text": text,
+                "source": AssociationSource.AI_SUGGESTED,
+                "is_confirmed": False,
+            }
+            for normalized, s in by_name.items()
+            if symbol_ids[normalized] in linked_ids
+            for text in s.get("personal_associations") or []
+            if text
+        ]
+        if associations:
+            await self.db.execute(insert(SymbolAssociation).values(associations))
+
+        await self.db.execute(
+            update(Symbol)
+            .where(Symbol.id.in_(linked_ids))
+            .values(
+                occurrence_count=func.coalesce(Symbol.occurrence_count, 0) + 1,
+                first_appeared=func.least(Symbol.first_appeared, dream_date),
+                last_appeared=func.greatest(Symbol.last_appeared, dream_date),
+            )
+        )
+
+        return len(linked_ids)
+
+    async def _save_characters(self, dream_id: int, user_id: int, dream_date: date, characters: list[dict]) -> int:
+        by_name = {}
+        for c in characters:
+            name = _clip(c["name"], 100)
+            if name:
+                by_name.setdefault(name.lower(), {**c, "name": name})
+        if not by_name:
+            return 0
+
+        stmt = insert(Character).values([
+            {
+                "user_id": user_id,
+                "name": c["name"],
+                "name_normalized": normalized,
+                "character_type": _enum_or_none(CharacterType, c.get("character_type")),
+                "real_world_relation": _clip(c.get("real_world_relation"), 100),
+                "occurrence_count": 0,
+            }
+            for normalized, c in sorted(by_name.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_user_character",
+            set_={"name_normalized": stmt.excluded.name_normalized},
+        ).returning(Character.id, Character.name_normalized)
+        result = await self.db.execute(stmt)
+        character_ids = {normalized: character_id for character_id, normalized in result.all()}
+
+        stmt = insert(DreamCharacter).values([
+            {
+                "dream_id": dream_id,
+                "character_id": character_ids[normalized],
+                "role_in_dream": _enum_or_none(RoleInDream, c.get("role_in_dream")),
+                "archetype": _clip(c.get("archetype"), 100),
+                "traits": c.get("traits") or [],
+                "is_ai_extracted": not c.get("is_user_added", False),
+                "is_confirmed": c.get("is_user_added", False),
+                "context_note": c.get("context"),
+                "personal_significance": c.get("personal_significance"),
+            }
+            for normalized, c in by_name.items()
+        ]).on_conflict_do_nothing(constraint="uq_dream_character").returning(DreamCharacter.character_id)
+        result = await self.db.execute(stmt)
+        linked_ids = set(result.scalars().all())
+        if not linked_ids:
+            return 0
+
+        await self.db.execute(
+            update(Character)
+            .where(Character.id.in_(linked_ids))
+            .values(
+                occurrence_count=func.coalesce(Character.occurrence_count, 0) + 1,
+                first_appeared=func.least(Character.first_appeared, dream_date),
+                last_appeared=func.greatest(Character.last_appeared, dream_date),
+            )
+        )
+
+        return len(linked_ids)
+
+    async def _save_themes(self, dream_id: int, themes: list[dict]) -> int:
+        rows = {}
+        for t in themes:
+            theme = _clip(t["theme"], 50)
+            if theme:
+                rows.setdefault(theme, {
+                    "dream_id": dream_id,
+                    "theme": theme,
+                    "is_ai_extracted": not t.get("is_user_added", False),
+                    "is_confirmed": t.get("is_user_added", False),
+                })
+        if not rows:
+            return 0
+
+        stmt = insert(DreamTheme).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_dream_theme").returning(DreamTheme.id)
+        result = await self.db.execute(stmt)
+
+        return len(result.all())
+
+    async def _save_emotions(self, dream_id: int, emotions: list[dict]) -> int:
+        if not emotions:
+            return 0
+
+        # An emotion the dream already has, of either type, is left as recorded
+        query = select(func.lower(DreamEmotion.emotion)).where(DreamEmotion.dream_id == dream_id)
+        result = await self.db.execute(query)
+        existing = set(result.scalars().all())
+
+        rows = {}
+        for e in emotions:
+            emotion = _clip(e["emotion"], 50)
+            if not emotion or emotion.lower() in existing:
+                continue
+            emotion_type = _enum_or_none(EmotionType, e.get("emotion_type")) or EmotionType.DURING
+            intensity = e.get("intensity")
+            rows.setdefault((emotion, emotion_type), {
+                "dream_id": dream_id,
+                "emotion": emotion,
+                "emotion_type": emotion_type,
+                "intensity": intensity if intensity and 1 <= intensity <= 10 else None,
+            })
+        if not rows:
+            return 0
+
+        stmt = insert(DreamEmotion).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_nothing(constraint="uq_dream_emotion_type").returning(DreamEmotion.id)
+        result = await self.db.execute(stmt)
+
+        return len(result.all())
@@ -1,11 +1,12 @@
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 
-from sqlalchemy import select, func, update, and_
+from sqlalchemy import select, func, update, and_, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.dreams import Dream
 from app.models.users import User
+from app.repositories.user_stats_repository import UserStatsRepository
 
 
 class GraphRepository:
@@ -65,25 +66,48 @@ class GraphRepository:
 
         return result.scalar_one_or_none()
 
-    async def mark_dream_indexed(self, dream_id: int) -> None:
-        stmt = (
-            update(Dream)
-            .where(Dream.id == dream_id)
-            .values(is_indexed=True, updated_at=datetime.utcnow())
+    async def mark_dream_indexed(self, dream_id: int, seen_updated_at: datetime, content_hash: Optional[str] = None) -> None:
+        await self.mark_dreams_indexed(
+            [dream_id], {dream_id: seen_updated_at}, {dream_id: content_hash} if content_hash else None
         )
-        await self.db.execute(stmt)
-        await self.db.flush()
 
-    async def mark_dreams_indexed(self, dream_ids: list[int]) -> None:
+    async def mark_dreams_indexed(
+            self,
+            dream_ids: list[int],
+            seen_updated_at: dict[int, datetime],
+            content_hashes: Optional[dict[int, str]] = None,
+    ) -> None:
+        """Mark dreams indexed, unless they were edited after their text was prepared.
+
+        Every edit that changes a dream's indexed text bumps its `updated_at`, so a
+        dream whose `updated_at` moved since the job read it stays unindexed and is
+        picked up by the next index job.
+        """
         if not dream_ids:
             return
 
+        now = datetime.now(timezone.utc)
+        content_hashes = content_hashes or {}
+        dreams = Dream.__table__
         stmt = (
-            update(Dream)
-            .where(Dream.id.in_(dream_ids))
-            .values(is_indexed=True, updated_at=datetime.utcnow())
+            update(dreams)
+            .where(dreams.c.id == bindparam("dream_id"), dreams.c.updated_at == bindparam("seen_updated_at"))
+            .values(
+                is_indexed=True,
+                indexed_at=now,
+                updated_at=now,
+                index_hash=func.coalesce(bindparam("content_hash"), dreams.c.index_hash),
+            )
         )
-        await self.db.execute(stmt)
+        rows = [
+            {
+                "dream_id": dream_id,
+                "seen_updated_at": seen_updated_at[dream_id],
+                "content_hash": content_hashes.get(dream_id),
+            }
+            for dream_id in dream_ids
+        ]
+        await self.db.execute(stmt, rows)
         await self.db.flush()
 
     async def reset_all_indexed_flags(self, user_id: int) -> int:
@@ -99,6 +123,7 @@ class GraphRepository:
             .values(is_indexed=False)
         )
         await self.db.execute(stmt)
+        await UserStatsRepository(self.db).mark_stale(user_id)
         await self.db.flush()
 
         return count
@@ -123,6 +148,27 @@ class GraphRepository:
         await self.db.execute(stmt)
         await self.db.flush()
 
+    async def get_dream_ids(self, user_id: int) -> set[int]:
+        query = select(Dream.id).where(Dream.user_id == user_id)
+        result = await self.db.execute(query)
+
+        return set(result.scalars().all())
+
+    async def sync_user_indexed_count(self, user_id: int) -> None:
+        indexed_count = (
+            select(func.count(Dream.id))
+            .where(and_(Dream.user_id == user_id, Dream.is_indexed == True))
+            .scalar_subquery()
+        )
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(dreams_indexed_count=indexed_count)
+        )
+        await self.db.execute(stmt)
+        await UserStatsRepository(self.db).mark_stale(user_id)
+        await self.db.flush()
+
     async def increment_user_indexed_count(self, user_id: int, increment: int = 1) -> None:
         stmt = (
             update(User)
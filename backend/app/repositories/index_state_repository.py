@@ -0,0 +1,45 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dreams import Dream
+from app.models.dream_symbols import DreamSymbol
+from app.models.dream_characters import DreamCharacter
+
+
+class IndexStateRepository:
+    """Flags dreams whose indexed text changed, so incremental indexing picks them up again.
+
+    A dream's graph text includes its symbols and characters (names, categories,
+    associations) and its themes and emotions, not just the dream's own columns.
+    Already unindexed dreams are updated too: the write bumps `updated_at`, which
+    stops an index job that prepared the old text from marking them indexed.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def mark_dream_unindexed(self, dream_id: int) -> None:
+        stmt = (
+            update(Dream)
+            .where(Dream.id == dream_id)
+            .values(is_indexed=False)
+        )
+        await self.db.execute(stmt)
+
+    async def mark_symbol_dreams_unindexed(self, symbol_id: int) -> None:
+        linked = select(DreamSymbol.dream_id).where(DreamSymbol.symbol_id == symbol_id)
+        stmt = (
+            update(Dream)
+            .where(Dream.id.in_(linked))
+            .values(is_indexed=False)
+        )
+        await self.db.execute(stmt)
+
+    async def mark_character_dreams_unindexed(self, character_id: int) -> None:
+        linked = select(DreamCharacter.dream_id).where(DreamCharacter.character_id == character_id)
+        stmt = (
+            update(Dream)
+            .where(Dream.id.in_(linked))
+            .values(is_indexed=False)
+        )
+        await self.db.execute(stmt)
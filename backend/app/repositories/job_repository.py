@@ -0,0 +1,203 @@
+from typing import Optional
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update, and_, or_, exists, func
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.jobs import Job
+from app.models.enums.dream_enums import JobType, JobStatus
+
+
+ACTIVE_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+GRAPH_JOB_TYPES = (JobType.INDEX, JobType.REINDEX, JobType.PRUNE)
+# First key of the per-user advisory lock taken while claiming a graph job
+GRAPH_CLAIM_LOCK = 0x6A6F62
+
+
+def build_dedup_key(user_id: int, job_type: JobType, dream_id: Optional[int] = None) -> str:
+    if dream_id is not None:
+        return f"{job_type.value}:{user_id}:{dream_id}"
+
+    return f"{job_type.value}:{user_id}"
+
+
+class JobRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def enqueue(
+            self,
+            user_id: int,
+            job_type: JobType,
+            dream_id: Optional[int] = None,
+            payload: Optional[dict] = None,
+    ) -> tuple[Job, bool]:
+        """Queue a job unless an identical one is already queued or running.
+
+        Returns the job and whether it was newly created.
+        """
+        dedup_key = build_dedup_key(user_id, job_type, dream_id)
+        stmt = (
+            insert(Job)
+            .values(
+                user_id=user_id,
+                dream_id=dream_id,
+                job_type=job_type,
+                status=JobStatus.QUEUED,
+                dedup_key=dedup_key,
+                payload=payload or {},
+                total=0,
+                done=0,
+                failed=0,
+                errors=[],
+                attempts=0,
+            )
+            .on_conflict_do_nothing(
+                index_elements=[Job.dedup_key],
+                index_where=Job.status.in_(ACTIVE_STATUSES),
+            )
+            .returning(Job.id)
+        )
+        result = await self.db.execute(stmt)
+        job_id = result.scalar_one_or_none()
+        created = job_id is not None
+
+        if created:
+            job = await self.db.get(Job, job_id)
+        else:
+            job = await self.get_active_job(dedup_key)
+
+        return job, created
+
+    async def get_active_job(self, dedup_key: str) -> Optional[Job]:
+        query = select(Job).where(
+            and_(Job.dedup_key == dedup_key, Job.status.in_(ACTIVE_STATUSES))
+        )
+        result = await self.db.execute(query)
+
+        return result.scalar_one_or_none()
+
+    async def get_job(self, job_id: int, user_id: int) -> Optional[Job]:
+        query = select(Job).where(and_(Job.id == job_id, Job.user_id == user_id))
+        result = await self.db.execute(query)
+
+        return result.scalar_one_or_none()
+
+    async def list_jobs(self, user_id: int, limit: int = 20) -> list[Job]:
+        query = (
+            select(Job)
+            .where(Job.user_id == user_id)
+            .order_by(Job.created_at.desc(), Job.id.desc())
+            .limit(limit)
+        )
+        result = await self.db.execute(query)
+
+        return list(result.scalars().all())
+
+    async def claim_next(self, stale_after_seconds: int) -> Optional[Job]:
+        """Lock and start the oldest runnable job.
+
+        Runnable means queued, or running with a heartbeat older than
+        `stale_after_seconds` (its worker died). Graph jobs are skipped while the
+        same user already has a live graph job, so writes to one graph store never
+        overlap even across worker processes.
+
+        The NOT EXISTS check only sees committed claims, so a graph job is taken
+        only under a per-user advisory lock, held until this transaction commits,
+        and the check is repeated once the lock is held.
+        """
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(seconds=stale_after_seconds)
+        skipped: list[int] = []
+
+        while True:
+            query = (
+                select(Job)
+                .where(
+                    and_(
+                        or_(
+                            Job.status == JobStatus.QUEUED,
+                            and_(Job.status == JobStatus.RUNNING, Job.heartbeat_at < stale_before),
+                        ),
+                        or_(Job.job_type.notin_(GRAPH_JOB_TYPES), ~self._graph_busy(Job.user_id, Job.id, stale_before)),
+                        Job.id.notin_(skipped),
+                    )
+                )
+                .order_by(Job.created_at.asc(), Job.id.asc())
+                .limit(1)
+                .with_for_update(skip_locked=True, of=Job)
+            )
+            result = await self.db.execute(query)
+            job = result.scalar_one_or_none()
+            if not job:
+                return None
+
+            if job.job_type not in GRAPH_JOB_TYPES or await self._lock_graph(job, stale_before):
+                break
+            skipped.append(job.id)
+
+        job.status = JobStatus.RUNNING
+        job.started_at = job.started_at or now
+        job.heartbeat_at = now
+        job.attempts = (job.attempts or 0) + 1
+        await self.db.flush()
+
+        return job
+
+    @staticmethod
+    def _graph_busy(user_id, job_id, stale_before: datetime):
+        running = aliased(Job)
+
+        return exists().where(
+            and_(
+                running.user_id == user_id,
+                running.id != job_id,
+                running.job_type.in_(GRAPH_JOB_TYPES),
+                running.status == JobStatus.RUNNING,
+                running.heartbeat_at >= stale_before,
+            )
+        )
+
+    async def _lock_graph(self, job: Job, stale_before: datetime) -> bool:
+        locked = await self.db.scalar(select(func.pg_try_advisory_xact_lock(GRAPH_CLAIM_LOCK, job.user_id)))
+        if not locked:
+            return False
+
+        # A fresh snapshot sees a graph job claimed and committed since the select above
+        busy = await self.db.scalar(select(self._graph_busy(job.user_id, job.id, stale_before)))
+        return not busy
+
+    async def heartbeat(self, job_id: int) -> None:
+        stmt = (
+            update(Job)
+            .where(and_(Job.id == job_id, Job.status == JobStatus.RUNNING))
+            .values(heartbeat_at=datetime.now(timezone.utc))
+        )
+        await self.db.execute(stmt)
+        await self.db.flush()
+
+    async def update_progress(
+            self,
+            job: Job,
+            total: Optional[int] = None,
+            done: int = 0,
+            failed: int = 0,
+            errors: Optional[list[str]] = None,
+    ) -> None:
+        if total is not None:
+            job.total = total
+        job.done = (job.done or 0) + done
+        job.failed = (job.failed or 0) + failed
+        if errors:
+            job.errors = (job.errors or []) + errors
+        job.heartbeat_at = datetime.now(timezone.utc)
+        await self.db.flush()
+
+    async def finish(self, job: Job, error: Optional[str] = None) -> None:
+        job.status = JobStatus.FAILED if error else JobStatus.COMPLETED
+        if error:
+            job.errors = (job.errors or []) + [error]
+        job.finished_at = datetime.now(timezone.utc)
+        await self.db.flush()
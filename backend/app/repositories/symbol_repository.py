@@ -9,11 +9,15 @@ from app.models.symbol_associations import SymbolAssociation
 from app.models.dream_symbols import DreamSymbol
 from app.models.dreams import Dream
 from app.models.enums.dream_enums import SymbolCategory, AssociationSource
+from app.repositories.user_stats_repository import UserStatsRepository
+from app.repositories.index_state_repository import IndexStateRepository
 
 
 class SymbolRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.user_stats = UserStatsRepository(db)
+        self.index_state = IndexStateRepository(db)
 
     async def get_or_create_symbol(
             self,
@@ -42,6 +46,7 @@ class SymbolRepository:
             last_appeared=None,
         )
         self.db.add(symbol)
+        await self.user_stats.mark_stale(user_id)
         await self.db.flush()
         await self.db.refresh(symbol)
 
@@ -94,6 +99,8 @@ class SymbolRepository:
         if category:
             symbol.category = SymbolCategory(category)
 
+        await self.index_state.mark_symbol_dreams_unindexed(symbol_id)
+        await self.user_stats.mark_stale(user_id)
         await self.db.flush()
         await self.db.refresh(symbol)
 
@@ -104,7 +111,10 @@ class SymbolRepository:
         if not symbol:
             return False
 
+        # Before the delete cascades away the links
+        await self.index_state.mark_symbol_dreams_unindexed(symbol_id)
         await self.db.delete(symbol)
+        await self.user_stats.mark_stale(user_id)
         await self.db.flush()
 
         return True
@@ -136,6 +146,8 @@ class SymbolRepository:
             if symbol.last_appeared is None or dream_date > symbol.last_appeared:
                 symbol.last_appeared = dream_date
 
+        await self.index_state.mark_dream_unindexed(dream_id)
+        await self.user_stats.mark_stale_for_dream(dream_id)
         await self.db.flush()
         await self.db.refresh(dream_symbol)
 
@@ -189,6 +201,7 @@ class SymbolRepository:
         if is_confirmed is not None:
             dream_symbol.is_confirmed = is_confirmed
 
+        await self.index_state.mark_dream_unindexed(dream_id)
         await self.db.flush()
         await self.db.refresh(dream_symbol)
 
@@ -208,6 +221,8 @@ class SymbolRepository:
             symbol.occurrence_count -= 1
 
         await self.db.delete(dream_symbol)
+        await self.index_state.mark_dream_unindexed(dream_id)
+        await self.user_stats.mark_stale_for_dream(dream_id)
         await self.db.flush()
 
         return True
@@ -225,6 +240,7 @@ class SymbolRepository:
             is_confirmed=source == "user",
         )
         self.db.add(association)
+        await self.index_state.mark_symbol_dreams_unindexed(symbol_id)
         await self.db.flush()
         await self.db.refresh(association)
 
@@ -256,6 +272,7 @@ class SymbolRepository:
             return False
 
         await self.db.delete(association)
+        await self.index_state.mark_symbol_dreams_unindexed(symbol_id)
         await self.db.flush()
 
         return True
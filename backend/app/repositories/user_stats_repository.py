@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dreams import Dream
+from app.models.user_stats import UserStats
+
+
+class UserStatsRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get(self, user_id: int) -> Optional[UserStats]:
+        query = select(UserStats).where(UserStats.user_id == user_id)
+        result = await self.db.execute(query)
+
+        return result.scalar_one_or_none()
+
+    async def get_version(self, user_id: int) -> int:
+        """Current data version, creating an empty (never fresh) row on first use so writes bump it."""
+        query = select(UserStats.version).where(UserStats.user_id == user_id)
+        result = await self.db.execute(query)
+        version = result.scalar_one_or_none()
+        if version is not None:
+            return version
+
+        stmt = insert(UserStats).values(
+            user_id=user_id, stats={}, version=0, computed_version=0,
+        ).on_conflict_do_nothing(index_elements=[UserStats.user_id])
+        await self.db.execute(stmt)
+        await self.db.flush()
+
+        return 0
+
+    async def save(self, user_id: int, stats: dict, seen_version: int) -> None:
+        """Store stats computed from data as of `seen_version`.
+
+        Writes that land while the stats are being computed bump `version` past
+        `seen_version`, so the row stays stale and the next read recomputes it.
+        """
+        now = datetime.now(timezone.utc)
+        stmt = insert(UserStats).values(
+            user_id=user_id,
+            stats=stats,
+            version=seen_version,
+            computed_version=seen_version,
+            computed_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserStats.user_id],
+            set_={"stats": stats, "computed_version": seen_version, "computed_at": now},
+        )
+        await self.db.execute(stmt)
+        await self.db.flush()
+
+    async def mark_stale(self, user_id: int) -> None:
+        stmt = (
+            update(UserStats)
+            .where(UserStats.user_id == user_id)
+            .values(version=UserStats.version + 1)
+        )
+        await self.db.execute(stmt)
+
+    async def mark_stale_for_dream(self, dream_id: int) -> None:
+        owner = select(Dream.user_id).where(Dream.id == dream_id).scalar_subquery()
+        stmt = (
+            update(UserStats)
+            .where(UserStats.user_id == owner)
+            .values(version=UserStats.version + 1)
+        )
+        await self.db.execute(stmt)
@@ -12,6 +12,7 @@ class AgentResponse:
     message: str
     tool_calls: list[dict] = field(default_factory=list)
     sources: list[dict] = field(default_factory=list)
+    input_tokens: int = 0
 
 _PROMPT_PATH = Path(__file__).resolve().parent.parent / "prompts" / "system_prompt.md"
 with open(_PROMPT_PATH, "r") as f:
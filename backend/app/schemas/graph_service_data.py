@@ -1,5 +1,7 @@
+from bisect import bisect_right
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Optional
 
 _DOMAIN_PATH = Path(__file__).resolve().parent.parent / "prompts" / "dream_domain.md"
 with open(_DOMAIN_PATH, "r") as f:
@@ -44,3 +46,78 @@ class GraphStats:
     entity_count: int = 0
     relationship_count: int = 0
     chunk_count: int = 0
+
+@dataclass
+class BatchIndexResult:
+    successful_ids: list[int] = field(default_factory=list)
+    failure_count: int = 0
+    errors: list[str] = field(default_factory=list)
+    tokens: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def success_count(self) -> int:
+        return len(self.successful_ids)
+
+    @property
+    def dreams_per_second(self) -> float:
+        return round(self.success_count / self.elapsed_seconds, 3) if self.elapsed_seconds else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return round(self.tokens / self.elapsed_seconds, 1) if self.elapsed_seconds else 0.0
+
+@dataclass
+class GraphSnapshot:
+    """Materialized export of one version of a user's graph."""
+    etag: str
+    nodes: list[dict] = field(default_factory=list)
+    edges: list[dict] = field(default_factory=list)
+    # lowercased label -> node index
+    name_index: dict[str, int] = field(default_factory=dict)
+    # node index -> indices of its incident edges
+    adjacency: list[list[int]] = field(default_factory=list)
+    # node type -> node indices, ascending
+    type_index: dict[str, list[int]] = field(default_factory=dict)
+    export_json: bytes = b""
+
+    @property
+    def stats(self) -> dict:
+        return {"node_count": len(self.nodes), "edge_count": len(self.edges)}
+
+    def find(self, name: str) -> Optional[int]:
+        index = self.name_index.get(name.lower())
+        if index is None and name.isdigit() and int(name) < len(self.nodes):
+            index = int(name)
+
+        return index
+
+    def degree(self, index: int) -> int:
+        return len(self.adjacency[index])
+
+    def neighbours(self, index: int) -> list[dict]:
+        connected = []
+        for edge_index in self.adjacency[index]:
+            edge = self.edges[edge_index]
+            other = int(edge["target"]) if int(edge["source"]) == index else int(edge["source"])
+            connected.append({
+                "name": self.nodes[other]["label"],
+                "type": self.nodes[other]["type"],
+                "relationship": edge["relationship"],
+                "weight": edge["weight"],
+            })
+
+        return connected
+
+    def page(self, entity_type: Optional[str], cursor: Optional[int], limit: int) -> tuple[list[int], Optional[int], int]:
+        """Node indices after `cursor`, the cursor of the next page and the filtered total."""
+        if entity_type:
+            candidates = self.type_index.get(entity_type.lower(), [])
+        else:
+            candidates = range(len(self.nodes))
+
+        start = bisect_right(candidates, cursor) if cursor is not None else 0
+        indices = list(candidates[start:start + limit])
+        next_cursor = indices[-1] if start + limit < len(candidates) and indices else None
+
+        return indices, next_cursor, len(candidates)
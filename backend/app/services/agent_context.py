@@ -0,0 +1,130 @@
+"""Token budgeting for the agent's conversation context."""
+
+import json
+
+from google.genai import types
+
+from app.config import settings
+from app.logger import logger
+from app.schemas.agent_data import ChatMessage
+from app.services.gemini_client import generate_content_with_retry, get_client
+from app.services.rate_limiter import estimate_tokens
+
+# The latest messages are always sent verbatim, however long they are
+MIN_RECENT_MESSAGES = 4
+# Role marker and separators around each message
+MESSAGE_OVERHEAD_TOKENS = 4
+# (max string chars, max list items) tried in turn until a tool payload fits its budget
+TRUNCATION_STEPS = [(800, 25), (400, 12), (200, 6), (100, 3)]
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a dreamer and their dream analyst.
+
+Current summary:
+{summary}
+
+Older messages to fold into it:
+{transcript}
+
+Write the updated summary in at most 200 words. Keep the dreams, symbols, characters and
+interpretations discussed, what the dreamer shared about their life, and any open questions.
+Return only the summary."""
+
+_agent_context_stats = {"requests": 0, "input_tokens": 0, "cached_tokens": 0, "compactions": 0}
+
+
+def message_tokens(message: ChatMessage) -> int:
+    return estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def history_tokens(history: list[ChatMessage]) -> int:
+    return sum(message_tokens(m) for m in history)
+
+
+def _shrink(value, max_chars: int, max_items: int):
+    if isinstance(value, str) and len(value) > max_chars:
+        return value[:max_chars] + "…"
+    if isinstance(value, list):
+        items = [_shrink(v, max_chars, max_items) for v in value[:max_items]]
+        if len(value) > max_items:
+            items.append(f"... {len(value) - max_items} more omitted")
+        return items
+    if isinstance(value, dict):
+        return {k: _shrink(v, max_chars, max_items) for k, v in value.items()}
+    return value
+
+
+def fit_tool_payload(payload: dict, budget: int) -> dict:
+    """Cut long strings (narrative excerpts) and long lists (appearances) until the payload fits `budget` tokens."""
+    if estimate_tokens(json.dumps(payload, default=str)) <= budget:
+        return payload
+
+    shrunk = payload
+    for max_chars, max_items in TRUNCATION_STEPS:
+        shrunk = _shrink(payload, max_chars, max_items)
+        if estimate_tokens(json.dumps(shrunk, default=str)) <= budget:
+            break
+
+    return shrunk
+
+
+async def compact_history(history: list[ChatMessage], summary: str) -> tuple[list[ChatMessage], str]:
+    """Fold the oldest messages into the rolling summary once the history is over budget.
+
+    Compacts down to half the budget so it doesn't run again on the very next turn.
+    If the summary call fails the history is returned untouched and retried later.
+    """
+    budget = settings.agent_history_token_budget
+    if history_tokens(history) <= budget:
+        return history, summary
+
+    keep = list(history)
+    dropped = []
+    while len(keep) > MIN_RECENT_MESSAGES and history_tokens(keep) > budget // 2:
+        dropped.append(keep.pop(0))
+    # Resume on a user turn so the kept history alternates correctly
+    while len(keep) > 1 and keep[0].role != "user":
+        dropped.append(keep.pop(0))
+
+    if not dropped:
+        return history, summary
+
+    transcript = "\n\n".join(f"{m.role}: {m.content}" for m in dropped)
+    prompt = SUMMARY_PROMPT.format(summary=summary or "(none yet)", transcript=transcript)
+    try:
+        response = await generate_content_with_retry(
+            get_client(),
+            settings.llm_model,
+            prompt,
+            types.GenerateContentConfig(
+                temperature=0.2,
+                thinking_config=types.ThinkingConfig(thinking_level="low"),
+            ),
+        )
+    except Exception as e:
+        logger.warning(f"History compaction failed, keeping {len(history)} messages: {e}")
+        return history, summary
+
+    new_summary = (response.text or "").strip()
+    if not new_summary:
+        return history, summary
+
+    _agent_context_stats["compactions"] += 1
+    logger.info(
+        f"Compacted {len(dropped)} messages into summary "
+        f"({history_tokens(history)} -> {history_tokens(keep)} history tokens)"
+    )
+    return keep, new_summary
+
+
+def record_usage(input_tokens: int, cached_tokens: int) -> None:
+    _agent_context_stats["requests"] += 1
+    _agent_context_stats["input_tokens"] += input_tokens
+    _agent_context_stats["cached_tokens"] += cached_tokens
+
+
+def get_agent_context_metrics() -> dict:
+    requests = _agent_context_stats["requests"]
+    return {
+        **_agent_context_stats,
+        "avg_input_tokens": round(_agent_context_stats["input_tokens"] / requests) if requests else 0,
+    }
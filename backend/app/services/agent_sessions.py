@@ -0,0 +1,149 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.logger import logger
+from app.repositories.chat_repository import ChatRepository
+from app.schemas.agent_data import ChatMessage
+from app.services.dream_agent import DreamAgent, HISTORY_LIMIT, get_dream_agent
+
+# Rough per-message overhead on top of the content bytes
+MESSAGE_OVERHEAD_BYTES = 64
+
+_agent_session_stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "expired": 0}
+
+
+@dataclass
+class CachedHistory:
+    history: list[ChatMessage]
+    summary: str
+    # (context start id, last message id) the history was built from
+    marker: tuple[Optional[int], Optional[int]]
+    size_bytes: int
+    expires_at: float
+
+
+@dataclass
+class AgentSession:
+    agent: DreamAgent
+    chat_id: int
+    context_start: Optional[int]
+
+
+class AgentSessionStore:
+    """Per-process LRU of chat histories, bounded by entries, bytes and idle TTL.
+
+    Only the history and rolling summary are kept; agents are rebuilt per request around the
+    shared Gemini client. chat_messages is the shared backend: an entry is used only
+    while its marker matches the chat's current context start and last message, so a
+    message served by another worker, or a cleared context, forces a rehydrate.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.total_bytes = 0
+        self._entries: OrderedDict[tuple[int, int], CachedHistory] = OrderedDict()
+
+    def _get(self, key: tuple[int, int], marker: tuple) -> Optional[CachedHistory]:
+        entry = self._entries.get(key)
+        if entry is None:
+            _agent_session_stats["misses"] += 1
+            return None
+
+        if entry.expires_at < time.monotonic():
+            self.drop(*key)
+            _agent_session_stats["expired"] += 1
+            _agent_session_stats["misses"] += 1
+            return None
+
+        if entry.marker != marker:
+            self.drop(*key)
+            _agent_session_stats["stale"] += 1
+            _agent_session_stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        _agent_session_stats["hits"] += 1
+        return entry
+
+    def _put(self, key: tuple[int, int], history: list[ChatMessage], summary: str, marker: tuple) -> None:
+        self.drop(*key)
+        size = len(summary.encode("utf-8")) + sum(
+            len(m.content.encode("utf-8")) + MESSAGE_OVERHEAD_BYTES for m in history
+        )
+        self._entries[key] = CachedHistory(
+            history=list(history),
+            summary=summary,
+            marker=marker,
+            size_bytes=size,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        self.total_bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            evicted, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size_bytes
+            _agent_session_stats["evictions"] += 1
+            logger.debug(f"Evicted agent session {evicted}")
+
+    def drop(self, user_id: int, chat_id: int) -> None:
+        entry = self._entries.pop((user_id, chat_id), None)
+        if entry:
+            self.total_bytes -= entry.size_bytes
+
+    async def open(self, db: AsyncSession, user_id: int, chat_id: int, before_id: int) -> AgentSession:
+        """An agent for the chat with the history preceding message `before_id`."""
+        chat_repo = ChatRepository(db)
+        marker = await chat_repo.get_context_marker(chat_id, before_id)
+
+        agent = get_dream_agent(user_id, db)
+        cached = self._get((user_id, chat_id), marker)
+        if cached:
+            agent.conversation_history = list(cached.history)
+            agent.summary = cached.summary
+        else:
+            # A cold chat starts without a summary; the next over-budget turn compacts again
+            messages = await chat_repo.get_context_messages(chat_id, before_id, HISTORY_LIMIT)
+            agent.conversation_history = [ChatMessage(role=m.role.value, content=m.content) for m in messages]
+
+        return AgentSession(agent=agent, chat_id=chat_id, context_start=marker[0])
+
+    def save(self, session: AgentSession, last_message_id: int) -> None:
+        """Remember the agent's history once the turn ending at `last_message_id` is stored."""
+        agent = session.agent
+        key = (agent.user_id, session.chat_id)
+        self._put(key, agent.conversation_history, agent.summary, (session.context_start, last_message_id))
+
+    def snapshot(self) -> dict:
+        lookups = _agent_session_stats["hits"] + _agent_session_stats["misses"]
+        return {
+            **_agent_session_stats,
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hit_rate": round(_agent_session_stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+_agent_sessions: Optional[AgentSessionStore] = None
+
+
+def get_agent_sessions() -> AgentSessionStore:
+    global _agent_sessions
+    if _agent_sessions is None:
+        _agent_sessions = AgentSessionStore(
+            max_entries=settings.agent_session_max_entries,
+            max_bytes=settings.agent_session_max_mb * 1024 * 1024,
+            ttl_seconds=settings.agent_session_ttl_seconds,
+        )
+
+    return _agent_sessions
+
+
+def get_agent_session_metrics() -> dict:
+    return get_agent_sessions().snapshot()
@@ -4,7 +4,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.logger import logger
 from app.schemas.tool_data import ToolResult
 from app.repositories.agent_repository import AgentRepository
+from app.repositories.user_stats_repository import UserStatsRepository
 from app.services.graphrag_service import GraphRAGService, get_graphrag_service
+from app.services.dream_vector_index import find_similar_dreams
+from app.services.response_cache import get_query_answer_cache
 
 
 class AgentTools:
@@ -12,14 +15,13 @@ class AgentTools:
         self.db = db
         self.user_id = user_id
         self.repo = AgentRepository(db)
-        self._graphrag: Optional[GraphRAGService] = None
+        # Set by the agent for the current message so tools don't each re-read it
+        self.data_version: Optional[int] = None
 
     @property
     def graphrag(self) -> GraphRAGService:
-        if self._graphrag is None:
-            self._graphrag = get_graphrag_service(self.user_id)
-
-        return self._graphrag
+        # Looked up on every use so the shared cache can evict idle graphs
+        return get_graphrag_service(self.user_id)
 
     async def search_symbols(
             self,
@@ -410,6 +412,41 @@ class AgentTools:
                 tool_name="get_recurring_dreams",
             )
 
+    async def find_similar_dreams(
+            self,
+            dream_id: Optional[int] = None,
+            query: Optional[str] = None,
+            limit: int = 5,
+    ) -> ToolResult:
+        try:
+            if dream_id is None and not query:
+                return ToolResult(
+                    success=False,
+                    error="Provide either dream_id or query.",
+                    tool_name="find_similar_dreams",
+                )
+
+            results = await find_similar_dreams(
+                self.repo,
+                user_id=self.user_id,
+                dream_id=dream_id,
+                query=query,
+                limit=limit,
+            )
+
+            return ToolResult(
+                success=True,
+                data={"dreams": results, "count": len(results)},
+                tool_name="find_similar_dreams",
+            )
+        except Exception as e:
+            logger.error(f"find_similar_dreams error: {e}", exc_info=True)
+            return ToolResult(
+                success=False,
+                error=str(e),
+                tool_name="find_similar_dreams",
+            )
+
     async def semantic_search(self, question: str) -> ToolResult:
         try:
             if not self.graphrag.graph_exists:
@@ -419,9 +456,14 @@ class AgentTools:
                     tool_name="semantic_search",
                 )
 
-            result = await self.graphrag.query(
-                question=question,
-                with_references=True,
+            version = self.data_version
+            if version is None:
+                version = await UserStatsRepository(self.db).get_version(self.user_id)
+            result = await get_query_answer_cache().get_or_compute(
+                self.user_id,
+                question,
+                version,
+                lambda: self.graphrag.query(question=question, with_references=True),
             )
 
             return ToolResult(
@@ -0,0 +1,162 @@
+import asyncio
+from collections import OrderedDict
+from datetime import date
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.logger import logger
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.repositories.user_stats_repository import UserStatsRepository
+
+# Top-N lists are computed once at the largest limit any endpoint accepts and sliced per request
+SNAPSHOT_LIMIT = 100
+
+_analytics_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+class AnalyticsSnapshotCache:
+    """Process-wide LRU of computed analytics sections.
+
+    Entries are keyed by user, section, date range and the current day (several
+    sections are relative to today), and stamped with the user's stats version,
+    which dream writes bump. Concurrent misses for the same key share one computation.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[int, dict]] = OrderedDict()
+        self._pending: dict[tuple, asyncio.Future] = {}
+
+    async def get_or_compute(self, key: tuple, version: int, compute: Callable[[], Awaitable[dict]]) -> dict:
+        entry = self._entries.get(key)
+        if entry and entry[0] == version:
+            self._entries.move_to_end(key)
+            _analytics_cache_stats["hits"] += 1
+            return entry[1]
+
+        pending = self._pending.get((key, version))
+        if pending:
+            _analytics_cache_stats["hits"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The computing request was cancelled rather than this one; take over
+                return await self.get_or_compute(key, version, compute)
+
+        _analytics_cache_stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[(key, version)] = future
+        try:
+            data = await compute()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                # Waiters re-raise; mark it retrieved so an unawaited future doesn't log
+                future.exception()
+            else:
+                # Cancelled (client disconnect): wake the waiters so they compute it themselves
+                future.cancel()
+            raise
+        finally:
+            self._pending.pop((key, version), None)
+
+        future.set_result(data)
+        self._entries[key] = (version, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            _analytics_cache_stats["evictions"] += 1
+            logger.debug(f"Evicted analytics snapshot {evicted}")
+
+        return data
+
+    def snapshot(self) -> dict:
+        lookups = _analytics_cache_stats["hits"] + _analytics_cache_stats["misses"]
+        return {
+            **_analytics_cache_stats,
+            "entries": len(self._entries),
+            "hit_rate": round(_analytics_cache_stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+_analytics_cache: Optional[AnalyticsSnapshotCache] = None
+
+
+def get_analytics_cache() -> AnalyticsSnapshotCache:
+    global _analytics_cache
+    if _analytics_cache is None:
+        _analytics_cache = AnalyticsSnapshotCache(max_entries=settings.analytics_cache_max_entries)
+
+    return _analytics_cache
+
+
+def get_analytics_cache_metrics() -> dict:
+    return get_analytics_cache().snapshot()
+
+
+class AnalyticsSnapshot:
+    """One user's analytics for a date range, with each section computed once per data version."""
+
+    def __init__(
+            self,
+            db: AsyncSession,
+            user_id: int,
+            date_from: Optional[date] = None,
+            date_to: Optional[date] = None,
+    ):
+        self.db = db
+        self.user_id = user_id
+        self.date_from = date_from
+        self.date_to = date_to
+        self.repo = AnalyticsRepository(db)
+        self._version: Optional[int] = None
+
+    async def _section(self, name: str, compute: Callable[[], Awaitable[dict]]) -> dict:
+        if self._version is None:
+            self._version = await UserStatsRepository(self.db).get_version(self.user_id)
+
+        key = (self.user_id, name, self.date_from, self.date_to, date.today())
+        return await get_analytics_cache().get_or_compute(key, self._version, compute)
+
+    async def summary(self) -> dict:
+        return await self.repo.get_summary_stats(self.user_id)
+
+    async def emotions(self, limit: int = SNAPSHOT_LIMIT) -> dict:
+        data = await self._section("emotions", lambda: self.repo.get_emotion_analytics(
+            self.user_id, self.date_from, self.date_to, SNAPSHOT_LIMIT
+        ))
+        return {
+            **data,
+            "most_common": data["most_common"][:limit],
+            "intensity_by_emotion": data["intensity_by_emotion"][:limit],
+        }
+
+    async def symbols(self, limit: int = SNAPSHOT_LIMIT) -> dict:
+        data = await self._section("symbols", lambda: self.repo.get_symbol_analytics(
+            self.user_id, self.date_from, self.date_to, SNAPSHOT_LIMIT
+        ))
+        return {
+            **data,
+            "most_frequent": data["most_frequent"][:limit],
+            "cooccurrences": data["cooccurrences"][:limit],
+        }
+
+    async def characters(self, limit: int = SNAPSHOT_LIMIT) -> dict:
+        data = await self._section("characters", lambda: self.repo.get_character_analytics(
+            self.user_id, self.date_from, self.date_to, SNAPSHOT_LIMIT
+        ))
+        return {**data, "most_frequent": data["most_frequent"][:limit]}
+
+    async def timeline(self) -> dict:
+        return await self._section("timeline", lambda: self.repo.get_timeline_analytics(
+            self.user_id, self.date_from, self.date_to
+        ))
+
+    async def patterns(self) -> dict:
+        return await self._section("patterns", lambda: self.repo.get_pattern_analytics(
+            self.user_id, self.date_from, self.date_to
+        ))
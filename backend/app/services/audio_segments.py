@@ -0,0 +1,161 @@
+"""Splitting long recordings into segments with ffmpeg, and stitching their transcripts back."""
+
+import asyncio
+import difflib
+import os
+import re
+import shutil
+import tempfile
+from typing import BinaryIO
+
+# A pause at least this long (and this quiet) is a natural place to cut
+MIN_SILENCE_SECONDS = 0.6
+SILENCE_NOISE_DB = -35
+# How far before the window end a cut may move to land on a pause
+SILENCE_SEARCH_FRACTION = 0.3
+# Segments are re-encoded small: speech only needs mono 16 kHz
+SEGMENT_MIME_TYPE = "audio/ogg"
+SPOOL_CHUNK_BYTES = 1024 * 1024
+# Words compared at each boundary when removing text both segments transcribed
+MAX_OVERLAP_WORDS = 40
+MIN_OVERLAP_WORDS = 3
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def _spool(file: BinaryIO) -> str:
+    file.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="recording-", delete=False) as out:
+        shutil.copyfileobj(file, out, SPOOL_CHUNK_BYTES)
+        return out.name
+
+
+async def spool_to_path(file: BinaryIO) -> str:
+    """Copy an upload to a named temporary file in chunks, for ffmpeg to read. The caller removes it."""
+    return await asyncio.to_thread(_spool, file)
+
+
+def remove_spooled(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _run_ffmpeg(*args: str) -> tuple[bytes, bytes]:
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-nostats", *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        raise
+
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {process.returncode}: {stderr.decode(errors='replace')[-500:]}")
+    return stdout, stderr
+
+
+async def analyze_recording(path: str) -> tuple[float, list[tuple[float, float]]]:
+    """Decode the recording once for its duration and its pauses.
+
+    The duration comes from decoding rather than the container, since browser
+    recordings (webm from MediaRecorder) often don't declare one.
+    """
+    stdout, stderr = await _run_ffmpeg(
+        "-progress", "pipe:1",
+        "-i", path,
+        "-af", f"silencedetect=noise={SILENCE_NOISE_DB}dB:d={MIN_SILENCE_SECONDS}",
+        "-f", "null", "-",
+    )
+
+    times = re.findall(rb"out_time_us=(\d+)", stdout)
+    if not times:
+        raise RuntimeError("ffmpeg reported no duration")
+    duration = int(times[-1]) / 1_000_000
+
+    log = stderr.decode(errors="replace")
+    starts = [float(t) for t in re.findall(r"silence_start: (-?[\d.]+)", log)]
+    ends = [float(t) for t in re.findall(r"silence_end: ([\d.]+)", log)]
+    # A recording that ends in silence has no closing silence_end
+    ends += [duration] * (len(starts) - len(ends))
+
+    return duration, list(zip(starts, ends))
+
+
+def plan_segments(
+        duration: float,
+        silences: list[tuple[float, float]],
+        window: float,
+        overlap: float,
+) -> list[tuple[float, float]]:
+    """(start, end) times covering the recording, each at most `window` seconds long.
+
+    A segment ends in the middle of the latest pause near its window end when there
+    is one; otherwise it is cut at the window end and the next one starts `overlap`
+    seconds earlier, so a word split by the cut is heard whole by one of them.
+    """
+    # An overlap as long as the window would never move past the first segment
+    overlap = min(overlap, window / 2)
+    segments = []
+    start = 0.0
+    while duration - start > window:
+        target = start + window
+        earliest = target - window * SILENCE_SEARCH_FRACTION
+        pauses = [(s + e) / 2 for s, e in silences if earliest <= (s + e) / 2 <= target]
+
+        if pauses:
+            end = max(pauses)
+            next_start = end
+        else:
+            end = target
+            next_start = end - overlap
+
+        segments.append((start, end))
+        start = next_start
+
+    segments.append((start, duration))
+    return segments
+
+
+async def extract_segment(path: str, start: float, end: float) -> bytes:
+    """One segment re-encoded as mono Opus, returned in memory (a minute is a few hundred KB)."""
+    stdout, _ = await _run_ffmpeg(
+        "-ss", f"{start:.3f}",
+        "-t", f"{end - start:.3f}",
+        "-i", path,
+        "-vn", "-ac", "1", "-ar", "16000",
+        "-c:a", "libopus", "-b:a", "24k",
+        "-f", "ogg", "pipe:1",
+    )
+    return stdout
+
+
+def _word_key(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def trim_overlap(previous: str, current: str) -> str:
+    """Drop the start of `current` that repeats the end of `previous`.
+
+    Both sides of an overlap transcribe the shared audio, but the words cut at
+    either edge can come out differently, so this looks for the longest run of
+    matching words near the boundary rather than an exact suffix/prefix match.
+    """
+    tail = [_word_key(w) for w in previous.split()[-MAX_OVERLAP_WORDS:]]
+    words = current.split()
+    head = [_word_key(w) for w in words[:MAX_OVERLAP_WORDS]]
+    if not tail or not head:
+        return current
+
+    match = difflib.SequenceMatcher(None, tail, head, autojunk=False).find_longest_match(0, len(tail), 0, len(head))
+    # Only a run that reaches (nearly) the end of one side and starts (nearly) at the top of the other
+    if match.size >= MIN_OVERLAP_WORDS and match.a + match.size >= len(tail) - 2 and match.b <= 3:
+        return " ".join(words[match.b + match.size:])
+
+    return current
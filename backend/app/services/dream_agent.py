@@ -1,25 +1,40 @@
+import asyncio
+import base64
 from typing import AsyncGenerator
-from google import genai
 from google.genai import types
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.database import AsyncSessionLocal
 from app.logger import logger
 from app.services.agent_tools import AgentTools
-from app.services.gemini_client import generate_content_with_retry
+from app.services.gemini_client import generate_content_with_retry, stream_content_with_retry, get_client
+from app.services.response_cache import get_tool_result_cache
+from app.services.agent_context import compact_history, fit_tool_payload, record_usage
+from app.services.image_preprocessing import prepare_images
+from app.repositories.user_stats_repository import UserStatsRepository
 from app.llm.tools.tool_registry import TOOL_DEFINITIONS
 from app.schemas.agent_data import SYSTEM_PROMPT, ChatMessage, AgentResponse
 from app.schemas.tool_data import ToolResult
 
+# Tools of one round run side by side, each on its own pooled connection
+MAX_PARALLEL_TOOLS = 4
+# Most messages loaded when a chat's history is rehydrated
+HISTORY_LIMIT = 20
+
 
 class DreamAgent:
     def __init__(self, user_id: int, db: AsyncSession):
         self.user_id = user_id
         self.db = db
         self.model = settings.agent_model
-        self.client = genai.Client(api_key=settings.gemini_api_key)
+        self.client = get_client()
         self.tools = AgentTools(db, user_id)
         self.conversation_history: list[ChatMessage] = []
+        # Rolling summary of turns compacted out of the history
+        self.summary = ""
+        # Read once per message; tool results are cached against it
+        self._data_version = 0
 
     def _build_tools_config(self) -> list[types.Tool]:
         function_declarations = [
@@ -33,24 +48,34 @@ class DreamAgent:
 
         return [types.Tool(function_declarations=function_declarations)]
 
-    def _build_contents(self, user_message: str, images: list[dict] | None = None) -> list[types.Content]:
-        contents = [
+    async def _build_contents(self, user_message: str, images: list[dict] | None = None) -> list[types.Content]:
+        contents = []
+        if self.summary:
+            # Sent as a turn rather than in the system prompt, so the prompt + tools prefix stays cacheable
+            contents.append(types.Content(
+                role="user",
+                parts=[types.Part(text=f"[Summary of our earlier conversation]\n{self.summary}")],
+            ))
+            contents.append(types.Content(role="model", parts=[types.Part(text="Noted.")]))
+
+        contents.extend(
             types.Content(
                 role="user" if msg.role == "user" else "model",
                 parts=[types.Part(text=msg.content)],
             )
             for msg in self.conversation_history
-        ]
+        )
 
         parts: list[types.Part] = [types.Part(text=user_message)]
 
         if images:
-            import base64
-            for img in images:
-                image_bytes = base64.b64decode(img["base64"])
+            prepared = await prepare_images([
+                (base64.b64decode(img["base64"]), img["mime_type"]) for img in images
+            ])
+            for image_bytes, mime_type in prepared:
                 parts.append(types.Part.from_bytes(
                     data=image_bytes,
-                    mime_type=img["mime_type"],
+                    mime_type=mime_type,
                 ))
 
         contents.append(types.Content(role="user", parts=parts))
@@ -67,27 +92,29 @@ class DreamAgent:
             ),
         )
 
-    async def _execute_tool(self, tool_name: str, args: dict) -> ToolResult:
+    async def _execute_tool(self, tool_name: str, args: dict, tools: AgentTools | None = None) -> ToolResult:
+        tools = tools or self.tools
         tool_map = {
-            "search_symbols": self.tools.search_symbols,
-            "get_symbol_details": self.tools.get_symbol_details,
-            "get_symbol_dreams": self.tools.get_symbol_dreams,
-            "get_symbol_patterns": self.tools.get_symbol_patterns,
-            "search_characters": self.tools.search_characters,
-            "get_character_details": self.tools.get_character_details,
-            "get_archetype_analysis": self.tools.get_archetype_analysis,
-            "get_emotion_overview": self.tools.get_emotion_overview,
-            "get_emotion_dreams": self.tools.get_emotion_dreams,
-            "get_emotion_correlations": self.tools.get_emotion_correlations,
-            "get_themes_overview": self.tools.get_themes_overview,
-            "get_theme_dreams": self.tools.get_theme_dreams,
-            "get_theme_analysis": self.tools.get_theme_analysis,
-            "search_dreams": self.tools.search_dreams,
-            "get_recent_dreams": self.tools.get_recent_dreams,
-            "get_dream_details": self.tools.get_dream_details,
-            "get_recurring_dreams": self.tools.get_recurring_dreams,
-            "semantic_search": self.tools.semantic_search,
-            "get_journal_summary": self.tools.get_journal_summary,
+            "search_symbols": tools.search_symbols,
+            "get_symbol_details": tools.get_symbol_details,
+            "get_symbol_dreams": tools.get_symbol_dreams,
+            "get_symbol_patterns": tools.get_symbol_patterns,
+            "search_characters": tools.search_characters,
+            "get_character_details": tools.get_character_details,
+            "get_archetype_analysis": tools.get_archetype_analysis,
+            "get_emotion_overview": tools.get_emotion_overview,
+            "get_emotion_dreams": tools.get_emotion_dreams,
+            "get_emotion_correlations": tools.get_emotion_correlations,
+            "get_themes_overview": tools.get_themes_overview,
+            "get_theme_dreams": tools.get_theme_dreams,
+            "get_theme_analysis": tools.get_theme_analysis,
+            "search_dreams": tools.search_dreams,
+            "get_recent_dreams": tools.get_recent_dreams,
+            "get_dream_details": tools.get_dream_details,
+            "get_recurring_dreams": tools.get_recurring_dreams,
+            "find_similar_dreams": tools.find_similar_dreams,
+            "semantic_search": tools.semantic_search,
+            "get_journal_summary": tools.get_journal_summary,
         }
 
         if tool_name not in tool_map:
@@ -98,7 +125,9 @@ class DreamAgent:
             )
 
         try:
-            return await tool_map[tool_name](**args)
+            return await get_tool_result_cache().get_or_compute(
+                self.user_id, tool_name, args, self._data_version, lambda: tool_map[tool_name](**args),
+            )
         except Exception as e:
             logger.error(f"Tool execution error ({tool_name}): {e}", exc_info=True)
             return ToolResult(
@@ -107,40 +136,124 @@ class DreamAgent:
                 tool_name=tool_name,
             )
 
-    async def chat(self, user_message: str, images: list[dict] | None = None) -> AgentResponse:
+    async def _run_tool(self, tool_name: str, args: dict) -> ToolResult:
+        logger.info(f"Executing tool: {tool_name} with args: {args}")
+        timeout = settings.agent_tool_timeout_seconds
+
+        try:
+            # Each call gets its own session: an AsyncSession can't run concurrent queries, and
+            # a timeout cancels the query mid-flight, which would leave the request's session unusable
+            async with AsyncSessionLocal() as db:
+                tools = AgentTools(db, self.user_id)
+                tools.data_version = self._data_version
+                return await asyncio.wait_for(self._execute_tool(tool_name, args, tools), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool {tool_name} timed out after {timeout}s")
+            return ToolResult(
+                success=False,
+                error=f"Tool timed out after {timeout} seconds",
+                tool_name=tool_name,
+            )
+
+    def _start_round(self, calls: list[tuple[str, dict]]) -> list[asyncio.Task]:
+        """Start one round of function calls; several calls run concurrently, each on its own session."""
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_TOOLS)
+
+        async def run(tool_name: str, args: dict) -> ToolResult:
+            async with semaphore:
+                return await self._run_tool(tool_name, args)
+
+        return [asyncio.create_task(run(tool_name, args)) for tool_name, args in calls]
+
+    async def _generate(
+            self,
+            contents: list[types.Content],
+            config: types.GenerateContentConfig,
+            stream: bool,
+    ) -> AsyncGenerator[types.GenerateContentResponse, None]:
+        if not stream:
+            yield await generate_content_with_retry(self.client, self.model, contents, config)
+            return
+
+        async for chunk in stream_content_with_retry(self.client, self.model, contents, config):
+            yield chunk
+
+    async def _run_turn(
+            self,
+            user_message: str,
+            images: list[dict] | None,
+            stream: bool,
+    ) -> AsyncGenerator[dict, None]:
+        """Answer one message, yielding content and tool events and finally the whole response."""
         logger.info(f"Agent chat: user_id={self.user_id}, message_length={len(user_message)}, images={len(images) if images else 0}")
+        self.conversation_history, self.summary = await compact_history(self.conversation_history, self.summary)
+
         tools_config = self._build_tools_config()
-        contents = self._build_contents(user_message, images=images)
+        contents = await self._build_contents(user_message, images=images)
         tool_calls_made = []
         sources = []
+        final_response = ""
+        input_tokens = 0
+        cached_tokens = 0
 
         try:
-            config = self._build_config(tools_config, thinking_level="high")
-            response = generate_content_with_retry(
-                self.client, self.model, contents, config,
-            )
+            self._data_version = await UserStatsRepository(self.db).get_version(self.user_id)
+            self.tools.data_version = self._data_version
 
             max_tool_rounds = 5
-            for round_num in range(max_tool_rounds):
+            for round_num in range(max_tool_rounds + 1):
+                config = self._build_config(tools_config, thinking_level="high")
+                model_parts = []
                 function_calls = []
-
-                for candidate in response.candidates:
-                    for part in candidate.content.parts:
-                        if hasattr(part, 'function_call') and part.function_call:
-                            function_calls.append(part.function_call)
-
-                if not function_calls:
+                usage = None
+
+                async for chunk in self._generate(contents, config, stream):
+                    usage = chunk.usage_metadata or usage
+                    for candidate in chunk.candidates or []:
+                        if not candidate.content or not candidate.content.parts:
+                            continue
+                        for part in candidate.content.parts:
+                            model_parts.append(part)
+                            if part.function_call:
+                                function_calls.append(part.function_call)
+                            elif part.text and not part.thought:
+                                final_response += part.text
+                                yield {"type": "content", "content": part.text}
+
+                if usage:
+                    input_tokens += usage.prompt_token_count or 0
+                    cached_tokens += usage.cached_content_token_count or 0
+
+                if not function_calls or round_num == max_tool_rounds:
                     break
 
-                contents.append(response.candidates[0].content)
+                # Keep every part, thought signatures included, so the model can pick up its calls
+                contents.append(types.Content(role="model", parts=model_parts))
+
+                calls = [(fc.name, dict(fc.args) if fc.args else {}) for fc in function_calls]
+                tasks = self._start_round(calls)
+                try:
+                    for tool_name, args in calls:
+                        yield {"type": "tool_start", "tool": tool_name, "args": args}
+
+                    call_index = {task: i for i, task in enumerate(tasks)}
+                    pending = set(tasks)
+                    while pending:
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        for task in done:
+                            yield {
+                                "type": "tool_end",
+                                "tool": calls[call_index[task]][0],
+                                "success": task.result().success,
+                            }
+                finally:
+                    # No-op once finished; stops the round if the client disconnects
+                    for task in tasks:
+                        task.cancel()
 
                 function_responses = []
-                for fc in function_calls:
-                    tool_name = fc.name
-                    args = dict(fc.args) if fc.args else {}
-                    logger.info(f"Executing tool: {tool_name} with args: {args}")
-
-                    result = await self._execute_tool(tool_name, args)
+                for (tool_name, args), task in zip(calls, tasks):
+                    result = task.result()
                     tool_calls_made.append({
                         "tool": tool_name,
                         "args": args,
@@ -154,58 +267,60 @@ class DreamAgent:
                     function_responses.append(types.Part(
                         function_response=types.FunctionResponse(
                             name=tool_name,
-                            response=result.to_dict(),
+                            response=fit_tool_payload(result.to_dict(), settings.agent_tool_result_token_budget),
                         )
                     ))
 
                 contents.append(types.Content(role="user", parts=function_responses))
 
-                config = self._build_config(tools_config, thinking_level="high")
-                response = generate_content_with_retry(
-                    self.client, self.model, contents, config,
-                )
-
-            final_response = ""
-            for candidate in response.candidates:
-                for part in candidate.content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        final_response += part.text
-
             history_content = f"[Image attached] {user_message}" if images else user_message
             self.conversation_history.append(ChatMessage(role="user", content=history_content))
             self.conversation_history.append(ChatMessage(role="assistant", content=final_response))
-            if len(self.conversation_history) > 20:
-                self.conversation_history = self.conversation_history[-20:]
 
-            logger.info(f"Agent response: tools_used={len(tool_calls_made)}, response_length={len(final_response)}")
+            record_usage(input_tokens, cached_tokens)
+            logger.info(
+                f"Agent response: tools_used={len(tool_calls_made)}, response_length={len(final_response)}, "
+                f"input_tokens={input_tokens}, cached_tokens={cached_tokens}"
+            )
 
-            return AgentResponse(
+            response = AgentResponse(
                 message=final_response,
                 tool_calls=tool_calls_made,
                 sources=sources,
+                input_tokens=input_tokens,
             )
 
         except Exception as e:
             logger.error(f"Agent error: {e}", exc_info=True)
-            return AgentResponse(
+            response = AgentResponse(
                 message="I apologize, but I encountered an issue processing your request. Could you please try rephrasing your question?",
                 tool_calls=tool_calls_made,
                 sources=[],
+                input_tokens=input_tokens,
             )
+            yield {"type": "content", "content": response.message}
 
-    async def chat_stream(self, user_message: str) -> AsyncGenerator[str, None]:
-        response = await self.chat(user_message)
-        words = response.message.split()
-        chunk_size = 3
+        yield {"type": "response", "response": response}
 
-        for i in range(0, len(words), chunk_size):
-            chunk = " ".join(words[i:i + chunk_size])
-            if i > 0:
-                chunk = " " + chunk
-            yield chunk
+    async def chat(self, user_message: str, images: list[dict] | None = None) -> AgentResponse:
+        response = None
+        async for event in self._run_turn(user_message, images, stream=False):
+            if event["type"] == "response":
+                response = event["response"]
+
+        return response
+
+    async def chat_stream(self, user_message: str, images: list[dict] | None = None) -> AsyncGenerator[dict, None]:
+        """Stream model tokens and tool start/finish events as they happen.
+
+        The last event has type "response" and carries the complete AgentResponse.
+        """
+        async for event in self._run_turn(user_message, images, stream=True):
+            yield event
 
     def clear_history(self):
         self.conversation_history = []
+        self.summary = ""
 
 
 def get_dream_agent(user_id: int, db: AsyncSession) -> DreamAgent:
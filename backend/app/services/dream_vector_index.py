@@ -0,0 +1,312 @@
+"""Per-user dream embedding index for nearest-neighbour lookups without a GraphRAG query."""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from google.genai import types
+
+from app.config import settings
+from app.logger import logger
+from app.repositories.agent_repository import AgentRepository
+from app.services.embedding_cache import get_embedding_cache
+from app.services.gemini_client import embed_content_with_retry, get_client
+
+EMBEDDING_DIM = 768
+# Gemini accepts at most 100 texts per embedding request
+EMBED_BATCH_SIZE = 100
+
+_vector_index_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+async def embed_texts(texts: list[str], task_type: str) -> np.ndarray:
+    """Embed texts with the graph's embedding model, L2-normalised for cosine scoring."""
+    client = get_client()
+
+    async def compute(missing: list[str]) -> np.ndarray:
+        vectors = []
+        for i in range(0, len(missing), EMBED_BATCH_SIZE):
+            response = await embed_content_with_retry(
+                client,
+                settings.text_embedding_model,
+                missing[i:i + EMBED_BATCH_SIZE],
+                types.EmbedContentConfig(task_type=task_type, output_dimensionality=EMBEDDING_DIM),
+            )
+            vectors.extend(embedding.values for embedding in response.embeddings)
+        return np.asarray(vectors, dtype=np.float32).reshape(-1, EMBEDDING_DIM)
+
+    # The task type changes the vector, so it is part of the cache key
+    matrix = await get_embedding_cache().embed(
+        texts, f"{settings.text_embedding_model}:{task_type}", EMBEDDING_DIM, compute
+    )
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class DreamVectorIndex:
+    """One normalised embedding per dream, kept as a memory-mapped matrix on disk.
+
+    Rows are keyed by dream id and remember the hash of the text they were embedded
+    from, so unchanged dreams are never re-embedded. The files live outside the graph
+    directory and survive a graph rebuild. Another process (the worker) may rewrite
+    them; the matrix is re-opened whenever the files change.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    META_FILE = "meta.json"
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.directory = Path(settings.graph_storage_path) / "dream_vectors" / str(user_id)
+        self._lock = asyncio.Lock()
+        self._ids: list[int] = []
+        self._hashes: list[str] = []
+        self._rows: dict[int, int] = {}
+        self._vectors = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._loaded_version: Optional[tuple] = None
+        self.last_used = time.monotonic()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def close(self) -> None:
+        """Drop the loaded matrix, which unmaps the file; the next access loads it again."""
+        self._ids, self._hashes, self._rows = [], [], {}
+        self._vectors = np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        self._loaded_version = None
+
+    def _version(self) -> Optional[tuple]:
+        meta_path = self.directory / self.META_FILE
+        if not meta_path.exists():
+            return None
+        stat = meta_path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> None:
+        version = self._version()
+        if version == self._loaded_version:
+            return
+
+        if version is None:
+            ids, hashes, vectors = [], [], np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+        else:
+            with open(self.directory / self.META_FILE) as f:
+                meta = json.load(f)
+            ids, hashes = meta["ids"], meta["hashes"]
+            vectors = np.load(self.directory / self.VECTORS_FILE, mmap_mode="r")
+            if vectors.shape[0] != len(ids):
+                # Caught between the two renames of a concurrent save; retry on next access
+                return
+
+        self._ids, self._hashes, self._vectors = ids, hashes, vectors
+        self._rows = {dream_id: row for row, dream_id in enumerate(ids)}
+        self._loaded_version = version
+
+    def _save(self, ids: list[int], hashes: list[str], vectors: np.ndarray) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        vectors_tmp = self.directory / f"{self.VECTORS_FILE}.tmp"
+        meta_tmp = self.directory / f"{self.META_FILE}.tmp"
+        with open(vectors_tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        with open(meta_tmp, "w") as f:
+            json.dump({"ids": ids, "hashes": hashes}, f)
+
+        # The metadata is the commit point: readers reload only once it changes
+        vectors_tmp.replace(self.directory / self.VECTORS_FILE)
+        meta_tmp.replace(self.directory / self.META_FILE)
+        self._loaded_version = None
+
+    def __len__(self) -> int:
+        self._load()
+        return len(self._ids)
+
+    async def upsert(self, dreams: list[dict]) -> int:
+        """Embed dreams ({"id", "content", "hash"}) whose text changed; returns how many were embedded."""
+        async with self._lock:
+            self._load()
+            stale = [
+                dream for dream in dreams
+                if dream["id"] not in self._rows or self._hashes[self._rows[dream["id"]]] != dream["hash"]
+            ]
+            if not stale:
+                return 0
+
+            embedded = await embed_texts([dream["content"] for dream in stale], "RETRIEVAL_DOCUMENT")
+
+            ids, hashes = list(self._ids), list(self._hashes)
+            vectors = np.array(self._vectors, dtype=np.float32)
+            appended = []
+            for dream, vector in zip(stale, embedded):
+                row = self._rows.get(dream["id"])
+                if row is None:
+                    ids.append(dream["id"])
+                    hashes.append(dream["hash"])
+                    appended.append(vector)
+                else:
+                    hashes[row] = dream["hash"]
+                    vectors[row] = vector
+            if appended:
+                vectors = np.vstack([vectors, np.asarray(appended, dtype=np.float32)])
+
+            await asyncio.to_thread(self._save, ids, hashes, vectors)
+
+        logger.info(f"Embedded {len(stale)} dreams into the vector index of user {self.user_id}")
+        return len(stale)
+
+    async def remove(self, dream_ids: list[int]) -> int:
+        async with self._lock:
+            self._load()
+            drop = {dream_id for dream_id in dream_ids if dream_id in self._rows}
+            if not drop:
+                return 0
+
+            keep = [row for row, dream_id in enumerate(self._ids) if dream_id not in drop]
+            ids = [self._ids[row] for row in keep]
+            hashes = [self._hashes[row] for row in keep]
+            vectors = np.asarray(self._vectors[keep], dtype=np.float32)
+
+            await asyncio.to_thread(self._save, ids, hashes, vectors)
+
+        return len(drop)
+
+    def get_ids(self) -> set[int]:
+        self._load()
+        return set(self._ids)
+
+    def get_vector(self, dream_id: int) -> Optional[np.ndarray]:
+        self._load()
+        row = self._rows.get(dream_id)
+        return None if row is None else np.asarray(self._vectors[row])
+
+    def search(self, query: np.ndarray, limit: int, exclude: Optional[set[int]] = None) -> list[tuple[int, float]]:
+        """Top `limit` dreams by cosine similarity to a normalised query vector."""
+        self._load()
+        if not self._ids:
+            return []
+
+        scores = self._vectors @ query.astype(np.float32)
+        excluded_rows = [self._rows[dream_id] for dream_id in exclude or () if dream_id in self._rows]
+        scores[excluded_rows] = -np.inf
+
+        k = min(limit, len(self._ids) - len(excluded_rows))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(self._ids[row], float(scores[row])) for row in top]
+
+    async def search_text(self, text: str, limit: int) -> list[tuple[int, float]]:
+        if not len(self):
+            return []
+
+        query = await embed_texts([text], "RETRIEVAL_QUERY")
+        return self.search(query[0], limit)
+
+
+class DreamVectorIndexCache:
+    """Process-wide LRU of per-user vector indexes, each holding its mapped matrix and row maps.
+
+    Bounded by entry count; indexes idle for longer than `idle_seconds` are dropped
+    on the next access. An index with a write in progress is kept, so a second
+    instance never rewrites the same user's files alongside it.
+    """
+
+    def __init__(self, max_entries: int, idle_seconds: float):
+        self.max_entries = max_entries
+        self.idle_seconds = idle_seconds
+        self._entries: OrderedDict[int, DreamVectorIndex] = OrderedDict()
+
+    def get(self, user_id: int) -> DreamVectorIndex:
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        index = self._entries.pop(user_id, None)
+        if index is None:
+            _vector_index_cache_stats["misses"] += 1
+            index = DreamVectorIndex(user_id)
+        else:
+            _vector_index_cache_stats["hits"] += 1
+
+        index.last_used = now
+        self._entries[user_id] = index
+        self._evict_over_budget()
+
+        return index
+
+    def _evict_idle(self, now: float) -> None:
+        for user_id, index in list(self._entries.items()):
+            if now - index.last_used > self.idle_seconds:
+                self._evict(user_id)
+
+    def _evict_over_budget(self) -> None:
+        # Never evict the entry that was just requested (last in order)
+        for user_id in list(self._entries)[:-1]:
+            if len(self._entries) <= self.max_entries:
+                break
+            self._evict(user_id)
+
+    def _evict(self, user_id: int) -> None:
+        index = self._entries[user_id]
+        if index.busy:
+            return
+
+        del self._entries[user_id]
+        index.close()
+        _vector_index_cache_stats["evictions"] += 1
+        logger.debug(f"Evicted vector index for user {user_id}")
+
+    def snapshot(self) -> dict:
+        return {**_vector_index_cache_stats, "entries": len(self._entries)}
+
+
+_vector_index_cache: Optional[DreamVectorIndexCache] = None
+
+
+def _get_vector_index_cache() -> DreamVectorIndexCache:
+    global _vector_index_cache
+    if _vector_index_cache is None:
+        _vector_index_cache = DreamVectorIndexCache(
+            max_entries=settings.vector_index_cache_max_users,
+            idle_seconds=settings.vector_index_cache_idle_seconds,
+        )
+
+    return _vector_index_cache
+
+
+def get_vector_index_cache_metrics() -> dict:
+    return _get_vector_index_cache().snapshot()
+
+
+def get_dream_vector_index(user_id: int) -> DreamVectorIndex:
+    return _get_vector_index_cache().get(user_id)
+
+
+async def find_similar_dreams(
+    repo: AgentRepository,
+    user_id: int,
+    dream_id: Optional[int] = None,
+    query: Optional[str] = None,
+    limit: int = 5,
+) -> list[dict]:
+    """Dreams nearest to an indexed dream or to free text, best match first."""
+    index = get_dream_vector_index(user_id)
+    if dream_id is not None:
+        vector = index.get_vector(dream_id)
+        if vector is None:
+            return []
+        matches = index.search(vector, limit, exclude={dream_id})
+    elif query:
+        matches = await index.search_text(query, limit)
+    else:
+        raise ValueError("Either dream_id or query is required")
+
+    scores = dict(matches)
+    dreams = await repo.get_dreams_by_ids(user_id, [match_id for match_id, _ in matches])
+
+    return [{**dream, "similarity": round(scores[dream["dream_id"]], 4)} for dream in dreams]
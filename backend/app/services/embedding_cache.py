@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+from fast_graphrag._llm import OpenAIEmbeddingService
+
+from app.config import settings
+from app.logger import logger
+
+# Rows dropped past the limit at once, so eviction doesn't run on every insert
+EVICTION_SLACK = 0.1
+
+
+class EmbeddingCache:
+    """SQLite-backed cache of embedding vectors shared by every embedding call.
+
+    Keyed by sha256(model, dimension, text) and stored as float32 blobs. Least
+    recently used rows are evicted once the cache grows past `max_entries`. The
+    database runs in WAL mode so the API and a standalone worker can share it.
+    """
+
+    def __init__(self, path: Path, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, dim INTEGER NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+            self._conn = conn
+
+        return self._conn
+
+    @staticmethod
+    def key(model: str, dim: int, text: str) -> str:
+        return hashlib.sha256(f"{model}\n{dim}\n{text}".encode("utf-8")).hexdigest()
+
+    def _get_many(self, keys: list[str]) -> dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update((key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows)
+
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                conn.commit()
+
+        return found
+
+    def _put_many(self, vectors: dict[str, np.ndarray]) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (key, vector.shape[0], np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in vectors.items()
+                ],
+            )
+
+            count = conn.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries + int(self.max_entries * EVICTION_SLACK)
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+                logger.debug(f"Evicted {excess} embeddings from cache")
+            conn.commit()
+
+    async def embed(
+        self,
+        texts: list[str],
+        model: str,
+        dim: int,
+        compute: Callable[[list[str]], Awaitable[np.ndarray]],
+    ) -> np.ndarray:
+        """Embeddings for `texts` in order; only texts missing from the cache reach `compute`."""
+        keys = [self.key(model, dim, text) for text in texts]
+        try:
+            cached = await asyncio.to_thread(self._get_many, list(set(keys)))
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache lookup failed: {e}")
+            cached = {}
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        missed = sum(1 for key in keys if key in missing)
+        self.hits += len(keys) - missed
+        self.misses += missed
+
+        if missing:
+            computed = await compute(list(missing.values()))
+            fresh = dict(zip(missing.keys(), np.asarray(computed, dtype=np.float32)))
+            cached.update(fresh)
+            try:
+                await asyncio.to_thread(self._put_many, fresh)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+        if not keys:
+            return np.empty((0, dim), dtype=np.float32)
+
+        return np.stack([cached[key] for key in keys])
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _embedding_cache
+    if _embedding_cache is None:
+        _embedding_cache = EmbeddingCache(
+            Path(settings.graph_storage_path) / "embedding_cache.sqlite3",
+            max_entries=settings.embedding_cache_max_entries,
+        )
+
+    return _embedding_cache
+
+
+def get_embedding_cache_metrics() -> dict:
+    return get_embedding_cache().snapshot()
+
+
+class CachedEmbeddingService(OpenAIEmbeddingService):
+    """Serves repeated entity descriptions and queries from the embedding cache."""
+
+    async def encode(self, texts: list[str], model: Optional[str] = None) -> np.ndarray:
+        model = model or self.model
+        return await get_embedding_cache().embed(
+            texts,
+            model=model,
+            dim=self.embedding_dim,
+            compute=lambda missing: super(CachedEmbeddingService, self).encode(missing, model),
+        )
@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import os
+import pickle
+import threading
+from pathlib import Path
+from typing import Optional
+
+from fast_graphrag._services import DefaultInformationExtractionService
+from fast_graphrag._types import TGraph
+
+from app.config import settings
+from app.logger import logger
+
+# Bytes dropped past the limit at once, so pruning doesn't rescan on every write
+EVICTION_SLACK = 0.1
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    """On-disk cache of fast-graphrag entity/relationship extractions.
+
+    Keyed by the extraction model and the hash of the extracted text, and kept
+    outside the per-user graph directories so it survives `clear_graph()`.
+    Hits refresh an entry's mtime, and the least recently used entries are
+    pruned once the directory grows past `max_bytes`. The methods do blocking file
+    I/O and are called through `asyncio.to_thread`.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Estimated until the first prune rescans the directory; other processes write here too
+        self._total_bytes: Optional[int] = None
+        # Writes from concurrent extraction threads update the size and prune one at a time
+        self._write_lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.pkl"
+
+    def key(self, content: str) -> str:
+        return content_hash(f"{settings.llm_model}\n{content}")
+
+    def get(self, key: str) -> Optional[TGraph]:
+        path = self._path(key)
+        if not path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                graph = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Dropping unreadable extraction cache entry {key}: {e}")
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return graph
+
+    def set(self, key: str, graph: TGraph) -> None:
+        with self._write_lock:
+            total_bytes = self._size()
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                pickle.dump(graph, f)
+            tmp_path.replace(path)
+
+            self._total_bytes = total_bytes + path.stat().st_size
+            if self._total_bytes > self.max_bytes:
+                self._prune()
+
+    def _size(self) -> int:
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+
+        return self._total_bytes
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for entry_path in self.directory.glob("*/*.pkl"):
+            try:
+                stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+
+        return entries
+
+    def _prune(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * (1 - EVICTION_SLACK))
+
+        removed = 0
+        for _, size, entry_path in entries:
+            if total <= target:
+                break
+            entry_path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        self.evictions += removed
+        self._total_bytes = total
+        logger.info(f"Pruned {removed} extraction cache entries, {total} bytes left")
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            # None until the first write has scanned the directory; /metrics never scans it
+            "bytes": self._total_bytes,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = ExtractionCache(
+            Path(settings.graph_storage_path) / "extraction_cache",
+            max_bytes=settings.extraction_cache_max_mb * 1024 * 1024,
+        )
+
+    return _extraction_cache
+
+
+def get_extraction_cache_metrics() -> dict:
+    return get_extraction_cache().snapshot()
+
+
+class CachedInformationExtractionService(DefaultInformationExtractionService):
+    """Replays cached chunk extractions instead of sending the chunk to the LLM again."""
+
+    async def _extract_from_chunk(self, llm, chunk, prompt_kwargs, entity_types) -> TGraph:
+        cache = get_extraction_cache()
+        key = cache.key(chunk.content)
+
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            return cached
+
+        graph = await super()._extract_from_chunk(llm, chunk, prompt_kwargs, entity_types)
+        await asyncio.to_thread(cache.set, key, graph)
+
+        return graph
@@ -2,15 +2,13 @@ import json
 from typing import Optional
 from datetime import date
 
-from google import genai
 from google.genai import types
 
 from app.logger import logger
 from app.config import settings
-from app.services.gemini_client import generate_content_with_retry
-from app.repositories.symbol_repository import SymbolRepository
-from app.repositories.character_repository import CharacterRepository
+from app.services.gemini_client import generate_content_with_retry, get_client
 from app.repositories.dream_repository import DreamRepository
+from app.repositories.extraction_repository import ExtractionRepository
 from app.schemas.extraction_data import (
     ExtractedCharacter,
     ExtractedSymbol,
@@ -23,10 +21,7 @@ from app.schemas.extraction_data import (
 
 class GeminiExtractionService:
     def __init__(self):
-        api_key = settings.gemini_api_key
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY is required")
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_client()
         self.model_name = settings.llm_model
 
     async def extract_from_dream(
@@ -37,7 +32,7 @@ class GeminiExtractionService:
         prompt = build_extraction_prompt(narrative, setting)
 
         try:
-            response = generate_content_with_retry(
+            response = await generate_content_with_retry(
                 self.client,
                 self.model_name,
                 prompt,
@@ -89,83 +84,19 @@ class GeminiExtractionService:
             user_id: int,
             dream_date: date,
             extraction: DreamExtraction,
-            symbol_repo: SymbolRepository,
-            character_repo: CharacterRepository,
+            extraction_repo: ExtractionRepository,
             dream_repo: DreamRepository,
     ) -> None:
-        for symbol in extraction.symbols:
-            try:
-                sym, _ = await symbol_repo.get_or_create_symbol(
-                    user_id=user_id,
-                    name=symbol.name,
-                    category=symbol.category,
-                )
-
-                if not await symbol_repo.symbol_exists_in_dream(dream_id, sym.id):
-                    await symbol_repo.add_symbol_to_dream(
-                        dream_id=dream_id,
-                        symbol_id=sym.id,
-                        dream_date=dream_date,
-                        context_note=symbol.context,
-                        is_ai_extracted=True,
-                    )
-
-                    for assoc in symbol.personal_associations:
-                        await symbol_repo.add_association(
-                            symbol_id=sym.id,
-                            association_text=assoc,
-                            source="ai_suggested",
-                        )
-            except Exception as e:
-                logger.error(f"Error saving symbol {symbol.name}: {e}")
-
-        for character in extraction.characters:
-            try:
-                char, _ = await character_repo.get_or_create_character(
-                    user_id=user_id,
-                    name=character.name,
-                    character_type=character.character_type,
-                    real_world_relation=character.real_world_relation,
-                )
-
-                if not await character_repo.character_exists_in_dream(dream_id, char.id):
-                    await character_repo.add_character_to_dream(
-                        dream_id=dream_id,
-                        character_id=char.id,
-                        dream_date=dream_date,
-                        role_in_dream=character.role_in_dream,
-                        archetype=character.archetype,
-                        traits=character.traits,
-                        context_note=character.context,
-                        is_ai_extracted=True,
-                    )
-            except Exception as e:
-                logger.error(f"Error saving character {character.name}: {e}")
-
-        for theme in extraction.themes:
-            try:
-                await dream_repo.add_dream_theme(
-                    dream_id=dream_id,
-                    theme=theme.theme,
-                    is_ai_extracted=True,
-                )
-            except Exception as e:
-                logger.error(f"Error saving theme {theme.theme}: {e}")
-
-        existing_emotions = await dream_repo.get_dream_emotions(dream_id)
-        existing_emotion_names = {e.emotion.lower() for e in existing_emotions}
-
-        for emotion in extraction.emotions:
-            if emotion.emotion.lower() not in existing_emotion_names:
-                try:
-                    await dream_repo.add_dream_emotion(
-                        dream_id=dream_id,
-                        emotion=emotion.emotion,
-                        emotion_type=emotion.emotion_type,
-                        intensity=emotion.intensity,
-                    )
-                except Exception as e:
-                    logger.error(f"Error saving emotion {emotion.emotion}: {e}")
+        counts = await extraction_repo.save_dream_entities(
+            dream_id=dream_id,
+            user_id=user_id,
+            dream_date=dream_date,
+            symbols=[s.model_dump() for s in extraction.symbols],
+            characters=[c.model_dump() for c in extraction.characters],
+            themes=[t.model_dump() for t in extraction.themes],
+            emotions=[e.model_dump() for e in extraction.emotions],
+        )
+        logger.info(f"Saved extraction for dream {dream_id}: {counts}")
 
         await dream_repo.mark_ai_extraction_done(dream_id)
 
@@ -176,8 +107,7 @@ class GeminiExtractionService:
             narrative: str,
             dream_date: date,
             setting: Optional[str],
-            symbol_repo: SymbolRepository,
-            character_repo: CharacterRepository,
+            extraction_repo: ExtractionRepository,
             dream_repo: DreamRepository,
     ) -> DreamExtraction:
         extraction = await self.extract_from_dream(narrative, setting)
@@ -186,8 +116,7 @@ class GeminiExtractionService:
             user_id=user_id,
             dream_date=dream_date,
             extraction=extraction,
-            symbol_repo=symbol_repo,
-            character_repo=character_repo,
+            extraction_repo=extraction_repo,
             dream_repo=dream_repo,
         )
         return extraction
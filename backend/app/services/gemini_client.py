@@ -1,9 +1,11 @@
-"""Shared Gemini API client with retry logic for transient errors (429, 503)."""
+"""Shared async Gemini API client with retry logic for transient errors (429, 503)."""
 
 import asyncio
 import random
-from functools import wraps
-from typing import TypeVar, Callable
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, TypeVar, Callable, Awaitable, Optional
 
 from google import genai
 from google.genai import types
@@ -19,6 +21,9 @@ INITIAL_BACKOFF = 1.0
 MAX_BACKOFF = 30.0
 BACKOFF_MULTIPLIER = 2.0
 
+# Number of recent call latencies kept for percentile reporting
+LATENCY_WINDOW = 1000
+
 RETRYABLE_KEYWORDS = [
     "overloaded",
     "503",
@@ -32,57 +37,87 @@ RETRYABLE_KEYWORDS = [
 ]
 
 
+@dataclass
+class GeminiMetrics:
+    calls: int = 0
+    failures: int = 0
+    retries: int = 0
+    latencies_ms: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record(self, latency_ms: float, retries: int, failed: bool) -> None:
+        self.calls += 1
+        self.retries += retries
+        if failed:
+            self.failures += 1
+        self.latencies_ms.append(latency_ms)
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self.latencies_ms)
+
+        def percentile(p: float) -> Optional[int]:
+            if not latencies:
+                return None
+            return int(latencies[min(len(latencies) - 1, int(len(latencies) * p))])
+
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "retries": self.retries,
+            "latency_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": int(latencies[-1]) if latencies else None,
+            },
+        }
+
+
+_client: Optional[genai.Client] = None
+_metrics = GeminiMetrics()
+
+
 def _is_retryable(error: Exception) -> bool:
     error_str = str(error).lower()
     return any(keyword in error_str for keyword in RETRYABLE_KEYWORDS)
 
 
-def _get_client() -> genai.Client:
-    return genai.Client(api_key=settings.gemini_api_key)
-
-
-def with_retry(func: Callable[..., T]) -> Callable[..., T]:
-    """Decorator that adds exponential backoff retry for transient Gemini API errors."""
-
-    @wraps(func)
-    def wrapper(*args, **kwargs) -> T:
-        last_error = None
-        for attempt in range(MAX_RETRIES + 1):
-            try:
-                return func(*args, **kwargs)
-            except Exception as e:
-                last_error = e
-                if not _is_retryable(e) or attempt == MAX_RETRIES:
-                    raise
-                wait = min(
-                    INITIAL_BACKOFF * (BACKOFF_MULTIPLIER ** attempt) + random.uniform(0, 1),
-                    MAX_BACKOFF,
-                )
-                logger.warning(
-                    f"Gemini API error (attempt {attempt + 1}/{MAX_RETRIES + 1}): {e}. "
-                    f"Retrying in {wait:.1f}s..."
-                )
-                import time
-                time.sleep(wait)
-        raise last_error  # type: ignore
-
-    return wrapper
-
-
-async def async_with_retry(func: Callable, *args, **kwargs) -> T:
-    """Async retry wrapper for Gemini API calls."""
+def _backoff(attempt: int) -> float:
+    return min(
+        INITIAL_BACKOFF * (BACKOFF_MULTIPLIER ** attempt) + random.uniform(0, 1),
+        MAX_BACKOFF,
+    )
+
+
+def get_client() -> genai.Client:
+    """Process-wide Gemini client; all services share its connection pool."""
+    global _client
+    if _client is None:
+        if not settings.gemini_api_key:
+            raise ValueError("GEMINI_API_KEY is required")
+        _client = genai.Client(api_key=settings.gemini_api_key)
+
+    return _client
+
+
+def get_gemini_metrics() -> dict:
+    return _metrics.snapshot()
+
+
+async def async_with_retry(func: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+    """Await a Gemini API coroutine with exponential backoff on transient errors."""
+    start = time.perf_counter()
     last_error = None
     for attempt in range(MAX_RETRIES + 1):
         try:
-            return func(*args, **kwargs)
+            result = await func(*args, **kwargs)
+            _metrics.record((time.perf_counter() - start) * 1000, attempt, failed=False)
+            return result
         except Exception as e:
             last_error = e
             if not _is_retryable(e) or attempt == MAX_RETRIES:
+                _metrics.record((time.perf_counter() - start) * 1000, attempt, failed=True)
                 raise
-            wait = min(
-                INITIAL_BACKOFF * (BACKOFF_MULTIPLIER ** attempt) + random.uniform(0, 1),
-                MAX_BACKOFF,
-            )
+            wait = _backoff(attempt)
             logger.warning(
                 f"Gemini API error (attempt {attempt + 1}/{MAX_RETRIES + 1}): {e}. "
                 f"Retrying in {wait:.1f}s..."
@@ -91,20 +126,68 @@ async def async_with_retry(func: Callable, *args, **kwargs) -> T:
     raise last_error  # type: ignore
 
 
-def generate_content_with_retry(
+async def generate_content_with_retry(
     client: genai.Client,
     model: str,
     contents,
     config: types.GenerateContentConfig,
-):
-    """Call client.models.generate_content with automatic retry on transient errors."""
-
-    @with_retry
-    def _call():
-        return client.models.generate_content(
-            model=model,
-            contents=contents,
-            config=config,
-        )
-
-    return _call()
+) -> types.GenerateContentResponse:
+    """Call client.aio.models.generate_content with automatic retry on transient errors."""
+    return await async_with_retry(
+        client.aio.models.generate_content,
+        model=model,
+        contents=contents,
+        config=config,
+    )
+
+
+async def stream_content_with_retry(
+    client: genai.Client,
+    model: str,
+    contents,
+    config: Optional[types.GenerateContentConfig] = None,
+) -> AsyncIterator[types.GenerateContentResponse]:
+    """Stream client.aio.models.generate_content_stream chunks as they arrive.
+
+    Transient errors are retried only until the first chunk is yielded; after
+    that the caller has already forwarded output, so the error is raised.
+    """
+    start = time.perf_counter()
+    for attempt in range(MAX_RETRIES + 1):
+        started = False
+        try:
+            stream = await client.aio.models.generate_content_stream(
+                model=model,
+                contents=contents,
+                config=config,
+            )
+            async for chunk in stream:
+                started = True
+                yield chunk
+            _metrics.record((time.perf_counter() - start) * 1000, attempt, failed=False)
+            return
+        except Exception as e:
+            if started or not _is_retryable(e) or attempt == MAX_RETRIES:
+                _metrics.record((time.perf_counter() - start) * 1000, attempt, failed=True)
+                raise
+            wait = _backoff(attempt)
+            logger.warning(
+                f"Gemini API stream error (attempt {attempt + 1}/{MAX_RETRIES + 1}): {e}. "
+                f"Retrying in {wait:.1f}s..."
+            )
+            await asyncio.sleep(wait)
+
+
+async def embed_content_with_retry(
+    client: genai.Client,
+    model: str,
+    contents: list[str],
+    config: types.EmbedContentConfig,
+) -> types.EmbedContentResponse:
+    """Call client.aio.models.embed_content with automatic retry on transient errors."""
+    return await async_with_retry(
+        client.aio.models.embed_content,
+        model=model,
+        contents=contents,
+        config=config,
+    )
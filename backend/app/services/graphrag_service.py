@@ -1,32 +1,64 @@
 import asyncio
 import gzip
+import hashlib
+import json
 import shutil
 import pickle
 import re
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, AsyncGenerator
+from typing import Optional, AsyncGenerator, Awaitable, Callable
 
+import hnswlib
 import instructor
+import numpy as np
 from fast_graphrag import GraphRAG, QueryParam
 from fast_graphrag._llm import OpenAILLMService, OpenAIEmbeddingService
+from fast_graphrag._prompt import PROMPTS
+from fast_graphrag._types import TDocument
+from fast_graphrag._utils import TOKEN_TO_CHAR_RATIO
 
 from app.config import settings
 from app.logger import logger
 from app.schemas.graph_service_data import DREAM_DOMAIN, DREAM_ENTITY_TYPES, DREAM_EXAMPLE_QUERIES, \
-    QueryResult, GraphStats
+    QueryResult, GraphStats, BatchIndexResult, GraphSnapshot
+from app.services.rate_limiter import estimate_tokens, get_index_rate_limiter
+from app.services.extraction_cache import CachedInformationExtractionService
+from app.services.embedding_cache import CachedEmbeddingService
+from app.services.gemini_client import get_client, stream_content_with_retry
 
 
 _user_locks: dict[int, asyncio.Lock] = {}
+_indexing_totals = {"dreams": 0, "tokens": 0, "seconds": 0.0}
+_graph_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "loads": 0}
+
+
+def get_indexing_metrics() -> dict:
+    seconds = _indexing_totals["seconds"]
+    return {
+        "dreams_indexed": _indexing_totals["dreams"],
+        "tokens_indexed": _indexing_totals["tokens"],
+        "dreams_per_second": round(_indexing_totals["dreams"] / seconds, 3) if seconds else 0.0,
+        "tokens_per_second": round(_indexing_totals["tokens"] / seconds, 1) if seconds else 0.0,
+    }
 
 
 class GraphRAGService:
     EMBEDDING_DIM = 768
+    # dream_id -> ids of the chunks that dream contributed to the graph
+    PROVENANCE_FILE = "dream_chunks.json"
 
     def __init__(self, user_id: int):
         self.user_id = user_id
         self.working_dir = self._get_working_dir()
         self._graph: Optional[GraphRAG] = None
+        # Storages stay loaded between queries until the files on disk change
+        self._query_ready = False
+        self._loaded_version: Optional[tuple] = None
+        self.footprint_bytes = 0
+        self.last_used = time.monotonic()
+        self._snapshot: Optional[GraphSnapshot] = None
 
     def _get_lock(self) -> asyncio.Lock:
         if self.user_id not in _user_locks:
@@ -49,7 +81,7 @@ class GraphRAGService:
 
     def _create_embedding_service(self) -> OpenAIEmbeddingService:
         logger.info("Using Gemini embeddings (768-dim)")
-        return OpenAIEmbeddingService(
+        return CachedEmbeddingService(
             model=settings.text_embedding_model,
             base_url=settings.llm_base_url,
             api_key=settings.gemini_api_key,
@@ -65,6 +97,7 @@ class GraphRAGService:
                 config = GraphRAG.Config(
                     llm_service=llm_service,
                     embedding_service=embedding_service,
+                    information_extraction_service_cls=CachedInformationExtractionService,
                 )
 
                 if hasattr(config, 'embedding_dim'):
@@ -82,6 +115,7 @@ class GraphRAGService:
                 config = GraphRAG.Config(
                     llm_service=llm_service,
                     embedding_service=embedding_service,
+                    information_extraction_service_cls=CachedInformationExtractionService,
                 )
 
             self._graph = GraphRAG(
@@ -96,10 +130,298 @@ class GraphRAGService:
 
         return self._graph
 
+    def _reset_graph(self) -> None:
+        self._graph = None
+        self._query_ready = False
+        self._loaded_version = None
+        self.footprint_bytes = 0
+
+    @property
+    def resident_bytes(self) -> int:
+        snapshot_bytes = len(self._snapshot.export_json) if self._snapshot else 0
+        return self.footprint_bytes + snapshot_bytes
+
+    def _storage_files(self) -> list[Path]:
+        return [path for path in self.working_dir.iterdir() if path.suffix in (".pkl", ".pklz", ".bin")]
+
+    def _storage_version(self) -> tuple:
+        version = []
+        for path in self._storage_files():
+            stat = path.stat()
+            version.append((path.name, stat.st_mtime_ns, stat.st_size))
+
+        return tuple(sorted(version))
+
+    async def _ensure_query_ready(self, graph: GraphRAG) -> None:
+        """Load the storages for querying unless they are already loaded and current.
+
+        The version check also catches writes made by a worker in another process.
+        Caller holds the user lock.
+        """
+        version = self._storage_version()
+        if self._query_ready and version == self._loaded_version:
+            return
+
+        if self._query_ready:
+            await graph.state_manager.query_done()
+        await graph.state_manager.query_start()
+        self._query_ready = True
+        self._loaded_version = version
+        self.footprint_bytes = sum(size for _, _, size in version)
+        _graph_cache_stats["loads"] += 1
+
+    async def _release_query_state(self, graph: GraphRAG) -> None:
+        if self._query_ready:
+            await graph.state_manager.query_done()
+            self._query_ready = False
+            self._loaded_version = None
+            self.footprint_bytes = 0
+
     @property
     def graph_exists(self) -> bool:
         return len(list(self.working_dir.glob("*.pkl"))) > 0
 
+    def _read_provenance(self) -> Optional[dict[int, list[int]]]:
+        path = self.working_dir / self.PROVENANCE_FILE
+        if not path.exists():
+            return None
+
+        with open(path) as f:
+            return {int(dream_id): chunks for dream_id, chunks in json.load(f).items()}
+
+    def _write_provenance(self, provenance: dict[int, list[int]]) -> None:
+        path = self.working_dir / self.PROVENANCE_FILE
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({str(dream_id): chunks for dream_id, chunks in provenance.items()}, f)
+        tmp_path.replace(path)
+
+    async def _scan_provenance(self, state_manager) -> dict[int, list[int]]:
+        """Rebuild the provenance map from a loaded graph.
+
+        Used for graphs indexed before provenance was tracked: every chunk referenced
+        by a relation is attributed to a dream through its metadata or its
+        `[Dream ID: N]` header.
+        """
+        chunk_lists = await state_manager.graph_storage.get_relationships_attrs(key="chunks")
+        chunk_ids = list({chunk_id for chunks in chunk_lists for chunk_id in chunks})
+
+        provenance: dict[int, list[int]] = {}
+        for chunk_id, chunk in zip(chunk_ids, await state_manager.chunk_storage.get(chunk_ids)):
+            if chunk is None:
+                continue
+            dream_id = (chunk.metadata or {}).get("dream_id") or self._extract_dream_id(chunk.content)
+            if dream_id is not None:
+                provenance.setdefault(int(dream_id), []).append(int(chunk_id))
+
+        logger.info(f"Rebuilt chunk provenance for {len(provenance)} dreams of user {self.user_id}")
+        return provenance
+
+    @staticmethod
+    def _chunks_to_remove(
+        provenance: dict[int, list[int]],
+        dream_ids: list[int],
+        keep_chunks: set[int],
+    ) -> set[int]:
+        targets = set(dream_ids)
+        chunks = {chunk_id for dream_id in targets for chunk_id in provenance.get(dream_id, [])}
+        shared = {
+            chunk_id
+            for dream_id, dream_chunks in provenance.items() if dream_id not in targets
+            for chunk_id in dream_chunks
+        }
+
+        return chunks - shared - keep_chunks
+
+    async def _prune_chunks(self, state_manager, chunk_ids: set[int]) -> int:
+        """Remove chunks, the relations they support and entities left without support.
+
+        Returns the number of entities removed.
+        """
+        storage = state_manager.graph_storage
+        igraph = storage._graph
+
+        dead_edges = []
+        touched_vertices = set()
+        for index, chunks in enumerate(await storage.get_relationships_attrs(key="chunks")):
+            # Identity ("is") edges carry no chunks; they go away with their entities
+            if not chunks:
+                continue
+            remaining = [chunk_id for chunk_id in chunks if chunk_id not in chunk_ids]
+            if len(remaining) == len(chunks):
+                continue
+
+            edge = igraph.es[index]
+            touched_vertices.update((edge.source, edge.target))
+            if remaining:
+                edge["chunks"] = remaining
+            else:
+                dead_edges.append(index)
+
+        await storage.delete_edges_by_index(dead_edges)
+        self._delete_chunks(state_manager, chunk_ids)
+
+        orphans = sorted(
+            vertex for vertex in touched_vertices
+            if not any(edge["chunks"] for edge in igraph.vs[vertex].incident())
+        )
+        if orphans:
+            self._delete_entities(state_manager, orphans)
+
+        logger.info(
+            f"Pruned {len(chunk_ids)} chunks, {len(dead_edges)} relations and "
+            f"{len(orphans)} entities from graph of user {self.user_id}"
+        )
+        return len(orphans)
+
+    @staticmethod
+    def _delete_chunks(state_manager, chunk_ids: set[int]) -> None:
+        # The relation->chunk map is sized by the chunk count, so indices are
+        # compacted instead of leaving the holes the KV store's delete() would.
+        chunks = state_manager.chunk_storage
+        survivors = sorted(
+            ((key, index) for key, index in chunks._key_to_index.items() if key not in chunk_ids),
+            key=lambda item: item[1],
+        )
+        chunks._data = {new_index: chunks._data[index] for new_index, (_, index) in enumerate(survivors)}
+        chunks._key_to_index = {key: new_index for new_index, (key, _) in enumerate(survivors)}
+        chunks._free_indices = []
+        chunks._np_keys = None
+
+    def _delete_entities(self, state_manager, vertices: list[int]) -> None:
+        # Entity vectors are labelled with their vertex index, so deleting vertices
+        # means relabelling the survivors in a fresh HNSW index.
+        igraph = state_manager.graph_storage._graph
+        vectors = state_manager.entity_storage
+        if vectors.size != igraph.vcount():
+            logger.warning(
+                f"Entity index of user {self.user_id} is out of step with the graph "
+                f"({vectors.size} vectors, {igraph.vcount()} entities); keeping orphaned entities"
+            )
+            return
+
+        removed = set(vertices)
+        survivors = [i for i in range(igraph.vcount()) if i not in removed]
+        embeddings = vectors._index.get_items(survivors) if survivors else []
+
+        index = hnswlib.Index(space="cosine", dim=vectors.embedding_dim)
+        index.init_index(
+            max_elements=vectors.max_size,
+            ef_construction=vectors.config.ef_construction,
+            M=vectors.config.M,
+            allow_replace_deleted=True,
+        )
+        index.set_ef(vectors.config.ef_search)
+        if survivors:
+            index.add_items(
+                data=np.asarray(embeddings, dtype=np.float32),
+                ids=np.arange(len(survivors)),
+                num_threads=vectors.config.num_threads,
+            )
+
+        igraph.delete_vertices(vertices)
+        vectors._index = index
+        vectors._metadata = {}
+
+    async def _remove_contributions(
+        self,
+        graph: GraphRAG,
+        dream_ids: list[int],
+        keep_chunks: Optional[set[int]] = None,
+    ) -> int:
+        """Remove what `dream_ids` contributed to the graph. Caller holds the user lock.
+
+        Chunks in `keep_chunks` (unchanged chunks of a dream being re-inserted) and
+        chunks shared with other dreams stay. Returns the number of chunks removed.
+        """
+        keep_chunks = keep_chunks or set()
+        provenance = self._read_provenance()
+        if provenance is None and not self.graph_exists:
+            provenance = {}
+
+        if provenance is not None and not self._chunks_to_remove(provenance, dream_ids, keep_chunks):
+            if any(dream_id in provenance for dream_id in dream_ids):
+                for dream_id in dream_ids:
+                    provenance.pop(dream_id, None)
+                self._write_provenance(provenance)
+            return 0
+
+        state_manager = graph.state_manager
+        await self._release_query_state(graph)
+        await state_manager.insert_start()
+        if provenance is None:
+            provenance = await self._scan_provenance(state_manager)
+
+        chunk_ids = self._chunks_to_remove(provenance, dream_ids, keep_chunks)
+        if chunk_ids:
+            await self._prune_chunks(state_manager, chunk_ids)
+        await state_manager.insert_done()
+
+        for dream_id in dream_ids:
+            provenance.pop(dream_id, None)
+        self._write_provenance(provenance)
+
+        return len(chunk_ids)
+
+    async def _chunk_dreams(self, graph: GraphRAG, dreams: list[dict]) -> dict[int, list[int]]:
+        documents = [TDocument(data=dream["content"], metadata={"dream_id": dream["id"]}) for dream in dreams]
+        chunked = await graph.chunking_service.extract(data=documents)
+
+        return {
+            dream["id"]: [int(chunk.id) for chunk in chunks]
+            for dream, chunks in zip(dreams, chunked)
+        }
+
+    async def _insert(self, dreams: list[dict]) -> None:
+        """Insert dreams, replacing whatever earlier versions of them contributed."""
+        graph = self._get_graph()
+        new_chunks = await self._chunk_dreams(graph, dreams)
+        keep_chunks = {chunk_id for chunks in new_chunks.values() for chunk_id in chunks}
+
+        async with self._get_lock():
+            await self._remove_contributions(graph, list(new_chunks), keep_chunks=keep_chunks)
+            await self._release_query_state(graph)
+            await graph.async_insert(
+                [dream["content"] for dream in dreams],
+                metadata=[{"dream_id": dream["id"]} for dream in dreams],
+                show_progress=False,
+            )
+
+            provenance = self._read_provenance() or {}
+            provenance.update(new_chunks)
+            self._write_provenance(provenance)
+
+    async def get_tracked_dream_ids(self) -> set[int]:
+        """Ids of the dreams that currently have content in the graph."""
+        provenance = self._read_provenance()
+        if provenance is None and self.graph_exists:
+            graph = self._get_graph()
+            async with self._get_lock():
+                await self._ensure_query_ready(graph)
+                provenance = await self._scan_provenance(graph.state_manager)
+                self._write_provenance(provenance)
+
+        return set(provenance or {})
+
+    async def remove_dreams(self, dream_ids: list[int]) -> int:
+        """Remove deleted dreams from the graph without re-extracting anything.
+
+        Returns the number of chunks removed.
+        """
+        if not dream_ids or not self.graph_exists:
+            return 0
+
+        graph = self._get_graph()
+        async with self._get_lock():
+            try:
+                removed = await self._remove_contributions(graph, dream_ids)
+            except Exception:
+                self._reset_graph()
+                raise
+
+        logger.info(f"Removed dreams {dream_ids} ({removed} chunks) from graph of user {self.user_id}")
+        return removed
+
     async def index_dream(
         self,
         dream_id: int,
@@ -107,46 +429,85 @@ class GraphRAGService:
     ) -> tuple[bool, Optional[str]]:
         try:
             logger.info(f"Starting index for dream {dream_id}")
-            graph = self._get_graph()
             logger.debug(f"Content length: {len(content)} chars")
-
-            async with self._get_lock():
-                await graph.async_insert(content)
+            await self._insert([{"id": dream_id, "content": content}])
 
             logger.info(f"Successfully indexed dream {dream_id}")
             return True, None
 
         except Exception as e:
             logger.error(f"Error indexing dream {dream_id}: {e}", exc_info=True)
-            self._graph = None
+            self._reset_graph()
             return False, str(e)
 
     async def index_dreams_batch(
         self,
         dreams: list[dict],
-    ) -> tuple[int, int, list[str], list[int]]:
-        success_count = 0
-        failure_count = 0
-        errors = []
-        successful_ids = []
-
-        for i, dream in enumerate(dreams):
-            if i > 0:
-                await asyncio.sleep(1.0)
-
-            success, error = await self.index_dream(
-                dream_id=dream["id"],
-                content=dream["content"],
-            )
+        batch_size: Optional[int] = None,
+        on_batch: Optional[Callable[[list[int], list[str]], Awaitable[None]]] = None,
+    ) -> BatchIndexResult:
+        """Insert dreams several at a time so fast-graphrag extracts them concurrently.
+
+        Graph writes stay serialized under the per-user lock; throughput is bounded by
+        the shared token bucket instead of a fixed delay. A failed batch is retried
+        dream by dream so one bad document doesn't fail its neighbours. `on_batch`
+        receives each batch's successful ids and errors so callers can persist
+        progress as it happens.
+        """
+        batch_size = batch_size or settings.graph_index_batch_size
+        limiter = get_index_rate_limiter()
+        result = BatchIndexResult()
+        start_time = time.perf_counter()
+
+        for i in range(0, len(dreams), batch_size):
+            batch = dreams[i:i + batch_size]
+            tokens = sum(estimate_tokens(dream["content"]) for dream in batch)
+            await limiter.acquire(tokens)
 
-            if success:
-                success_count += 1
-                successful_ids.append(dream["id"])
-            else:
-                failure_count += 1
-                errors.append(f"Dream {dream['id']}: {error}")
+            try:
+                await self._insert(batch)
+                batch_ids = [dream["id"] for dream in batch]
+                result.successful_ids.extend(batch_ids)
+                result.tokens += tokens
+                logger.info(f"Indexed batch of {len(batch)} dreams ({i + len(batch)}/{len(dreams)})")
+                if on_batch:
+                    await on_batch(batch_ids, [])
+                continue
+            except Exception as e:
+                logger.warning(f"Batch insert of {len(batch)} dreams failed, retrying individually: {e}")
+                self._reset_graph()
+
+            batch_ids, batch_errors = [], []
+            for dream in batch:
+                dream_tokens = estimate_tokens(dream["content"])
+                await limiter.acquire(dream_tokens)
+                success, error = await self.index_dream(
+                    dream_id=dream["id"],
+                    content=dream["content"],
+                )
 
-        return success_count, failure_count, errors, successful_ids
+                if success:
+                    batch_ids.append(dream["id"])
+                    result.tokens += dream_tokens
+                else:
+                    batch_errors.append(f"Dream {dream['id']}: {error}")
+
+            result.successful_ids.extend(batch_ids)
+            result.failure_count += len(batch_errors)
+            result.errors.extend(batch_errors)
+            if on_batch:
+                await on_batch(batch_ids, batch_errors)
+
+        result.elapsed_seconds = time.perf_counter() - start_time
+        _indexing_totals["dreams"] += result.success_count
+        _indexing_totals["tokens"] += result.tokens
+        _indexing_totals["seconds"] += result.elapsed_seconds
+
+        logger.info(
+            f"Indexed {result.success_count}/{len(dreams)} dreams for user {self.user_id}: "
+            f"{result.dreams_per_second} dreams/s, {result.tokens_per_second} tokens/s"
+        )
+        return result
 
     async def query(
         self,
@@ -167,14 +528,11 @@ class GraphRAGService:
             graph = self._get_graph()
 
             async with self._get_lock():
-                await graph.state_manager.query_start()
-                try:
-                    result = await graph.async_query(
-                        question,
-                        QueryParam(with_references=with_references),
-                    )
-                finally:
-                    await graph.state_manager.query_done()
+                await self._ensure_query_ready(graph)
+                result = await graph.async_query(
+                    question,
+                    QueryParam(with_references=with_references),
+                )
 
             processing_time = int((time.time() - start_time) * 1000)
             sources = self._parse_sources(result) if with_references else []
@@ -201,17 +559,42 @@ class GraphRAGService:
         self,
         question: str,
     ) -> AsyncGenerator[str, None]:
-        result = await self.query(question, with_references=False)
+        """Retrieve graph context under the user lock, then stream the answer as Gemini writes it."""
+        if not self.graph_exists:
+            result = await self.query(question, with_references=False)
+            yield result.response
+            return
+
+        try:
+            graph = self._get_graph()
 
-        words = result.response.split()
-        chunk_size = 3
+            async with self._get_lock():
+                await self._ensure_query_ready(graph)
+                retrieved = await graph.async_query(question, QueryParam(only_context=True))
+
+            # A non-empty response here is fast-graphrag's "nothing found" answer
+            if retrieved.response:
+                yield retrieved.response
+                return
+
+            params = QueryParam()
+            context = retrieved.context.truncate(
+                max_chars={
+                    "entities": params.entities_max_tokens * TOKEN_TO_CHAR_RATIO,
+                    "relations": params.relations_max_tokens * TOKEN_TO_CHAR_RATIO,
+                    "chunks": params.chunks_max_tokens * TOKEN_TO_CHAR_RATIO,
+                },
+                output_context_str=True,
+            )
+            prompt = PROMPTS["generate_response_query_no_references"].format(query=question, context=context)
 
-        for i in range(0, len(words), chunk_size):
-            chunk = " ".join(words[i:i + chunk_size])
-            if i > 0:
-                chunk = " " + chunk
-            yield chunk
-            await asyncio.sleep(0.02)
+            async for chunk in stream_content_with_retry(get_client(), settings.llm_model, prompt):
+                if chunk.text:
+                    yield chunk.text
+
+        except Exception as e:
+            logger.error(f"Query stream error: {e}", exc_info=True)
+            yield "I encountered an error while searching your dreams. Please try again."
 
     def _parse_sources(self, result) -> list[dict]:
         sources = []
@@ -305,122 +688,109 @@ class GraphRAGService:
             return stats
 
     async def export_graph(self) -> dict:
-        if not self.graph_exists:
-            return {"nodes": [], "edges": [], "stats": {"node_count": 0, "edge_count": 0}}
+        snapshot = await self.get_snapshot()
+
+        return {"nodes": snapshot.nodes, "edges": snapshot.edges, "stats": snapshot.stats}
+
+    async def get_snapshot(self) -> GraphSnapshot:
+        """Export of the current graph version, built once and reused until the files change."""
+        version = self._storage_version()
+        etag = hashlib.sha1(repr(version).encode()).hexdigest()[:16]
+        if self._snapshot is not None and self._snapshot.etag == etag:
+            return self._snapshot
 
         async with self._get_lock():
-            return await self._export_graph_unlocked()
+            if self._snapshot is None or self._snapshot.etag != etag:
+                self._snapshot = await asyncio.to_thread(self._build_snapshot, etag)
+
+        return self._snapshot
 
-    async def _export_graph_unlocked(self) -> dict:
-        nodes = []
-        edges = []
+    def _build_snapshot(self, etag: str) -> GraphSnapshot:
+        snapshot = GraphSnapshot(etag=etag)
 
         graph_file = self.working_dir / "graph_igraph_data.pklz"
         if graph_file.exists():
             try:
                 with gzip.open(graph_file, "rb") as f:
                     graph = pickle.load(f)
-
-                logger.debug(f"Graph type: {type(graph)}")
-                logger.debug(f"Vertex count: {graph.vcount() if hasattr(graph, 'vcount') else 'N/A'}")
-                logger.debug(f"Edge count: {graph.ecount() if hasattr(graph, 'ecount') else 'N/A'}")
-
-                if hasattr(graph, 'vs') and graph.vcount() > 0:
-                    vertex_attrs = graph.vs.attributes()
-                    logger.debug(f"Vertex attributes available: {vertex_attrs}")
-
-                    for i in range(min(5, graph.vcount())):
-                        v = graph.vs[i]
-                        name = v.get('name', 'N/A') if hasattr(v, 'get') else (
-                            v['name'] if 'name' in v.attributes() else 'N/A')
-                        type_attr = v.get('type', 'N/A') if hasattr(v, 'get') else (
-                            v['type'] if 'type' in v.attributes() else 'N/A')
-                        desc = v.get('description', 'N/A') if hasattr(v, 'get') else (
-                            v['description'] if 'description' in v.attributes() else 'N/A')
-                        logger.debug(f"Vertex {i}: name='{name}', type='{type_attr}', desc='{str(desc)[:50]}...'")
-
-                    for i, vertex in enumerate(graph.vs):
-                        entity_name = vertex['name'] if 'name' in vertex.attributes() else f"Entity {i}"
-                        entity_type = vertex['type'] if 'type' in vertex.attributes() else 'ENTITY'
-                        entity_desc = vertex['description'] if 'description' in vertex.attributes() else ''
-
-                        if entity_name.startswith("Entity ") or entity_name == "":
-                            for attr in ['label', 'title', 'id']:
-                                if attr in vertex.attributes():
-                                    alt_name = vertex[attr]
-                                    if alt_name and not alt_name.startswith("Entity "):
-                                        entity_name = alt_name
-                                        break
-
-                        normalized_type = str(entity_type).lower().replace("_", "").strip()
-
-                        nodes.append({
-                            "id": str(i),
-                            "type": normalized_type,
-                            "label": str(entity_name),
-                            "description": str(entity_desc)[:300] if entity_desc else "",
-                            "size": 1,
-                        })
-
-                    logger.info(f"Extracted {len(nodes)} nodes from igraph vertices")
-
-                    for i in range(min(5, len(nodes))):
-                        logger.debug(
-                            f"Node {i}: id={nodes[i]['id']}, type={nodes[i]['type']}, label={nodes[i]['label']}")
-
-                    type_counts = {}
-                    for n in nodes:
-                        type_counts[n["type"]] = type_counts.get(n["type"], 0) + 1
-                    logger.debug(f"Node type distribution: {type_counts}")
-
-                if hasattr(graph, 'es') and graph.ecount() > 0:
-                    edge_attrs = graph.es.attributes()
-                    logger.debug(f"Edge attributes: {edge_attrs}")
-
-                    for edge in graph.es:
-                        source_idx = edge.source
-                        target_idx = edge.target
-
-                        rel_type = "related"
-                        weight = 1.0
-
-                        if 'description' in edge.attributes():
-                            desc = edge['description']
-                            if desc and isinstance(desc, str):
-                                rel_type = desc.split('.')[0][:50]
-
-                        for attr_name in ['relationship', 'type', 'label', 'name']:
-                            if attr_name in edge.attributes():
-                                val = edge[attr_name]
-                                if val and isinstance(val, str):
-                                    rel_type = val[:50]
-                                    break
-
-                        if 'weight' in edge.attributes():
-                            try:
-                                weight = float(edge['weight'])
-                            except (ValueError, TypeError):
-                                pass
-
-                        if source_idx < len(nodes) and target_idx < len(nodes):
-                            edges.append({
-                                "source": str(source_idx),
-                                "target": str(target_idx),
-                                "relationship": rel_type,
-                                "weight": weight,
-                            })
-
-                    logger.debug(f"Extracted {len(edges)} edges from igraph")
-
+                self._fill_snapshot(snapshot, graph)
             except Exception as e:
                 logger.error(f"Could not read graph_igraph_data.pklz: {e}", exc_info=True)
 
-        logger.info(f"Exported graph: {len(nodes)} nodes, {len(edges)} edges")
-        return {
-            "nodes": nodes,
-            "edges": edges,
-            "stats": {"node_count": len(nodes), "edge_count": len(edges)},
-        }
+        snapshot.export_json = json.dumps(
+            {"nodes": snapshot.nodes, "edges": snapshot.edges, "stats": snapshot.stats},
+            separators=(",", ":"),
+        ).encode()
+
+        logger.info(
+            f"Built graph snapshot {etag} for user {self.user_id}: "
+            f"{len(snapshot.nodes)} nodes, {len(snapshot.edges)} edges"
+        )
+        return snapshot
+
+    @staticmethod
+    def _fill_snapshot(snapshot: GraphSnapshot, graph) -> None:
+        vertex_attrs = set(graph.vs.attributes()) if graph.vcount() else set()
+        for i, vertex in enumerate(graph.vs):
+            entity_name = vertex["name"] if "name" in vertex_attrs else f"Entity {i}"
+            entity_type = vertex["type"] if "type" in vertex_attrs else "ENTITY"
+            entity_desc = vertex["description"] if "description" in vertex_attrs else ""
+
+            if entity_name.startswith("Entity ") or entity_name == "":
+                for attr in ["label", "title", "id"]:
+                    if attr in vertex_attrs:
+                        alt_name = vertex[attr]
+                        if alt_name and not alt_name.startswith("Entity "):
+                            entity_name = alt_name
+                            break
+
+            normalized_type = str(entity_type).lower().replace("_", "").strip()
+
+            snapshot.nodes.append({
+                "id": str(i),
+                "type": normalized_type,
+                "label": str(entity_name),
+                "description": str(entity_desc)[:300] if entity_desc else "",
+                "size": 1,
+            })
+            snapshot.name_index.setdefault(str(entity_name).lower(), i)
+            snapshot.type_index.setdefault(normalized_type, []).append(i)
+
+        snapshot.adjacency = [[] for _ in snapshot.nodes]
+        edge_attrs = set(graph.es.attributes()) if graph.ecount() else set()
+        for edge in graph.es:
+            rel_type = "related"
+            weight = 1.0
+
+            if "description" in edge_attrs:
+                desc = edge["description"]
+                if desc and isinstance(desc, str):
+                    rel_type = desc.split(".")[0][:50]
+
+            for attr_name in ["relationship", "type", "label", "name"]:
+                if attr_name in edge_attrs:
+                    val = edge[attr_name]
+                    if val and isinstance(val, str):
+                        rel_type = val[:50]
+                        break
+
+            if "weight" in edge_attrs:
+                try:
+                    weight = float(edge["weight"])
+                except (ValueError, TypeError):
+                    pass
+
+            if edge.source < len(snapshot.nodes) and edge.target < len(snapshot.nodes):
+                edge_index = len(snapshot.edges)
+                snapshot.edges.append({
+                    "source": str(edge.source),
+                    "target": str(edge.target),
+                    "relationship": rel_type,
+                    "weight": weight,
+                })
+                snapshot.adjacency[edge.source].append(edge_index)
+                if edge.target != edge.source:
+                    snapshot.adjacency[edge.target].append(edge_index)
 
     def _parse_entity_string(self, entity_str: str) -> dict:
         result = {"name": entity_str, "type": "entity", "description": ""}
@@ -452,7 +822,7 @@ class GraphRAGService:
             if self.working_dir.exists():
                 shutil.rmtree(self.working_dir)
                 self.working_dir.mkdir(parents=True, exist_ok=True)
-            self._graph = None
+            self._reset_graph()
 
             return True
         except Exception as e:
@@ -460,5 +830,84 @@ class GraphRAGService:
             return False
 
 
+class GraphRAGServiceCache:
+    """Process-wide LRU of per-user services, so warm graphs survive between requests.
+
+    Bounded by entry count and by the on-disk size of the loaded storages (a close
+    proxy for their in-memory size); services idle for longer than `idle_seconds`
+    are dropped on the next access.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, idle_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self._entries: OrderedDict[int, GraphRAGService] = OrderedDict()
+
+    def get(self, user_id: int) -> GraphRAGService:
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        service = self._entries.pop(user_id, None)
+        if service is None:
+            _graph_cache_stats["misses"] += 1
+            service = GraphRAGService(user_id)
+        else:
+            _graph_cache_stats["hits"] += 1
+
+        service.last_used = now
+        self._entries[user_id] = service
+        self._evict_over_budget()
+
+        return service
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(service.resident_bytes for service in self._entries.values())
+
+    def _evict_idle(self, now: float) -> None:
+        for user_id, service in list(self._entries.items()):
+            if now - service.last_used > self.idle_seconds:
+                self._evict(user_id)
+
+    def _evict_over_budget(self) -> None:
+        # Never evict the entry that was just requested (last in order)
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_entries or self.resident_bytes > self.max_bytes
+        ):
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+        _graph_cache_stats["evictions"] += 1
+        logger.debug(f"Evicted GraphRAG instance for user {user_id}")
+
+    def snapshot(self) -> dict:
+        return {
+            **_graph_cache_stats,
+            "entries": len(self._entries),
+            "resident_bytes": self.resident_bytes,
+        }
+
+
+_graph_cache: Optional[GraphRAGServiceCache] = None
+
+
+def _get_graph_cache() -> GraphRAGServiceCache:
+    global _graph_cache
+    if _graph_cache is None:
+        _graph_cache = GraphRAGServiceCache(
+            max_entries=settings.graph_cache_max_instances,
+            max_bytes=settings.graph_cache_max_mb * 1024 * 1024,
+            idle_seconds=settings.graph_cache_idle_seconds,
+        )
+
+    return _graph_cache
+
+
+def get_graph_cache_metrics() -> dict:
+    return _get_graph_cache().snapshot()
+
+
 def get_graphrag_service(user_id: int) -> GraphRAGService:
-    return GraphRAGService(user_id)
+    return _get_graph_cache().get(user_id)
@@ -0,0 +1,127 @@
+"""Downscaling and re-encoding of user images before they're sent to Gemini."""
+
+import asyncio
+import io
+
+from PIL import Image, ImageOps
+
+from app.config import settings
+from app.logger import logger
+
+# JPEG qualities tried in turn until the image fits the byte budget
+JPEG_QUALITIES = [85, 75, 65, 55]
+# Below this the image is no use to the model, so the byte budget gives way first
+MIN_DIMENSION = 384
+# Formats Gemini accepts, for originals small and clean enough to send untouched
+PASSTHROUGH_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+# Info keys that can identify the user or their device (camera, GPS, editing history)
+METADATA_KEYS = ("exif", "xmp", "XML:com.adobe.xmp", "comment", "photoshop")
+
+_image_preprocessing_stats = {"requests": 0, "images": 0, "failures": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    if image.mode in ("RGBA", "LA", "P", "PA"):
+        # Flatten transparency onto white, as a sketch on paper would be
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+
+    return image.convert("RGB") if image.mode != "RGB" else image
+
+
+def _encode_jpeg(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _fit_jpeg(image: Image.Image, max_bytes: int) -> bytes:
+    while True:
+        for quality in JPEG_QUALITIES:
+            encoded = _encode_jpeg(image, quality)
+            if len(encoded) <= max_bytes:
+                return encoded
+
+        width, height = image.size
+        if max(width, height) // 2 < MIN_DIMENSION:
+            return encoded
+        image = image.resize((width // 2, height // 2), Image.Resampling.LANCZOS)
+
+
+def _has_metadata(source: Image.Image) -> bool:
+    # PNG text chunks (tEXt/iTXt) can carry anything, so any of them counts
+    return any(key in source.info for key in METADATA_KEYS) or bool(getattr(source, "text", None))
+
+
+def prepare_image(image_bytes: bytes, mime_type: str) -> tuple[bytes, str]:
+    """Bound the image's dimensions, drop its metadata and re-encode it as JPEG within the byte budget.
+
+    An image that is already within both limits and carries no metadata is sent as is,
+    and the original is kept whenever it's safe to send and no larger than the JPEG,
+    so small sketches keep their line art. Images Pillow can't decode (HEIC without
+    a plugin, corrupt uploads) are passed through unchanged.
+    """
+    max_dimension = settings.image_max_dimension
+    max_bytes = settings.image_max_kb * 1024
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as source:
+            original_type = PASSTHROUGH_TYPES.get(source.format)
+            sendable = (
+                original_type is not None
+                and max(source.size) <= max_dimension
+                and not _has_metadata(source)
+            )
+            if sendable and len(image_bytes) <= max_bytes:
+                return image_bytes, original_type
+
+            # Lets the JPEG decoder scale down while decoding rather than after
+            source.draft("RGB", (max_dimension, max_dimension))
+            # Bake in the EXIF orientation before the EXIF block is dropped
+            image = _to_rgb(ImageOps.exif_transpose(source))
+
+        # Nothing from the source's info (EXIF, GPS, XMP, ICC) is written back out
+        image.info = {}
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        encoded = _fit_jpeg(image, max_bytes)
+
+        if sendable and len(image_bytes) <= len(encoded):
+            return image_bytes, original_type
+        return encoded, "image/jpeg"
+
+    except Exception as e:
+        logger.warning(f"Sending {mime_type} image unprocessed: {e}")
+        _image_preprocessing_stats["failures"] += 1
+        return image_bytes, mime_type
+
+
+async def prepare_images(images: list[tuple[bytes, str]]) -> list[tuple[bytes, str]]:
+    """Prepare one request's (bytes, mime type) images off the event loop."""
+    if not images:
+        return []
+
+    prepared = await asyncio.gather(
+        *(asyncio.to_thread(prepare_image, image_bytes, mime_type) for image_bytes, mime_type in images)
+    )
+
+    bytes_in = sum(len(image_bytes) for image_bytes, _ in images)
+    bytes_out = sum(len(image_bytes) for image_bytes, _ in prepared)
+    _image_preprocessing_stats["requests"] += 1
+    _image_preprocessing_stats["images"] += len(images)
+    _image_preprocessing_stats["bytes_in"] += bytes_in
+    _image_preprocessing_stats["bytes_out"] += bytes_out
+    logger.info(f"Prepared {len(images)} images: {bytes_in} -> {bytes_out} bytes")
+
+    return list(prepared)
+
+
+def get_image_preprocessing_metrics() -> dict:
+    requests = _image_preprocessing_stats["requests"]
+    bytes_saved = _image_preprocessing_stats["bytes_in"] - _image_preprocessing_stats["bytes_out"]
+    return {
+        **_image_preprocessing_stats,
+        "bytes_saved": bytes_saved,
+        "avg_bytes_saved_per_request": round(bytes_saved / requests) if requests else 0,
+    }
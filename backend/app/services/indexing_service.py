@@ -11,6 +11,7 @@ from app.models.dream_characters import DreamCharacter
 from app.models.dream_emotions import DreamEmotion
 from app.models.dream_themes import DreamTheme
 from app.schemas.indexing_data import SymbolData, DreamData, CharacterData, EmotionData, ThemeData
+from app.services.extraction_cache import content_hash
 
 
 class DreamIndexingService:
@@ -267,6 +268,7 @@ class DreamIndexingService:
                 results.append({
                     "id": dream_id,
                     "content": content,
+                    "hash": content_hash(content),
                 })
 
         return results
@@ -0,0 +1,249 @@
+import asyncio
+import contextlib
+from typing import Optional
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.logger import logger
+from app.models.jobs import Job
+from app.models.enums.dream_enums import JobType
+from app.repositories.job_repository import JobRepository
+from app.repositories.graph_repository import GraphRepository
+from app.repositories.dream_repository import DreamRepository
+from app.repositories.extraction_repository import ExtractionRepository
+from app.services.graphrag_service import get_graphrag_service
+from app.services.dream_vector_index import get_dream_vector_index
+from app.services.indexing_service import DreamIndexingService
+from app.services.extraction_service import get_extraction_service
+
+HEARTBEAT_INTERVAL = 30.0
+
+
+class JobWorker:
+    """Pool of asyncio tasks that claim jobs from the `jobs` table and run them.
+
+    Runs inside the API process (see `JOB_WORKERS`) or standalone via
+    `python -m app.worker`. Any number of workers can share the table: claims use
+    `FOR UPDATE SKIP LOCKED`, and a job whose heartbeat goes stale is picked up
+    again and resumes from the dreams' `is_indexed` flags.
+    """
+
+    def __init__(self, concurrency: int = 1):
+        self.concurrency = concurrency
+        self._tasks: list[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._run_loop(i), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} job worker(s)")
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self) -> None:
+        self.start()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run_loop(self, worker_index: int) -> None:
+        while not self._stopping.is_set():
+            try:
+                job_id = await self._claim()
+            except Exception as e:
+                logger.error(f"Job worker {worker_index} failed to claim a job: {e}", exc_info=True)
+                job_id = None
+
+            if job_id is None:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._stopping.wait(), timeout=settings.job_poll_interval_seconds)
+                continue
+
+            await self._execute(job_id)
+
+    async def _claim(self) -> Optional[int]:
+        async with AsyncSessionLocal() as db:
+            job = await JobRepository(db).claim_next(settings.job_stale_after_seconds)
+            await db.commit()
+
+            return job.id if job else None
+
+    async def _heartbeat(self, job_id: int) -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                async with AsyncSessionLocal() as db:
+                    await JobRepository(db).heartbeat(job_id)
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+
+    async def _execute(self, job_id: int) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            async with AsyncSessionLocal() as db:
+                job_repo = JobRepository(db)
+                job = await db.get(Job, job_id)
+                logger.info(f"Running job {job.id} ({job.job_type.value}) for user {job.user_id}, attempt {job.attempts}")
+
+                try:
+                    if job.job_type == JobType.INDEX:
+                        await self._run_index(db, job)
+                    elif job.job_type == JobType.REINDEX:
+                        await self._run_reindex(db, job)
+                    elif job.job_type == JobType.EXTRACT:
+                        await self._run_extract(db, job)
+                    elif job.job_type == JobType.PRUNE:
+                        await self._run_prune(db, job)
+                    await job_repo.finish(job)
+                except Exception as e:
+                    logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+                    await db.rollback()
+                    job = await db.get(Job, job_id)
+                    await job_repo.finish(job, error=str(e))
+
+                await db.commit()
+                logger.info(f"Job {job_id} finished with status {job.status.value}")
+        except Exception as e:
+            logger.error(f"Could not record result of job {job_id}: {e}", exc_info=True)
+        finally:
+            heartbeat.cancel()
+
+    async def _run_index(self, db, job: Job) -> None:
+        job_repo = JobRepository(db)
+        graph_repo = GraphRepository(db)
+        indexing_service = DreamIndexingService(db)
+        graphrag = get_graphrag_service(job.user_id)
+
+        if job.dream_id is not None:
+            # Requested for one dream: (re)insert it whether or not it is flagged indexed
+            dream = await graph_repo.get_dream_for_indexing(job.dream_id, job.user_id)
+            dreams = [dream] if dream else []
+        else:
+            await self._prune_deleted_dreams(db, job)
+            # Edited dreams are unindexed again; inserting them replaces their old content
+            dreams = await graph_repo.get_unindexed_dreams(job.user_id)
+        # An edit made while the job runs moves updated_at, which keeps that dream unindexed
+        seen_updated_at = {d.id: d.updated_at for d in dreams}
+        await job_repo.update_progress(job, total=(job.done or 0) + len(dreams))
+        await db.commit()
+        if not dreams:
+            return
+
+        prepared = await indexing_service.prepare_dreams_batch([d.id for d in dreams], job.user_id)
+        hashes = {dream["id"]: dream["hash"] for dream in prepared}
+        await self._embed_dreams(job.user_id, prepared)
+
+        # Dreams whose text is unchanged since it was last inserted never reach the LLM
+        tracked_ids = await graphrag.get_tracked_dream_ids()
+        stored_hashes = {d.id: d.index_hash for d in dreams}
+        unchanged_ids = {
+            dream["id"] for dream in prepared
+            if dream["id"] in tracked_ids and stored_hashes.get(dream["id"]) == dream["hash"]
+        }
+        dreams_to_index = [dream for dream in prepared if dream["id"] not in unchanged_ids]
+
+        async def on_batch(successful_ids: list[int], errors: list[str]) -> None:
+            if successful_ids:
+                await graph_repo.mark_dreams_indexed(successful_ids, seen_updated_at, hashes)
+                await graph_repo.sync_user_indexed_count(job.user_id)
+            await job_repo.update_progress(job, done=len(successful_ids), failed=len(errors), errors=errors)
+            await db.commit()
+
+        if unchanged_ids:
+            logger.info(f"Skipping {len(unchanged_ids)} unchanged dreams for user {job.user_id}")
+            await on_batch(sorted(unchanged_ids), [])
+
+        if dreams_to_index:
+            await graphrag.index_dreams_batch(dreams_to_index, on_batch=on_batch)
+
+    async def _run_reindex(self, db, job: Job) -> None:
+        if not (job.payload or {}).get("cleared"):
+            graph_repo = GraphRepository(db)
+            graphrag = get_graphrag_service(job.user_id)
+
+            logger.info(f"Clearing graph for user {job.user_id}")
+            await graphrag.clear_graph()
+            await graph_repo.reset_all_indexed_flags(job.user_id)
+            await graph_repo.update_user_indexed_count(job.user_id, 0)
+            job.payload = {**(job.payload or {}), "cleared": True}
+            job.done = 0
+            job.failed = 0
+            await db.commit()
+
+        await self._run_index(db, job)
+
+    async def _embed_dreams(self, user_id: int, prepared: list[dict]) -> None:
+        # The vector index only serves similarity lookups; a failure must not fail the graph job
+        try:
+            await get_dream_vector_index(user_id).upsert(prepared)
+        except Exception as e:
+            logger.warning(f"Could not embed dreams of user {user_id}: {e}")
+
+    async def _prune_deleted_dreams(self, db, job: Job) -> int:
+        graph_repo = GraphRepository(db)
+        graphrag = get_graphrag_service(job.user_id)
+        vector_index = get_dream_vector_index(job.user_id)
+
+        tracked_ids = await graphrag.get_tracked_dream_ids()
+        embedded_ids = vector_index.get_ids()
+        if not tracked_ids and not embedded_ids:
+            return 0
+
+        dream_ids = await graph_repo.get_dream_ids(job.user_id)
+        await vector_index.remove(sorted(embedded_ids - dream_ids))
+
+        deleted_ids = sorted(tracked_ids - dream_ids)
+        if deleted_ids:
+            await graphrag.remove_dreams(deleted_ids)
+
+        return len(deleted_ids)
+
+    async def _run_prune(self, db, job: Job) -> None:
+        job_repo = JobRepository(db)
+        graph_repo = GraphRepository(db)
+
+        removed = await self._prune_deleted_dreams(db, job)
+        await graph_repo.sync_user_indexed_count(job.user_id)
+        await job_repo.update_progress(job, total=removed, done=removed)
+
+    async def _run_extract(self, db, job: Job) -> None:
+        job_repo = JobRepository(db)
+        dream_repo = DreamRepository(db)
+
+        dream = await dream_repo.get_by_id(job.dream_id, job.user_id)
+        if dream is None:
+            raise ValueError(f"Dream {job.dream_id} not found")
+
+        await job_repo.update_progress(job, total=1)
+        if dream.ai_extraction_done:
+            await job_repo.update_progress(job, done=1)
+            return
+
+        await get_extraction_service().extract_and_save(
+            dream_id=dream.id,
+            user_id=job.user_id,
+            narrative=dream.narrative,
+            dream_date=dream.dream_date,
+            setting=dream.setting,
+            extraction_repo=ExtractionRepository(db),
+            dream_repo=dream_repo,
+        )
+        await job_repo.update_progress(job, done=1)
+
+
+_job_worker: Optional[JobWorker] = None
+
+
+def get_job_worker() -> JobWorker:
+    global _job_worker
+    if _job_worker is None:
+        _job_worker = JobWorker(concurrency=max(1, settings.job_workers))
+
+    return _job_worker
@@ -1,23 +1,181 @@
+import asyncio
 import base64
+import copy
+import hashlib
 import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncGenerator, BinaryIO, Optional
 
-from google import genai
 from google.genai import types
 
 from app.config import settings
 from app.logger import logger
-from app.services.gemini_client import generate_content_with_retry
+from app.services.audio_segments import SEGMENT_MIME_TYPE, analyze_recording, extract_segment, ffmpeg_available, \
+    plan_segments, trim_overlap
+from app.services.gemini_client import generate_content_with_retry, get_client
+from app.services.image_preprocessing import prepare_images
+
+# Images of one request analyzed side by side
+MAX_PARALLEL_IMAGES = 4
+# Larger recordings go through the Files API, which reads them in chunks
+INLINE_AUDIO_MAX_BYTES = 8 * 1024 * 1024
+# How often an uploaded file is checked while Gemini processes it
+FILE_POLL_SECONDS = 1.0
+
+
+class ImageAnalysisCache:
+    """Process-wide LRU of parsed image analyses.
+
+    Keyed by the model and the hash of the image bytes plus caption, so previewing
+    the same upload again skips the Gemini call.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+
+    def key(self, model: str, image_bytes: bytes, caption: str) -> str:
+        digest = hashlib.sha256(image_bytes)
+        digest.update(b"\0" + caption.encode("utf-8") + b"\0" + model.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Callers merge into these lists, so hand out a copy
+        return copy.deepcopy(result)
+
+    def set(self, key: str, result: dict) -> None:
+        self._entries[key] = copy.deepcopy(result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_image_analysis_cache: Optional[ImageAnalysisCache] = None
+
+
+def get_image_analysis_cache() -> ImageAnalysisCache:
+    global _image_analysis_cache
+    if _image_analysis_cache is None:
+        _image_analysis_cache = ImageAnalysisCache(settings.image_analysis_cache_max_entries)
+
+    return _image_analysis_cache
+
+
+def get_image_analysis_cache_metrics() -> dict:
+    return get_image_analysis_cache().snapshot()
 
 
 class MultimodalService:
     def __init__(self):
-        self.client = genai.Client(api_key=settings.gemini_api_key)
+        self.client = get_client()
         self.model = settings.llm_model
 
     async def transcribe_audio(self, audio_bytes: bytes, mime_type: str) -> str:
-        audio_part = types.Part.from_bytes(data=audio_bytes, mime_type=mime_type)
+        return await self._transcribe_part(types.Part.from_bytes(data=audio_bytes, mime_type=mime_type))
+
+    async def transcribe_audio_file(self, path: str, mime_type: str) -> str:
+        """Transcribe a spooled upload without ever holding a large recording in memory."""
+        if os.path.getsize(path) <= INLINE_AUDIO_MAX_BYTES:
+            audio_bytes = await asyncio.to_thread(Path(path).read_bytes)
+            return await self.transcribe_audio(audio_bytes, mime_type)
+
+        # Given a path, the SDK reads the file asynchronously, a chunk at a time
+        uploaded = await self.client.aio.files.upload(
+            file=path, config=types.UploadFileConfig(mime_type=mime_type),
+        )
+        try:
+            while uploaded.state == types.FileState.PROCESSING:
+                await asyncio.sleep(FILE_POLL_SECONDS)
+                uploaded = await self.client.aio.files.get(name=uploaded.name)
+            if uploaded.state == types.FileState.FAILED:
+                raise RuntimeError(f"Gemini could not process uploaded audio {uploaded.name}")
+
+            return await self._transcribe_part(
+                types.Part.from_uri(file_uri=uploaded.uri, mime_type=uploaded.mime_type or mime_type)
+            )
+        finally:
+            try:
+                await self.client.aio.files.delete(name=uploaded.name)
+            except Exception as e:
+                logger.warning(f"Failed to delete uploaded audio {uploaded.name}: {e}")
+
+    async def transcribe_recording(self, path: str, mime_type: str) -> AsyncGenerator[str, None]:
+        """Yield the transcript of a spooled recording in order, one piece per completed segment.
+
+        Recordings longer than a window are split at pauses, or at fixed windows with
+        overlap, and the segments are transcribed concurrently. Without ffmpeg, or for
+        short recordings, the whole file is transcribed in one call.
+        """
+        window = settings.transcription_window_seconds
+        segments = None
+        if ffmpeg_available():
+            try:
+                duration, silences = await analyze_recording(path)
+                if duration > window + settings.transcription_overlap_seconds:
+                    segments = plan_segments(duration, silences, window, settings.transcription_overlap_seconds)
+            except Exception as e:
+                logger.warning(f"Could not segment recording, transcribing it whole: {e}")
+
+        if not segments:
+            yield await self.transcribe_audio_file(path, mime_type)
+            return
+
+        logger.info(f"Transcribing recording in {len(segments)} segments")
+        semaphore = asyncio.Semaphore(settings.transcription_max_parallel)
+
+        async def transcribe_segment(start: float, end: float) -> str:
+            async with semaphore:
+                audio_bytes = await extract_segment(path, start, end)
+                return await self._transcribe_part(
+                    types.Part.from_bytes(data=audio_bytes, mime_type=SEGMENT_MIME_TYPE), excerpt=True,
+                )
 
-        response = generate_content_with_retry(
+        tasks = [asyncio.create_task(transcribe_segment(start, end)) for start, end in segments]
+        try:
+            transcript = ""
+            # Later segments keep running while earlier ones are awaited and sent
+            for task in tasks:
+                text = await task
+                if transcript:
+                    text = trim_overlap(transcript, text)
+                if text:
+                    transcript = f"{transcript} {text}" if transcript else text
+                    yield text
+        finally:
+            # No-op once finished; stops the remaining segments if the client goes away
+            for task in tasks:
+                task.cancel()
+
+    async def _transcribe_part(self, audio_part: types.Part, excerpt: bool = False) -> str:
+        excerpt_text = (
+            " This is an excerpt of a longer recording and may start or end mid-sentence; "
+            "transcribe only what is said in it."
+        ) if excerpt else ""
+
+        response = await generate_content_with_retry(
             self.client,
             self.model,
             [
@@ -29,6 +187,7 @@ class MultimodalService:
                             "Transcribe this audio recording of someone describing a dream. "
                             "Output ONLY the transcribed text, nothing else. "
                             "Clean up filler words and false starts but preserve the dream content faithfully."
+                            f"{excerpt_text}"
                         )),
                     ],
                 )
@@ -49,80 +208,115 @@ class MultimodalService:
     async def analyze_images(
         self, images: list[dict]
     ) -> list[dict]:
-        results = []
+        """Analyze the images concurrently; results come back in input order."""
+        return await self._analyze_all([
+            (base64.b64decode(image_data["base64"]), image_data["mime_type"], image_data.get("caption") or "")
+            for image_data in images
+        ])
 
-        for image_data in images:
-            image_bytes = base64.b64decode(image_data["base64"])
-            image_part = types.Part.from_bytes(
-                data=image_bytes, mime_type=image_data["mime_type"]
-            )
+    async def analyze_image_files(self, images: list[tuple[BinaryIO, str, str]]) -> list[dict]:
+        """Analyze spooled (file, mime type, caption) uploads; results come back in input order."""
+        contents = await asyncio.gather(*(asyncio.to_thread(file.read) for file, _, _ in images))
+        return await self._analyze_all([
+            (image_bytes, mime_type, caption) for image_bytes, (_, mime_type, caption) in zip(contents, images)
+        ])
 
-            caption = image_data.get("caption", "")
-            caption_text = f'\nThe user described this image as: "{caption}"' if caption else ""
-
-            response = generate_content_with_retry(
-                self.client,
-                self.model,
-                [
-                    types.Content(
-                        role="user",
-                        parts=[
-                            image_part,
-                            types.Part(text=(
-                                "Analyze this dream-related image (a sketch, painting, or photo representing a dream). "
-                                f"{caption_text}\n\n"
-                                "Extract dream elements from the visual content. Respond with ONLY valid JSON:\n"
-                                "{\n"
-                                '  "description": "Brief description of what the image depicts",\n'
-                                '  "symbols": [{"name": "symbol_name", "category": "object|place|action|animal|nature|body|other", "context": "how it appears in the image"}],\n'
-                                '  "characters": [{"name": "character_name", "character_type": "known_person|unknown_person|self|animal|mythical|abstract", "context": "how they appear"}],\n'
-                                '  "themes": ["theme1", "theme2"],\n'
-                                '  "emotions": ["emotion1", "emotion2"]\n'
-                                "}"
-                            )),
-                        ],
-                    )
-                ],
-                types.GenerateContentConfig(
-                    temperature=0.7,
-                    thinking_config=types.ThinkingConfig(thinking_level="high"),
-                ),
-            )
+    async def _analyze_all(self, images: list[tuple[bytes, str, str]]) -> list[dict]:
+        cache = get_image_analysis_cache()
+        results: list[dict | None] = [None] * len(images)
+        misses = []
+        for i, (image_bytes, mime_type, caption) in enumerate(images):
+            # Keyed on the upload as received, so a hit skips preprocessing too
+            key = cache.key(self.model, image_bytes, caption)
+            results[i] = cache.get(key)
+            if results[i] is None:
+                misses.append((i, key, image_bytes, mime_type, caption))
 
-            raw = ""
-            for candidate in response.candidates:
-                for part in candidate.content.parts:
-                    if hasattr(part, "text") and part.text:
-                        raw += part.text
+        prepared = await prepare_images([(image_bytes, mime_type) for _, _, image_bytes, mime_type, _ in misses])
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_IMAGES)
 
-            try:
-                cleaned = raw.strip()
-                if cleaned.startswith("```"):
-                    cleaned = cleaned.split("\n", 1)[1] if "\n" in cleaned else cleaned[3:]
-                    if cleaned.endswith("```"):
-                        cleaned = cleaned[:-3]
-                    cleaned = cleaned.strip()
-
-                parsed = json.loads(cleaned)
-                results.append({
-                    "description": parsed.get("description", ""),
-                    "symbols": parsed.get("symbols", []),
-                    "characters": parsed.get("characters", []),
-                    "themes": parsed.get("themes", []),
-                    "emotions": parsed.get("emotions", []),
-                })
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.error(f"Failed to parse image analysis response: {e}, raw: {raw[:500]}")
-                results.append({
-                    "description": raw[:200] if raw else "Could not analyze image",
-                    "symbols": [],
-                    "characters": [],
-                    "themes": [],
-                    "emotions": [],
-                })
+        async def analyze(i: int, key: str, image_bytes: bytes, mime_type: str, caption: str) -> None:
+            async with semaphore:
+                results[i] = await self._analyze_image(key, image_bytes, mime_type, caption)
+
+        await asyncio.gather(*(
+            analyze(i, key, image_bytes, mime_type, caption)
+            for (i, key, _, _, caption), (image_bytes, mime_type) in zip(misses, prepared)
+        ))
 
         return results
 
+    async def _analyze_image(self, key: str, image_bytes: bytes, mime_type: str, caption: str) -> dict:
+        image_part = types.Part.from_bytes(
+            data=image_bytes, mime_type=mime_type
+        )
+        caption_text = f'\nThe user described this image as: "{caption}"' if caption else ""
+
+        response = await generate_content_with_retry(
+            self.client,
+            self.model,
+            [
+                types.Content(
+                    role="user",
+                    parts=[
+                        image_part,
+                        types.Part(text=(
+                            "Analyze this dream-related image (a sketch, painting, or photo representing a dream). "
+                            f"{caption_text}\n\n"
+                            "Extract dream elements from the visual content. Respond with ONLY valid JSON:\n"
+                            "{\n"
+                            '  "description": "Brief description of what the image depicts",\n'
+                            '  "symbols": [{"name": "symbol_name", "category": "object|place|action|animal|nature|body|other", "context": "how it appears in the image"}],\n'
+                            '  "characters": [{"name": "character_name", "character_type": "known_person|unknown_person|self|animal|mythical|abstract", "context": "how they appear"}],\n'
+                            '  "themes": ["theme1", "theme2"],\n'
+                            '  "emotions": ["emotion1", "emotion2"]\n'
+                            "}"
+                        )),
+                    ],
+                )
+            ],
+            types.GenerateContentConfig(
+                temperature=0.7,
+                thinking_config=types.ThinkingConfig(thinking_level="high"),
+            ),
+        )
+
+        raw = ""
+        for candidate in response.candidates:
+            for part in candidate.content.parts:
+                if hasattr(part, "text") and part.text:
+                    raw += part.text
+
+        try:
+            cleaned = raw.strip()
+            if cleaned.startswith("```"):
+                cleaned = cleaned.split("\n", 1)[1] if "\n" in cleaned else cleaned[3:]
+                if cleaned.endswith("```"):
+                    cleaned = cleaned[:-3]
+                cleaned = cleaned.strip()
+
+            parsed = json.loads(cleaned)
+            result = {
+                "description": parsed.get("description", ""),
+                "symbols": parsed.get("symbols", []),
+                "characters": parsed.get("characters", []),
+                "themes": parsed.get("themes", []),
+                "emotions": parsed.get("emotions", []),
+            }
+        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            logger.error(f"Failed to parse image analysis response: {e}, raw: {raw[:500]}")
+            # Not cached, so the next preview of this image gets another try
+            return {
+                "description": raw[:200] if raw else "Could not analyze image",
+                "symbols": [],
+                "characters": [],
+                "themes": [],
+                "emotions": [],
+            }
+
+        get_image_analysis_cache().set(key, result)
+        return result
+
 
 _multimodal_service: MultimodalService | None = None
 
@@ -0,0 +1,59 @@
+import asyncio
+import time
+from typing import Optional
+
+from app.config import settings
+
+# Same heuristic fast-graphrag uses to size its context windows
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens refill per second up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, amount: float) -> float:
+        """Wait until `amount` tokens are available and take them. Returns seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+
+        async with self._lock:
+            self._refill()
+            while self._tokens < amount:
+                wait = (amount - self._tokens) / self.rate
+                await asyncio.sleep(wait)
+                waited += wait
+                self._refill()
+            self._tokens -= amount
+
+        return waited
+
+
+_index_rate_limiter: Optional[TokenBucket] = None
+
+
+def get_index_rate_limiter() -> TokenBucket:
+    """Process-wide limiter for GraphRAG indexing, shared by all users of the API key."""
+    global _index_rate_limiter
+    if _index_rate_limiter is None:
+        _index_rate_limiter = TokenBucket(
+            rate=settings.graph_index_tokens_per_minute / 60.0,
+            capacity=settings.graph_index_burst_tokens,
+        )
+
+    return _index_rate_limiter
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import re
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.logger import logger
+from app.schemas.tool_data import ToolResult
+from app.services.dream_vector_index import embed_texts
+
+# Near-identical questions asked of one user's graph; older answers fall off first
+ANSWERS_PER_USER = 32
+
+_response_cache_stats = {
+    "tool_hits": 0,
+    "tool_misses": 0,
+    "answer_hits": 0,
+    "answer_misses": 0,
+    "evictions": 0,
+}
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def normalize_args(args: dict) -> str:
+    # Agent lookups match names case-insensitively, so "Water" and "water " share a result
+    normalized = {
+        key: _normalize_text(value) if isinstance(value, str) else value
+        for key, value in args.items()
+    }
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class ToolResultCache:
+    """Process-wide LRU of successful agent tool results.
+
+    Keyed by user, tool and normalized arguments, and stamped with the user's
+    data version, which dream, symbol, character and graph writes bump.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[int, ToolResult]] = OrderedDict()
+
+    async def get_or_compute(
+        self,
+        user_id: int,
+        tool_name: str,
+        args: dict,
+        version: int,
+        compute: Callable[[], Awaitable[ToolResult]],
+    ) -> ToolResult:
+        key = (user_id, tool_name, normalize_args(args))
+        entry = self._entries.get(key)
+        if entry and entry[0] == version:
+            self._entries.move_to_end(key)
+            _response_cache_stats["tool_hits"] += 1
+            return entry[1]
+
+        _response_cache_stats["tool_misses"] += 1
+        result = await compute()
+        if not result.success:
+            return result
+
+        self._entries[key] = (version, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            _response_cache_stats["evictions"] += 1
+
+        return result
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class QueryAnswerCache:
+    """Per-user GraphRAG answers, matched by question embedding similarity.
+
+    A user's answers are dropped as soon as their data version moves on. Users
+    are evicted least recently used first. Concurrent asks of the same normalized
+    question share one computation; different questions run side by side.
+    """
+
+    def __init__(self, max_users: int, similarity: float):
+        self.max_users = max_users
+        self.similarity = similarity
+        self._users: OrderedDict[int, tuple[int, list[tuple[str, np.ndarray, object]]]] = OrderedDict()
+        self._pending: dict[tuple[int, int, str], asyncio.Future] = {}
+
+    def _answers(self, user_id: int, version: int) -> list[tuple[str, np.ndarray, object]]:
+        entry = self._users.get(user_id)
+        if entry is None or entry[0] != version:
+            entry = (version, [])
+            self._users[user_id] = entry
+        self._users.move_to_end(user_id)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+            _response_cache_stats["evictions"] += 1
+
+        return entry[1]
+
+    async def get_or_compute(self, user_id: int, question: str, version: int, compute: Callable[[], Awaitable]):
+        normalized = _normalize_text(question)
+        key = (user_id, version, normalized)
+
+        # Lookups and inserts run without awaiting in between, so they can't interleave
+        for text, _, result in self._answers(user_id, version):
+            if text == normalized:
+                _response_cache_stats["answer_hits"] += 1
+                return result
+
+        pending = self._pending.get(key)
+        if pending:
+            _response_cache_stats["answer_hits"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The asking call was cancelled rather than this one; take over
+                return await self.get_or_compute(user_id, question, version, compute)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            result = await self._lookup_or_compute(user_id, normalized, version, compute)
+        except BaseException as e:
+            if isinstance(e, Exception):
+                future.set_exception(e)
+                # Waiters re-raise; mark it retrieved so an unawaited future doesn't log
+                future.exception()
+            else:
+                future.cancel()
+            raise
+        finally:
+            self._pending.pop(key, None)
+
+        future.set_result(result)
+        return result
+
+    async def _lookup_or_compute(self, user_id: int, normalized: str, version: int, compute: Callable[[], Awaitable]):
+        vector = None
+        try:
+            vector = (await embed_texts([normalized], "SEMANTIC_SIMILARITY"))[0]
+        except Exception as e:
+            logger.warning(f"Answer cache embedding failed for user {user_id}: {e}")
+
+        answers = self._answers(user_id, version)
+        if vector is not None and answers:
+            scores = np.stack([v for _, v, _ in answers]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] >= self.similarity:
+                _response_cache_stats["answer_hits"] += 1
+                logger.debug(f"Answer cache hit for user {user_id} at similarity {scores[best]:.3f}")
+                return answers[best][2]
+
+        _response_cache_stats["answer_misses"] += 1
+        result = await compute()
+        if vector is not None and getattr(result, "query_type", None) not in ("empty", "error"):
+            # Skipped if the user was evicted or moved to a newer version while this ran
+            entry = self._users.get(user_id)
+            if entry and entry[0] == version:
+                entry[1].append((normalized, vector, result))
+                del entry[1][:-ANSWERS_PER_USER]
+
+        return result
+
+    def __len__(self) -> int:
+        return sum(len(answers) for _, answers in self._users.values())
+
+
+_tool_result_cache: Optional[ToolResultCache] = None
+_query_answer_cache: Optional[QueryAnswerCache] = None
+
+
+def get_tool_result_cache() -> ToolResultCache:
+    global _tool_result_cache
+    if _tool_result_cache is None:
+        _tool_result_cache = ToolResultCache(max_entries=settings.response_cache_max_entries)
+
+    return _tool_result_cache
+
+
+def get_query_answer_cache() -> QueryAnswerCache:
+    global _query_answer_cache
+    if _query_answer_cache is None:
+        _query_answer_cache = QueryAnswerCache(
+            max_users=settings.answer_cache_max_users,
+            similarity=settings.answer_cache_similarity,
+        )
+
+    return _query_answer_cache
+
+
+def get_response_cache_metrics() -> dict:
+    tool_lookups = _response_cache_stats["tool_hits"] + _response_cache_stats["tool_misses"]
+    answer_lookups = _response_cache_stats["answer_hits"] + _response_cache_stats["answer_misses"]
+    return {
+        **_response_cache_stats,
+        "tool_entries": len(get_tool_result_cache()),
+        "answer_entries": len(get_query_answer_cache()),
+        "tool_hit_rate": round(_response_cache_stats["tool_hits"] / tool_lookups, 3) if tool_lookups else 0.0,
+        "answer_hit_rate": round(_response_cache_stats["answer_hits"] / answer_lookups, 3) if answer_lookups else 0.0,
+    }
@@ -0,0 +1,20 @@
+"""Standalone background job worker: `python -m app.worker`."""
+
+import asyncio
+
+from app.config import settings
+from app.logger import logger
+from app.services.job_worker import JobWorker
+
+
+async def main() -> None:
+    worker = JobWorker(concurrency=max(1, settings.job_workers))
+    logger.info("dream job worker starting")
+    try:
+        await worker.run_forever()
+    finally:
+        await worker.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
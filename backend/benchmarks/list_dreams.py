@@ -0,0 +1,154 @@
+"""Query count and latency of the dream list at page sizes 25 and 100.
+
+Seeds a throwaway user with 5k dreams inside a transaction that is rolled back,
+then compares the batched `DreamRepository.list_dreams` with the previous
+per-dream (N+1) summary loading.
+
+    python -m benchmarks.list_dreams [--dreams 5000] [--runs 20]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import engine
+from app.models.users import User
+from app.models.dreams import Dream
+from app.models.symbols import Symbol
+from app.models.dream_symbols import DreamSymbol
+from app.models.dream_emotions import DreamEmotion
+from app.models.dream_characters import DreamCharacter
+from app.models.enums.dream_enums import EmotionType
+from app.repositories.dream_repository import DreamRepository
+
+EMOTIONS = ["fear", "joy", "anxiety", "wonder", "sadness", "calm", "confusion"]
+PAGE_SIZES = [25, 100]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+async def seed(db: AsyncSession, dream_count: int) -> int:
+    user_id = (await db.execute(
+        insert(User).values(email=f"bench-{uuid.uuid4().hex}@example.com", password_hash="x", name="bench")
+        .returning(User.id)
+    )).scalar_one()
+
+    symbol_ids = list((await db.execute(
+        insert(Symbol).returning(Symbol.id),
+        [{"user_id": user_id, "name": f"Symbol {i}", "name_normalized": f"symbol {i}"} for i in range(50)],
+    )).scalars())
+
+    start = date.today() - timedelta(days=dream_count)
+    dream_ids = list((await db.execute(
+        insert(Dream).returning(Dream.id),
+        [
+            {"user_id": user_id, "narrative": f"Benchmark dream {i}", "dream_date": start + timedelta(days=i)}
+            for i in range(dream_count)
+        ],
+    )).scalars())
+
+    await db.execute(insert(DreamEmotion), [
+        {"dream_id": dream_id, "emotion": emotion, "emotion_type": EmotionType.DURING, "intensity": 5}
+        for dream_id in dream_ids
+        for emotion in random.sample(EMOTIONS, 2)
+    ])
+    await db.execute(insert(DreamSymbol), [
+        {"dream_id": dream_id, "symbol_id": symbol_id}
+        for dream_id in dream_ids
+        for symbol_id in random.sample(symbol_ids, 3)
+    ])
+
+    return user_id
+
+
+async def list_dreams_n_plus_one(db: AsyncSession, user_id: int, per_page: int) -> list[dict]:
+    """The summary loading `list_dreams` used before batching."""
+    query = (
+        select(Dream).where(Dream.user_id == user_id)
+        .order_by(Dream.dream_date.desc(), Dream.id.desc()).limit(per_page + 1)
+    )
+    dreams = list((await db.execute(query)).scalars().all())[:per_page]
+
+    summaries = []
+    for dream in dreams:
+        emotions = (await db.execute(
+            select(DreamEmotion.emotion).where(DreamEmotion.dream_id == dream.id)
+        )).scalars().all()
+        symbol_count = (await db.execute(
+            select(func.count(DreamSymbol.id)).where(DreamSymbol.dream_id == dream.id)
+        )).scalar()
+        character_count = (await db.execute(
+            select(func.count(DreamCharacter.id)).where(DreamCharacter.dream_id == dream.id)
+        )).scalar()
+        summaries.append({
+            "dream": dream, "emotions": list(emotions),
+            "symbol_count": symbol_count, "character_count": character_count,
+        })
+
+    return summaries
+
+
+async def measure(db: AsyncSession, counter: QueryCounter, runs: int, fn) -> tuple[float, float, int]:
+    latencies = []
+    queries = 0
+    for _ in range(runs):
+        counter.count = 0
+        start = time.perf_counter()
+        await fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+        queries = counter.count
+
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1], queries
+
+
+async def main(dream_count: int, runs: int) -> None:
+    counter = QueryCounter()
+
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        db = AsyncSession(bind=conn, expire_on_commit=False)
+        try:
+            print(f"Seeding {dream_count} dreams...")
+            user_id = await seed(db, dream_count)
+            await db.flush()
+            repo = DreamRepository(db)
+
+            print(f"{'loader':<12}{'page':>6}{'queries':>10}{'p50 ms':>10}{'p95 ms':>10}")
+            for per_page in PAGE_SIZES:
+                loaders = {
+                    "n+1": lambda: list_dreams_n_plus_one(db, user_id, per_page),
+                    "batched": lambda: repo.list_dreams(user_id=user_id, per_page=per_page),
+                }
+                for name, fn in loaders.items():
+                    p50, p95, queries = await measure(db, counter, runs, fn)
+                    print(f"{name:<12}{per_page:>6}{queries:>10}{p50:>10.1f}{p95:>10.1f}")
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", counter)
+            await db.close()
+            await transaction.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dreams", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.dreams, args.runs))
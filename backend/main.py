@@ -12,19 +12,39 @@ from app.controllers.character_controllers import character_router, dream_charac
 from app.controllers.chat_controllers import chat_router
 from app.controllers.graph_controllers import graph_router
 from app.controllers.analytics_controllers import analytics_router
-from app.controllers.extraction_controller import extraction_router
+from app.controllers.extraction_controller import extraction_router, UPLOAD_BODY_LIMITS
+from app.core.upload_limits import UploadLimitMiddleware
 from app.controllers.demo import demo_router
+from app.controllers.job_controllers import job_router
+from app.services.gemini_client import get_gemini_metrics
+from app.services.graphrag_service import get_indexing_metrics, get_graph_cache_metrics
+from app.services.extraction_cache import get_extraction_cache_metrics
+from app.services.analytics_cache import get_analytics_cache_metrics
+from app.services.embedding_cache import get_embedding_cache_metrics
+from app.services.dream_vector_index import get_vector_index_cache_metrics
+from app.services.response_cache import get_response_cache_metrics
+from app.services.agent_sessions import get_agent_session_metrics
+from app.services.agent_context import get_agent_context_metrics
+from app.services.multimodal_service import get_image_analysis_cache_metrics
+from app.services.image_preprocessing import get_image_preprocessing_metrics
+from app.services.job_worker import get_job_worker
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("dream service starting")
     logger.info(f"Debug mode: {settings.debug}")
+    if settings.job_workers > 0:
+        get_job_worker().start()
     yield
     logger.info("Shutting down")
+    if settings.job_workers > 0:
+        await get_job_worker().stop()
 
 app = FastAPI(lifespan=lifespan)
 
+# Added first so CORS wraps it and early 413s still carry CORS headers
+app.add_middleware(UploadLimitMiddleware, limits=UPLOAD_BODY_LIMITS)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -44,12 +64,31 @@ app.include_router(analytics_router)
 app.include_router(chat_router)
 app.include_router(extraction_router)
 app.include_router(demo_router)
+app.include_router(job_router)
 
 @app.get("/health", tags=["Health"])
 async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", tags=["Health"])
+async def get_metrics():
+    return {
+        "gemini": get_gemini_metrics(),
+        "graph_indexing": get_indexing_metrics(),
+        "graph_cache": get_graph_cache_metrics(),
+        "extraction_cache": get_extraction_cache_metrics(),
+        "analytics_cache": get_analytics_cache_metrics(),
+        "embedding_cache": get_embedding_cache_metrics(),
+        "vector_index_cache": get_vector_index_cache_metrics(),
+        "response_cache": get_response_cache_metrics(),
+        "agent_sessions": get_agent_session_metrics(),
+        "agent_context": get_agent_context_metrics(),
+        "image_analysis_cache": get_image_analysis_cache_metrics(),
+        "image_preprocessing": get_image_preprocessing_metrics(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     logger.info(f'Starting app with host={settings.host} port={settings.port} debug={settings.debug}')
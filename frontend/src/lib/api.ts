@@ -31,6 +31,39 @@ api.interceptors.response.use(
   }
 )
 
+// ============== JOBS ==============
+
+export interface Job {
+  id: number
+  job_type: 'index' | 'reindex' | 'extract' | 'prune'
+  status: 'queued' | 'running' | 'completed' | 'failed'
+  dream_id: number | null
+  total: number
+  done: number
+  failed: number
+  errors: string[]
+  eta_seconds: number | null
+  created_at: string | null
+  started_at: string | null
+  finished_at: string | null
+}
+
+export const jobsApi = {
+  get: (id: number) => api.get<Job>(`/jobs/${id}`),
+}
+
+// Poll a background job until it completes; rejects if it fails
+export async function waitForJob(jobId: number, intervalMs = 2000): Promise<Job> {
+  for (;;) {
+    const { data: job } = await jobsApi.get(jobId)
+    if (job.status === 'completed') return job
+    if (job.status === 'failed') {
+      throw new Error(job.errors[job.errors.length - 1] || 'Job failed')
+    }
+    await new Promise((resolve) => setTimeout(resolve, intervalMs))
+  }
+}
+
 // ============== AUTH ==============
 
 export const authApi = {
@@ -187,7 +220,8 @@ export const dreamsApi = {
 
   delete: (id: number) => api.delete(`/dreams/${id}`),
 
-  extract: (id: number) => api.post<DreamResponse>(`/dreams/${id}/extract`),
+  extract: (id: number) =>
+    api.post<Job>(`/dreams/${id}/extract`).then((r) => waitForJob(r.data.id)),
 }
 
 // ============== SYMBOLS ==============
@@ -382,9 +416,12 @@ export interface GraphExport {
 export const graphApi = {
   status: () => api.get<GraphStatus>('/graph/status'),
 
-  index: () => api.post<{ success: boolean; dreams_indexed: number }>('/graph/index'),
+  index: () => api.post<Job>('/graph/index').then((r) => waitForJob(r.data.id)),
+
+  indexDream: (dreamId: number) =>
+    api.post<Job>(`/graph/index/${dreamId}`).then((r) => waitForJob(r.data.id)),
 
-  reindex: () => api.post<{ success: boolean; dreams_indexed: number }>('/graph/reindex'),
+  reindex: () => api.post<Job>('/graph/reindex').then((r) => waitForJob(r.data.id)),
 
   export: () => api.get<GraphExport>('/graph/export'),
 }